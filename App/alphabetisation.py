@@ -0,0 +1,293 @@
+import re
+import warnings
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from App.catalogue import VERSIONS_KEPT
+from App.metriques import counted_cache
+from App.resultats import precomputed
+
+# Séries annuelles du fichier d'alphabétisation
+# - conjsign / conjnosi : conjoints sachant / ne sachant pas signer
+# - palpha : nombre d'alphabétisés, peralpha : taux d'alphabétisation (%)
+SERIES_PREFIXES = ('peralpha', 'palpha', 'conjsign', 'conjnosi')
+
+
+class LiteracySeries:
+    # Colonnes annuelles découvertes une seule fois au chargement et rangées
+    # dans des blocs contigus (communes × années, float32) par préfixe.
+
+    def __init__(self, alpha_df):
+        self.years = {}
+        self.blocks = {}
+        for prefix in SERIES_PREFIXES:
+            pattern = re.compile(rf'^{prefix}(\d{{4}})$')
+            found = sorted(
+                (int(match.group(1)), col)
+                for col in alpha_df.columns
+                if (match := pattern.match(str(col)))
+            )
+            self.years[prefix] = np.array([year for year, _ in found], dtype=np.int16)
+            columns = [col for _, col in found]
+            self.blocks[prefix] = np.ascontiguousarray(
+                alpha_df[columns].to_numpy(dtype=np.float32, na_value=np.nan)
+            )
+
+        # Index (département, commune) -> position de la ligne
+        self.departments = alpha_df['nomdep'].to_numpy()
+        self.communes = alpha_df['nomcommune'].to_numpy()
+        self._positions = {}
+        for pos, key in enumerate(zip(self.departments, self.communes)):
+            self._positions.setdefault(key, pos)
+        self._communes_by_dep = {}
+        for dep, commune in self._positions:
+            self._communes_by_dep.setdefault(dep, []).append(commune)
+        for communes in self._communes_by_dep.values():
+            communes.sort()
+
+    def department_names(self):
+        return sorted(dep for dep in self._communes_by_dep if isinstance(dep, str))
+
+    def communes_of(self, dep):
+        return self._communes_by_dep.get(dep, [])
+
+    def locate(self, dep, commune):
+        return self._positions.get((dep, commune))
+
+    def year_index(self, prefix, year):
+        years = self.years[prefix]
+        idx = int(np.searchsorted(years, year))
+        if idx < len(years) and years[idx] == year:
+            return idx
+        return None
+
+    def span(self, prefix, first=None, last=None):
+        # Tranche [first, last] des colonnes d'une série
+        years = self.years[prefix]
+        lo = 0 if first is None else int(np.searchsorted(years, first, side='left'))
+        hi = len(years) if last is None else int(np.searchsorted(years, last, side='right'))
+        return slice(lo, hi)
+
+    def commune_history(self, pos, prefix='peralpha', first=None, last=None, dropna=True):
+        # Historique complet d'une commune : (années, valeurs) en une tranche
+        cols = self.span(prefix, first, last)
+        years = self.years[prefix][cols]
+        values = self.blocks[prefix][pos, cols]
+        if dropna:
+            keep = ~np.isnan(values)
+            years, values = years[keep], values[keep]
+        return years, values
+
+    def national_means(self, prefix, first=None, last=None):
+        # Moyennes nationales (NaN ignorés, comme DataFrame.mean) en une opération
+        cols = self.span(prefix, first, last)
+        block = self.blocks[prefix][:, cols]
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            means = np.nanmean(block, axis=0, dtype=np.float64)
+        return self.years[prefix][cols], means
+
+
+class DepartmentStats:
+    # Rangs et statistiques par (département, année) pré-calculés pour une série
+    # (peralpha par défaut) : le curseur d'année ne fait plus que des lectures.
+
+    def __init__(self, series, prefix='peralpha'):
+        self.prefix = prefix
+        self.years = series.years[prefix]
+        codes, names = pd.factorize(series.departments)
+        self.codes = codes.astype(np.int16)
+        self._dep_codes = {name: code for code, name in enumerate(names)}
+
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(names) + 1))
+        self.members = [order[bounds[i]:bounds[i + 1]] for i in range(len(names))]
+        self.sizes = np.diff(bounds).astype(np.int32)
+
+        values = pd.DataFrame(series.blocks[prefix])
+        grouped = values.groupby(codes, sort=True)
+        # Rang dans le département (1 = taux le plus élevé), NaN si valeur manquante
+        self.ranks = grouped.rank(ascending=False).to_numpy(dtype=np.float32)
+
+        def _table(frame):
+            return frame.reindex(range(len(names))).to_numpy(dtype=np.float32)
+
+        self.count = _table(grouped.count())
+        self.mean = _table(grouped.mean())
+        self.median = _table(grouped.median())
+        self.q1 = _table(grouped.quantile(0.25))
+        self.q3 = _table(grouped.quantile(0.75))
+        self._box_statistics(series.blocks[prefix])
+
+    def _box_statistics(self, block):
+        # Moustaches (1,5 × IQR, bornées aux valeurs observées) et points aberrants
+        n_deps, n_years = self.q1.shape
+        self.lower_fence = np.full((n_deps, n_years), np.nan, dtype=np.float32)
+        self.upper_fence = np.full((n_deps, n_years), np.nan, dtype=np.float32)
+        self._outliers = []
+        for code, rows in enumerate(self.members):
+            values = block[rows]
+            iqr = self.q3[code] - self.q1[code]
+            low = self.q1[code] - 1.5 * iqr
+            high = self.q3[code] + 1.5 * iqr
+            inside = (values >= low) & (values <= high)
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                self.lower_fence[code] = np.nanmin(np.where(inside, values, np.nan), axis=0)
+                self.upper_fence[code] = np.nanmax(np.where(inside, values, np.nan), axis=0)
+            # Aberrants rangés par année : (indices d'année, valeurs, positions), bornes par année
+            row_idx, year_idx = np.nonzero((values < low) | (values > high))
+            order = np.argsort(year_idx, kind='stable')
+            year_idx = year_idx[order].astype(np.int16)
+            bounds = np.searchsorted(year_idx, np.arange(n_years + 1))
+            self._outliers.append((
+                bounds,
+                values[row_idx[order], year_idx].astype(np.float32),
+                rows[row_idx[order]].astype(np.int32),
+            ))
+
+    def box(self, dep, year_idx):
+        # Statistiques prêtes pour go.Box (q1/median/q3/fences) + points aberrants
+        code = self._dep_codes[dep]
+        bounds, values, positions = self._outliers[code]
+        part = slice(bounds[year_idx], bounds[year_idx + 1])
+        return {
+            'q1': float(self.q1[code, year_idx]),
+            'median': float(self.median[code, year_idx]),
+            'q3': float(self.q3[code, year_idx]),
+            'mean': float(self.mean[code, year_idx]),
+            'lowerfence': float(self.lower_fence[code, year_idx]),
+            'upperfence': float(self.upper_fence[code, year_idx]),
+            'outliers': values[part],
+            'outlier_positions': positions[part],
+        }
+
+    def dep_code(self, dep):
+        return self._dep_codes.get(dep)
+
+    def summary(self, dep, year_idx):
+        code = self._dep_codes[dep]
+        return {
+            'mean': float(self.mean[code, year_idx]),
+            'median': float(self.median[code, year_idx]),
+            'q1': float(self.q1[code, year_idx]),
+            'q3': float(self.q3[code, year_idx]),
+            'count': int(self.count[code, year_idx]),
+            'total': int(self.sizes[code]),
+        }
+
+    def rank(self, pos, year_idx):
+        # (rang, nombre de communes du département, percentile "Top x%")
+        total = int(self.sizes[self.codes[pos]])
+        rank = float(self.ranks[pos, year_idx])
+        return rank, total, rank / total * 100
+
+    def values(self, series, dep, year_idx):
+        # Valeurs brutes des communes d'un département pour une année
+        return series.blocks[self.prefix][self.members[self._dep_codes[dep]], year_idx]
+
+
+def national_table(series):
+    # Toutes les moyennes nationales en une passe : une ligne par année,
+    # une colonne par série (NaN si la série n'existe pas cette année-là)
+    columns = {}
+    for prefix in SERIES_PREFIXES:
+        years, means = series.national_means(prefix)
+        columns[prefix] = pd.Series(means, index=years.astype(int))
+    table = pd.DataFrame(columns).sort_index()
+    table.index.name = 'year'
+    return table
+
+
+@dataclass(frozen=True)
+class CommuneHistory:
+    commune: str
+    years: np.ndarray
+    values: np.ndarray
+    total_change: float   # dernière - première valeur disponible (NaN si vide)
+
+
+def commune_history(series, pos, prefix='peralpha', first=1816, last=1946):
+    years, values = series.commune_history(pos, prefix, first, last)
+    change = float(values[-1] - values[0]) if len(values) else np.nan
+    return CommuneHistory(str(series.communes[pos]), years, values, change)
+
+
+@dataclass(frozen=True)
+class DepartmentComparison:
+    department: str
+    year: int
+    year_index: int       # colonne de l'année dans les blocs de la série
+    summary: dict         # DepartmentStats.summary
+    box: dict             # DepartmentStats.box
+    commune_value: float
+    rank: float           # NaN si la valeur de la commune manque
+    total: int
+    top_percent: float
+
+
+def department_comparison(series, stats, pos, dep, year):
+    # Position d'une commune dans son département pour une année (None si l'année manque)
+    year_idx = series.year_index(stats.prefix, year)
+    if year_idx is None:
+        return None
+    rank, total, top_percent = stats.rank(pos, year_idx)
+    return DepartmentComparison(
+        department=dep,
+        year=int(year),
+        year_index=year_idx,
+        summary=stats.summary(dep, year_idx),
+        box=stats.box(dep, year_idx),
+        commune_value=float(series.blocks[stats.prefix][pos, year_idx]),
+        rank=rank,
+        total=total,
+        top_percent=top_percent,
+    )
+
+
+@dataclass(frozen=True)
+class NationalTrends:
+    signatures: pd.Series      # conjsign, moyenne nationale par année
+    non_signatures: pd.Series  # conjnosi
+    literacy: pd.DataFrame     # palpha / peralpha, 1816-1946
+    signature_change: float    # évolution relative (%) de conjsign, première -> dernière année
+    literacy_change: float     # écart de peralpha (points), première -> dernière année
+
+
+def national_trends(table):
+    signatures = table['conjsign'].dropna()
+    non_signatures = table['conjnosi'].dropna()
+    literacy = table.loc[1816:1946, ['palpha', 'peralpha']].dropna()
+    signature_change = np.nan
+    if len(signatures):
+        signature_change = float((signatures.iloc[-1] - signatures.iloc[0]) / signatures.iloc[0] * 100)
+    literacy_change = float(literacy['peralpha'].iloc[-1] - literacy['peralpha'].iloc[0]) if len(literacy) else np.nan
+    return NationalTrends(signatures, non_signatures, literacy, signature_change, literacy_change)
+
+
+# Les caches ci-dessous sont indexés par la version du fichier source et non
+# par le contenu du DataFrame (le paramètre _alpha_df n'est pas haché).
+# max_entries : les anciennes versions sont libérées après un rechargement.
+@st.cache_resource(show_spinner=False, max_entries=VERSIONS_KEPT)
+def get_literacy_series(_alpha_df, version='alphabetisation'):
+    return LiteracySeries(_alpha_df)
+
+
+@counted_cache(st.cache_data(show_spinner=False, max_entries=VERSIONS_KEPT))
+def prepare_national_data(_alpha_df, version='alphabetisation'):
+    return national_table(get_literacy_series(_alpha_df, version))
+
+
+@st.cache_resource(show_spinner=False, max_entries=VERSIONS_KEPT * len(SERIES_PREFIXES))
+def get_department_stats(_alpha_df, version='alphabetisation', prefix='peralpha'):
+    stored = precomputed('department_stats', version, prefix=prefix)
+    return stored if stored is not None else DepartmentStats(get_literacy_series(_alpha_df, version), prefix)
+
+
+@st.cache_data(show_spinner=False, max_entries=VERSIONS_KEPT)
+def get_national_trends(_alpha_df, version='alphabetisation'):
+    stored = precomputed('national_trends', version)
+    return stored if stored is not None else national_trends(prepare_national_data(_alpha_df, version))
@@ -3,14 +3,22 @@ import streamlit as st
 import folium
 from streamlit_folium import st_folium
 import logging
+import time
 import requests
-import json
 import plotly.graph_objects as go
 import numpy as np
+from App.recherche import get_search_index, filter_options
+from App.elections import candidate_choices, get_department_vote_shares, load_geojson
+from App.indicateurs import commune_education, department_education
+from App.metriques import GEOCODING_SECONDS
+from App.traces import stage
+
+NIVEAUX = ['Supérieur', 'Bac', 'Sans diplôme']
 
 def get_coordinates(city_name):
     url = f"https://nominatim.openstreetmap.org/search?q={city_name},+France&format=json"
     headers = {'User-Agent': 'MonApplication/1.0'}
+    start, result = time.perf_counter(), 'empty'
     try:
         response = requests.get(url, headers=headers, timeout=5)
         response.raise_for_status()
@@ -18,16 +26,19 @@ def get_coordinates(city_name):
         if data:
             lat, lon = float(data[0]['lat']), float(data[0]['lon'])
             logging.info(f"Coordonnées trouvées pour {city_name}: Latitude {lat}, Longitude {lon}")
+            result = 'ok'
             return lat, lon
     except requests.exceptions.RequestException as e:
+        result = 'error'
         logging.error(f"Erreur de requête pour {city_name}: {e}")
+    finally:
+        GEOCODING_SECONDS.observe(time.perf_counter() - start, result=result)
     return None
 
 def create_commune_map(commune_coordinates=None):
     m = folium.Map(location=[46.6034, 1.8883], zoom_start=5)
     try:
-        with open('./Data/GeoJson/departements_uppercase_fixed.geojson', 'r', encoding='utf-8') as f:
-            geojson_data = json.load(f)
+        geojson_data = load_geojson()
         folium.GeoJson(geojson_data, name='geojson').add_to(m)
     except FileNotFoundError:
         logging.error("Fichier departements.geojson non trouvé.")
@@ -42,86 +53,77 @@ def create_commune_map(commune_coordinates=None):
     folium.LayerControl().add_to(m)
     return m
 
-def run_elections(pres_df, leg_df, diplomes_communes, diplomes_departements):
+def _gender_bars(education):
+    fig = go.Figure()
+    fig.add_trace(go.Bar(name='Hommes', x=NIVEAUX, y=list(education.men)))
+    fig.add_trace(go.Bar(name='Femmes', x=NIVEAUX, y=list(education.women)))
+    return fig
+
+def run_elections(pres_df, leg_df, diplomes_communes, diplomes_departements, versions=None):
     st.title("Analyse des élections et de l'éducation en France")
     
     type_election = st.sidebar.selectbox("Choisissez le type d'élection", ["Présidentielle", "Législative"])
     df_election = pres_df if type_election == "Présidentielle" else leg_df
 
-    # Get candidate columns
-    candidate_columns = [col for col in df_election.columns if col.startswith('voix') and col[4:].isalpha()]
+    # Libellé du candidat -> colonne voix*
+    candidate_columns = candidate_choices(df_election)
     
     if not candidate_columns:
         st.error("Aucune donnée de candidat trouvée dans le fichier")
         return
-        
-    # Create a mapping for candidate names
-    candidate_mapping = {
-        'AUG': 'Autres',
-        'NUP': 'NUPES',
-        'DVG': 'Divers Gauche',
-        'ECO': 'Écologistes',
-        'REG': 'Régionalistes',
-        'ENS': 'Ensemble',
-        'UDI': 'UDI',
-        'LR': 'Les Républicains',
-        'DVD': 'Divers Droite',
-        'REC': 'Reconquête',
-        'RN': 'Rassemblement National'
-    }
-    
-    # Get candidates from the columns
-    candidates = []
-    for col in candidate_columns:
-        candidate_code = col[4:]  # Remove 'voix' prefix
-        candidates.append(candidate_mapping.get(candidate_code, candidate_code))
-    
-    selected_candidate = st.sidebar.selectbox("Sélectionnez un candidat", sorted(candidates))
     
-    # Convert back to column name
-    reverse_mapping = {v: k for k, v in candidate_mapping.items()}
-    selected_column = f"voix{reverse_mapping.get(selected_candidate, selected_candidate)}"
+    selected_candidate = st.sidebar.selectbox("Sélectionnez un candidat", sorted(candidate_columns))
+    selected_column = candidate_columns[selected_candidate]
 
     try:
         # Create election results map
         m = folium.Map(location=[46.6034, 1.8883], zoom_start=6)
-        
-        with open('./Data/GeoJson/departements_uppercase_fixed.geojson', 'r', encoding='utf-8') as f:
-            geojson_data = json.load(f)
-        
-        # Calculate voting percentages
-        dept_results = df_election.groupby('dep').agg({
-            'exprimes': 'sum',
-            selected_column: 'sum'
-        }).reset_index()
-        
-        dept_results['percentage'] = (dept_results[selected_column] / dept_results['exprimes'] * 100)
+
+        with stage("geojson"):
+            geojson_data = load_geojson()
+
+        # Pourcentages par département, tous candidats (mis en cache par élection)
+        election_key = 'pres_df' if type_election == "Présidentielle" else 'leg_df'
+        with stage("parts des voix", rows=len(df_election)):
+            vote_shares = get_department_vote_shares(df_election, election_key, (versions or {}).get(election_key))
+            dept_results = vote_shares.choropleth_frame(selected_column)
 
         # Добавляем хороплет на карту
-        folium.Choropleth(
-            geo_data=geojson_data,
-            name='choropleth',
-            data=dept_results,
-            columns=['dep', 'percentage'],
-            key_on='feature.properties.code',
-            fill_color='YlOrRd',
-            fill_opacity=0.7,
-            line_opacity=0.2,
-            legend_name=f'Pourcentage des voix pour {selected_candidate}'
-        ).add_to(m)
+        with stage("carte choroplèthe"):
+            folium.Choropleth(
+                geo_data=geojson_data,
+                name='choropleth',
+                data=dept_results,
+                columns=['dep', 'percentage'],
+                key_on='feature.properties.code',
+                fill_color='YlOrRd',
+                fill_opacity=0.7,
+                line_opacity=0.2,
+                legend_name=f'Pourcentage des voix pour {selected_candidate}'
+            ).add_to(m)
         
-        # Отображаем карту
-        st_folium(m, width=800, height=600)
+            # Отображаем карту
+            st_folium(m, width=800, height=600)
         
         # Выбор департамента и коммуны
         departement_selectionne = st.sidebar.selectbox("Sélectionnez un département", df_election['nomdep'].unique())
-        df_departement = df_election[df_election['nomdep'] == departement_selectionne]
-        commune_selectionnee = st.sidebar.selectbox("Sélectionnez une commune", df_departement['nomcommune'].unique())
-        coordinates_api = get_coordinates(commune_selectionnee)
+        masque_departement = (df_election['nomdep'] == departement_selectionne).to_numpy()
+        df_departement = df_election[masque_departement]
+        recherche_commune = st.sidebar.text_input("🔎 Filtrer les communes")
+        index_communes = get_search_index(df_election, 'nomcommune', election_key, (versions or {}).get(election_key))
+        positions_departement = np.flatnonzero(masque_departement)
+        communes_proposees = list(dict.fromkeys(filter_options(index_communes, positions_departement, recherche_commune)))
+        if not communes_proposees:
+            st.sidebar.warning(f"Aucune commune ne correspond à « {recherche_commune} »")
+            communes_proposees = list(df_departement['nomcommune'].unique())
+        commune_selectionnee = st.sidebar.selectbox("Sélectionnez une commune", communes_proposees)
+        with stage("géocodage"):
+            coordinates_api = get_coordinates(commune_selectionnee)
 
         if coordinates_api:
-            departement_map = create_commune_map(coordinates_api)
-            st_folium(departement_map, width=700, height=500)
+            with stage("carte de la commune"):
+                departement_map = create_commune_map(coordinates_api)
+                st_folium(departement_map, width=700, height=500)
         else:
             st.warning(f"Impossible de récupérer les coordonnées pour {commune_selectionnee}.")
 
@@ -131,17 +133,14 @@ def run_elections(pres_df, leg_df, diplomes_communes, diplomes_departements):
         selected_year = st.selectbox("Sélectionnez l'année", range(2010, 2023))
         
         # График 1: Тенденции образования по департаментам
-        fig1 = go.Figure()
         # Using the selected department from sidebar
-        dept_education_data = diplomes_departements[diplomes_departements['nomdep'] == departement_selectionne]
-        if not dept_education_data.empty:
+        with stage("éducation du département"):
+            dept_education = department_education(diplomes_departements, diplomes_communes, departement_selectionne, selected_year)
+        if dept_education.totals is not None:
+            fig1 = go.Figure()
             fig1.add_trace(go.Bar(
-                x=['Supérieur', 'Bac', 'Sans diplôme'],
-                y=[
-                    dept_education_data[f'sup{selected_year}'].iloc[0],
-                    dept_education_data[f'bac{selected_year}'].iloc[0],
-                    dept_education_data[f'nodip{selected_year}'].iloc[0]
-                ],
+                x=NIVEAUX,
+                y=list(dept_education.totals),
                 name='Niveau d\'éducation'
             ))
             fig1.update_layout(
@@ -154,29 +153,8 @@ def run_elections(pres_df, leg_df, diplomes_communes, diplomes_departements):
         # График 2: Анализ по полу для выбранного департамента
         st.subheader("Tendances de l'éducation par sexe")
         
-        # Using the selected department from sidebar
-        dept_data = diplomes_communes[diplomes_communes['nomdep'] == departement_selectionne]
-        
-        if not dept_data.empty:
-            fig2 = go.Figure()
-            fig2.add_trace(go.Bar(
-                name='Hommes',
-                x=['Supérieur', 'Bac', 'Sans diplôme'],
-                y=[
-                    dept_data[f'suph{selected_year}'].sum(),
-                    dept_data[f'bach{selected_year}'].sum(),
-                    dept_data[f'nodiph{selected_year}'].sum()
-                ]
-            ))
-            fig2.add_trace(go.Bar(
-                name='Femmes',
-                x=['Supérieur', 'Bac', 'Sans diplôme'],
-                y=[
-                    dept_data[f'supf{selected_year}'].sum(),
-                    dept_data[f'bacf{selected_year}'].sum(),
-                    dept_data[f'nodipf{selected_year}'].sum()
-                ]
-            ))
+        if dept_education.men is not None:
+            fig2 = _gender_bars(dept_education)
             fig2.update_layout(
                 barmode='group',
                 title=f'Répartition par sexe et niveau d\'éducation - {departement_selectionne} ({selected_year})'
@@ -187,22 +165,16 @@ def run_elections(pres_df, leg_df, diplomes_communes, diplomes_departements):
         st.header(f"Analyse du niveau d'éducation - {commune_selectionnee}")
         
         # Get commune data and verify it exists
-        commune_education_data = diplomes_communes[
-            (diplomes_communes['nomcommune'] == commune_selectionnee) & 
-            (diplomes_communes['nomdep'] == departement_selectionne)
-        ]
+        with stage("éducation de la commune"):
+            commune_education_data = commune_education(diplomes_communes, departement_selectionne, commune_selectionnee, selected_year)
         
-        if not commune_education_data.empty:
+        if commune_education_data is not None:
             try:
                 # Chart 1: Total education levels in commune
-                total_sup = commune_education_data[f'suph{selected_year}'].values[0] + commune_education_data[f'supf{selected_year}'].values[0]
-                total_bac = commune_education_data[f'bach{selected_year}'].values[0] + commune_education_data[f'bacf{selected_year}'].values[0]
-                total_nodip = commune_education_data[f'nodiph{selected_year}'].values[0] + commune_education_data[f'nodipf{selected_year}'].values[0]
-    
                 fig3 = go.Figure()
                 fig3.add_trace(go.Bar(
-                    x=['Supérieur', 'Bac', 'Sans diplôme'],
-                    y=[total_sup, total_bac, total_nodip],
+                    x=NIVEAUX,
+                    y=list(commune_education_data.totals),
                     name='Total'
                 ))
                 fig3.update_layout(
@@ -214,25 +186,7 @@ def run_elections(pres_df, leg_df, diplomes_communes, diplomes_departements):
     
                 # Chart 2: Gender distribution in commune
                 st.subheader(f"Répartition par sexe - {commune_selectionnee}")
-                fig4 = go.Figure()
-                fig4.add_trace(go.Bar(
-                    name='Hommes',
-                    x=['Supérieur', 'Bac', 'Sans diplôme'],
-                    y=[
-                        commune_education_data[f'suph{selected_year}'].values[0],
-                        commune_education_data[f'bach{selected_year}'].values[0],
-                        commune_education_data[f'nodiph{selected_year}'].values[0]
-                    ]
-                ))
-                fig4.add_trace(go.Bar(
-                    name='Femmes',
-                    x=['Supérieur', 'Bac', 'Sans diplôme'],
-                    y=[
-                        commune_education_data[f'supf{selected_year}'].values[0],
-                        commune_education_data[f'bacf{selected_year}'].values[0],
-                        commune_education_data[f'nodipf{selected_year}'].values[0]
-                    ]
-                ))
+                fig4 = _gender_bars(commune_education_data)
                 fig4.update_layout(
                     barmode='group',
                     title=f'Répartition par sexe et niveau d\'éducation - {commune_selectionnee} ({selected_year})'
@@ -1,9 +1,14 @@
 import streamlit as st
-import pandas as pd
-import folium
 from streamlit_folium import st_folium
 import plotly.express as px
-import matplotlib.pyplot as plt
+import plotly.graph_objects as go
+import numpy as np
+from App.recherche import get_search_index, filter_options
+from App.traces import stage
+from App.immobilier import (
+    CUBE_DATASETS, DATASET_KEYS, commune_comparison, commune_histogram,
+    get_aggregation_cube, get_histograms, get_immobilier_dataset,
+)
 
 # def create_commune_map(coordinates_api, commune_selectionnee):
 #     """Crée une carte Folium centrée sur la commune sélectionnée."""
@@ -30,7 +35,7 @@ def run_immobilier(commune_selectionnee=None, coordinates_api=None,
                    basesfiscalcommune=None, basesfiscaldepartement=None,
                    capitalimmobilier=None, capitalimmobiliercommune=None,
                    capitalimmobilierdepartement=None, isfcommunes=None,
-                   terrescommunes=None):
+                   terrescommunes=None, versions=None):
 
     st.title("🏠 Capital Immobilier")
 
@@ -58,52 +63,127 @@ def run_immobilier(commune_selectionnee=None, coordinates_api=None,
         st.warning(f"⚠️ Aucune donnée disponible pour {type_capital_immobilier}.")
         return
 
+    # Moteur de requêtes (schéma, index département/commune, bloc numérique) mis en cache
+    with stage("moteur de requêtes", rows=len(df_capital_immobilier)):
+        dataset = get_immobilier_dataset(
+            df_capital_immobilier, type_capital_immobilier,
+            (versions or {}).get(DATASET_KEYS[type_capital_immobilier])
+        )
+
     # Sélection du département
-    departements_disponibles = df_capital_immobilier['nomdep'].unique()
+    departements_disponibles = dataset.departments
     departement_selectionne = st.sidebar.selectbox("📍 Sélectionnez un département", departements_disponibles)
 
-    # Filtrer les données par département
-    df_departement = df_capital_immobilier[df_capital_immobilier['nomdep'] == departement_selectionne]
-
-    # Sélection de la commune
-    communes_disponibles = df_departement['nomcommune'].unique()
+    # Lignes du département (index pré-calculé)
+    lignes_departement = dataset.department_rows(departement_selectionne)
+
+    # Sélection de la commune (avec filtre type-ahead)
+    recherche_commune = st.sidebar.text_input("🔎 Filtrer les communes")
+    with stage("index de recherche"):
+        index_communes = get_search_index(
+            df_capital_immobilier, 'nomcommune', type_capital_immobilier,
+            (versions or {}).get(DATASET_KEYS[type_capital_immobilier])
+        )
+    communes_disponibles = list(dict.fromkeys(
+        filter_options(index_communes, np.sort(lignes_departement), recherche_commune)
+    ))
+    if not communes_disponibles:
+        st.sidebar.warning(f"⚠️ Aucune commune ne correspond à « {recherche_commune} »")
+        communes_disponibles = dataset.communes(departement_selectionne)
     commune_selectionnee = st.sidebar.selectbox("🏘 Sélectionnez une commune", communes_disponibles)
+    ligne_commune = dataset.commune_row(departement_selectionne, commune_selectionnee)
 
     # Affichage des données filtrées
     st.write(f"### 📊 Données pour **{commune_selectionnee}** ({departement_selectionne})")
     
-    # Sélection des colonnes à afficher
-    colonnes_disponibles = df_departement.columns.tolist()
+    # Sélection des colonnes à afficher, regroupées par année
+    schema = dataset.schema
+    annees = list(schema.year_groups)
+    annee_selectionnee = st.selectbox(
+        "📅 Année des colonnes", [None] + annees,
+        format_func=lambda annee: "Toutes les années" if annee is None else str(annee)
+    )
+    colonnes_disponibles = schema.columns_for_year(annee_selectionnee)
     colonnes_selectionnees = st.multiselect("📌 Sélectionnez les colonnes à afficher :", colonnes_disponibles, default=colonnes_disponibles[:5])
 
-    if colonnes_selectionnees:
-        df_filtered = df_departement[df_departement['nomcommune'] == commune_selectionnee][colonnes_selectionnees]
-        st.dataframe(df_filtered)
+    if colonnes_selectionnees and ligne_commune is not None:
+        with stage("tableau et statistiques"):
+            df_filtered = dataset.select(ligne_commune, colonnes_selectionnees)
+            st.dataframe(df_filtered)
+
+            # Affichage des statistiques générales
+            st.write("### 📈 Statistiques générales")
+            st.write(dataset.describe(ligne_commune, colonnes_selectionnees))
 
-        # Affichage des statistiques générales
-        st.write("### 📈 Statistiques générales")
-        st.write(df_filtered.describe())
+        # Format long calculé une seule fois pour les deux graphiques
+        df_long = dataset.melt(ligne_commune, colonnes_selectionnees)
 
         # Graphique en barres (Valeurs par catégorie)
         if len(colonnes_selectionnees) > 1:
             st.write("### 📊 Répartition des valeurs")
-            fig = px.bar(df_filtered.melt(id_vars=['nomcommune']), x="variable", y="value", color="variable", title="Comparaison des valeurs")
+            fig = px.bar(df_long, x="variable", y="value", color="variable", title="Comparaison des valeurs")
             st.plotly_chart(fig)
 
         # Graphique circulaire (Pie Chart)
         if len(colonnes_selectionnees) > 1:
             st.write("### 🍰 Répartition des types d'immobilier")
-            fig_pie = px.pie(df_filtered.melt(id_vars=['nomcommune']), names="variable", values="value", title="Proportion des valeurs")
+            fig_pie = px.pie(df_long, names="variable", values="value", title="Proportion des valeurs")
             st.plotly_chart(fig_pie)
 
-        # Histogramme de distribution
+        # Comparaison commune / département / France depuis le cube d'agrégats
+        if type_capital_immobilier in CUBE_DATASETS:
+            st.write("### ⚖️ Comparaison avec le département et la France")
+            with stage("cube d'agrégats"):
+                cube = get_aggregation_cube(
+                    df_capital_immobilier, type_capital_immobilier,
+                    (versions or {}).get(DATASET_KEYS[type_capital_immobilier])
+                )
+            statistique = st.radio("Référence", ["mean", "q50"], horizontal=True,
+                                   format_func=lambda stat: "Moyenne" if stat == "mean" else "Médiane")
+            colonnes_cube = [col for col in colonnes_selectionnees if col in schema.numeric_columns]
+            df_comparaison = commune_comparison(dataset, cube, departement_selectionne, ligne_commune,
+                                                colonnes_cube, statistique)
+            fig_comparaison = px.bar(df_comparaison, x="variable", y="value", color="niveau", barmode="group",
+                                     title="Commune, département et France")
+            st.plotly_chart(fig_comparaison)
+            with st.expander("Agrégats détaillés (sommes, moyennes, quantiles)"):
+                st.dataframe(cube.benchmark(departement_selectionne, colonnes_cube))
+
+        # Histogramme de distribution (classes pré-calculées, position de la commune)
         st.write("### 📊 Distribution des valeurs")
-        fig, ax = plt.subplots()
-        df_filtered.hist(ax=ax, bins=10, grid=False)
-        st.pyplot(fig)
-
-    else:
+        with stage("histogrammes"):
+            histogrammes = get_histograms(
+                df_capital_immobilier, type_capital_immobilier,
+                (versions or {}).get(DATASET_KEYS[type_capital_immobilier])
+            )
+        col_hist, col_niveau = st.columns(2)
+        with col_hist:
+            colonne_hist = st.selectbox("Colonne", colonnes_selectionnees)
+        with col_niveau:
+            niveau_hist = st.radio("Communes comparées", ["Département", "France"], horizontal=True)
+        distribution = commune_histogram(histogrammes, dataset, departement_selectionne, ligne_commune,
+                                         colonne_hist, national=niveau_hist == "France")
+        fig_hist = go.Figure(go.Bar(
+            x=distribution.centers,
+            y=distribution.counts,
+            width=distribution.widths,
+            name="Communes"
+        ))
+        if not np.isnan(distribution.commune_value):
+            fig_hist.add_vline(x=distribution.commune_value, line_color="red", line_dash="dash",
+                               annotation_text=commune_selectionnee)
+        fig_hist.update_layout(
+            title=f"Distribution de {colonne_hist} ({niveau_hist.lower()})",
+            xaxis_title=colonne_hist,
+            yaxis_title="Nombre de communes",
+            bargap=0.05
+        )
+        st.plotly_chart(fig_hist)
+
+    elif not colonnes_selectionnees:
         st.warning("⚠️ Veuillez sélectionner au moins une colonne.")
+    else:
+        st.warning(f"⚠️ Aucune donnée pour la commune {commune_selectionnee} dans ce jeu de données.")
 
     # Affichage de la carte
     if coordinates_api:
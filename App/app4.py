@@ -3,49 +3,36 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
+from App.alphabetisation import (
+    commune_history, department_comparison, get_department_stats, get_literacy_series, get_national_trends,
+)
+from App.tuiles import PALETTE, available_years, tile_url
+from App.traces import stage
 
-@st.cache_data
-def prepare_national_data(alpha_df):
-    # Подготовка данных для национальной статистики
-    sign_columns = [col for col in alpha_df.columns if col.startswith('conjsign')]
-    nosi_columns = [col for col in alpha_df.columns if col.startswith('conjnosi')]
-    
-    sign_data = {}
-    nosign_data = {}
-    
-    for col in sign_columns:
-        year = col.replace('conjsign', '')
-        sign_data[year] = alpha_df[col].mean()
-    
-    for col in nosi_columns:
-        year = col.replace('conjnosi', '')
-        nosign_data[year] = alpha_df[col].mean()
-    
-    return sign_data, nosign_data
-
-def run_detailed_analysis(alpha_df):
+def run_detailed_analysis(alpha_df, version='alphabetisation'):
     try:
         st.title("Analyse détaillée par département et commune")
         
+        # Séries annuelles (peralpha, palpha, conjsign, conjnosi) indexées une seule fois
+        with stage("séries annuelles", rows=len(alpha_df)):
+            series = get_literacy_series(alpha_df, version)
+        
         # Создаем селекторы для департамента и коммуны
-        departments = sorted(alpha_df['nomdep'].unique())
+        departments = series.department_names()
         selected_dep = st.selectbox("Sélectionnez un département", departments)
         
         # Фильтруем коммуны по выбранному департаменту
-        communes = sorted(alpha_df[alpha_df['nomdep'] == selected_dep]['nomcommune'].unique())
+        communes = series.communes_of(selected_dep)
         selected_commune = st.selectbox("Sélectionnez une commune", communes)
         
         # Получаем данные для выбранной коммуны
-        commune_data = alpha_df[
-            (alpha_df['nomdep'] == selected_dep) & 
-            (alpha_df['nomcommune'] == selected_commune)
-        ]
+        commune_pos = series.locate(selected_dep, selected_commune)
         
-        if commune_data.empty:
+        if commune_pos is None:
             st.error("Aucune donnée trouvée pour cette commune")
             return
             
-        commune_data = commune_data.iloc[0]
+        commune_data = alpha_df.iloc[commune_pos]
         
         # Отображаем информационные карточки
         col1, col2, col3 = st.columns(3)
@@ -55,30 +42,23 @@ def run_detailed_analysis(alpha_df):
             st.metric("Code département", commune_data['dep'])
         with col3:
             # Вычисляем средний уровень алфабетизации за последний доступный год
-            latest_year = max([int(col.replace('peralpha', '')) 
-                             for col in commune_data.index 
-                             if col.startswith('peralpha')])
-            latest_alpha = commune_data[f'peralpha{latest_year}']
+            latest_year = int(series.years['peralpha'][-1])
+            latest_alpha = series.blocks['peralpha'][commune_pos, -1]
             st.metric("Dernier taux d'alphabétisation", 
                      f"{latest_alpha:.1f}%",
                      f"Année {latest_year}")
         
         # Создаем график исторической динамики
-        tab1, tab2, tab3 = st.tabs(["Évolution historique", "Comparaison départementale", "Évolution nationale"])
+        tab1, tab2, tab3, tab4 = st.tabs(["Évolution historique", "Comparaison départementale", "Évolution nationale", "Carte des communes"])
         
         with tab1:
-            years = range(1816, 1947)
+            with stage("historique de la commune"):
+                history = commune_history(series, commune_pos, 'peralpha', 1816, 1946)
             historical_data = {
-                'year': [],
-                'percentage': []
+                'year': history.years.tolist(),
+                'percentage': history.values.tolist()
             }
             
-            for year in years:
-                col_name = f'peralpha{year}'
-                if col_name in commune_data.index and not pd.isna(commune_data[col_name]):
-                    historical_data['year'].append(year)
-                    historical_data['percentage'].append(commune_data[col_name])
-            
             if historical_data['year']:
                 fig = px.line(
                     historical_data,
@@ -95,10 +75,9 @@ def run_detailed_analysis(alpha_df):
                 st.plotly_chart(fig, use_container_width=True)
                 
                 # Добавляем статистику изменений
-                total_change = historical_data['percentage'][-1] - historical_data['percentage'][0]
                 st.metric(
                     "Progression totale",
-                    f"{total_change:.1f}%",
+                    f"{history.total_change:.1f}%",
                     f"De {historical_data['year'][0]} à {historical_data['year'][-1]}"
                 )
         
@@ -108,78 +87,104 @@ def run_detailed_analysis(alpha_df):
                 1816, 1946, 
                 1900
             )
-            comparison_col = f'peralpha{year_comparison}'
-            
-            dep_data = alpha_df[alpha_df['nomdep'] == selected_dep].copy()
-            
-            # Добавляем базовую статистику
-            mean_alpha = dep_data[comparison_col].mean()
-            median_alpha = dep_data[comparison_col].median()
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                st.metric("Moyenne départementale", f"{mean_alpha:.1f}%")
-            with col2:
-                st.metric("Médiane départementale", f"{median_alpha:.1f}%")
-            
-            # Улучшенный box plot
-            fig2 = go.Figure()
-            fig2.add_trace(go.Box(
-                y=dep_data[comparison_col],
-                name=selected_dep,
-                boxpoints='all',
-                jitter=0.3,
-                pointpos=-1.8
-            ))
-            
-            # Добавляем точку для выбранной коммуны
-            fig2.add_trace(
-                go.Scatter(
-                    x=[selected_dep],
-                    y=[commune_data[comparison_col]],
-                    mode='markers',
-                    name=selected_commune,
-                    marker=dict(size=12, color='red', symbol='star')
+            # Rangs et statistiques pré-calculés par (département, année)
+            with stage("comparaison départementale"):
+                dep_stats = get_department_stats(alpha_df, version)
+                comparison = department_comparison(series, dep_stats, commune_pos, selected_dep, year_comparison)
+            if comparison is None:
+                st.warning(f"Aucune donnée d'alphabétisation pour {year_comparison}")
+            else:
+                summary = comparison.summary
+                commune_value = comparison.commune_value
+                
+                # Добавляем базовую статистику
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.metric("Moyenne départementale", f"{summary['mean']:.1f}%")
+                with col2:
+                    st.metric("Médiane départementale", f"{summary['median']:.1f}%")
+                with col3:
+                    st.metric("1er quartile", f"{summary['q1']:.1f}%")
+                with col4:
+                    st.metric("3e quartile", f"{summary['q3']:.1f}%")
+                
+                # Box plot construit à partir des statistiques pré-calculées ;
+                # les valeurs brutes ne sont envoyées que sur demande
+                show_all_points = st.checkbox("Afficher toutes les communes du département", value=False)
+                fig2 = go.Figure()
+                if show_all_points:
+                    fig2.add_trace(go.Box(
+                        y=dep_stats.values(series, selected_dep, comparison.year_index),
+                        name=selected_dep,
+                        boxpoints='all',
+                        jitter=0.3,
+                        pointpos=-1.8
+                    ))
+                else:
+                    box = comparison.box
+                    fig2.add_trace(go.Box(
+                        x=[selected_dep],
+                        q1=[box['q1']],
+                        median=[box['median']],
+                        q3=[box['q3']],
+                        mean=[box['mean']],
+                        lowerfence=[box['lowerfence']],
+                        upperfence=[box['upperfence']],
+                        name=selected_dep
+                    ))
+                    if len(box['outliers']):
+                        fig2.add_trace(go.Scatter(
+                            x=[selected_dep] * len(box['outliers']),
+                            y=box['outliers'],
+                            mode='markers',
+                            name='Valeurs atypiques',
+                            marker=dict(size=5, color='grey'),
+                            text=series.communes[box['outlier_positions']],
+                            hovertemplate="%{text}: %{y:.1f}%<extra></extra>"
+                        ))
+                
+                # Добавляем точку для выбранной коммуны
+                fig2.add_trace(
+                    go.Scatter(
+                        x=[selected_dep],
+                        y=[commune_value],
+                        mode='markers',
+                        name=selected_commune,
+                        marker=dict(size=12, color='red', symbol='star')
+                    )
                 )
-            )
-            
-            fig2.update_layout(
-                title=f"Distribution du taux d'alphabétisation dans {selected_dep} ({year_comparison})",
-                yaxis_title="Taux d'alphabétisation (%)",
-                showlegend=True,
-                height=500
-            )
-            
-            st.plotly_chart(fig2, use_container_width=True)
-            
-            # Добавляем ранг коммуны
-            commune_rank = dep_data[comparison_col].rank(ascending=False)
-            commune_rank = commune_rank[dep_data['nomcommune'] == selected_commune].iloc[0]
-            total_communes = len(dep_data)
-            
-            st.metric(
-                "Rang de la commune",
-                f"{int(commune_rank)} sur {total_communes}",
-                f"Top {(commune_rank/total_communes*100):.1f}%"
-            )
+                
+                fig2.update_layout(
+                    title=f"Distribution du taux d'alphabétisation dans {selected_dep} ({year_comparison})",
+                    yaxis_title="Taux d'alphabétisation (%)",
+                    showlegend=True,
+                    height=500
+                )
+                
+                st.plotly_chart(fig2, use_container_width=True)
+                
+                # Добавляем ранг коммуны
+                commune_rank, total_communes, top_percent = comparison.rank, comparison.total, comparison.top_percent
+                
+                if np.isnan(commune_rank):
+                    st.metric("Rang de la commune", "—", f"Donnée manquante en {year_comparison}")
+                else:
+                    st.metric(
+                        "Rang de la commune",
+                        f"{int(commune_rank)} sur {total_communes}",
+                        f"Top {top_percent:.1f}%"
+                    )
             
         with tab3:
             st.subheader("Évolution des indicateurs d'alphabétisation en France")
             
-            # Подготовка данных для подписей
-            sign_columns = [col for col in alpha_df.columns if col.startswith('conjsign')]
-            nosi_columns = [col for col in alpha_df.columns if col.startswith('conjnosi')]
-            
-            sign_data = {}
-            nosign_data = {}
-            
-            for col in sign_columns:
-                year = col.replace('conjsign', '')
-                sign_data[year] = alpha_df[col].mean()
-            
-            for col in nosi_columns:
-                year = col.replace('conjnosi', '')
-                nosign_data[year] = alpha_df[col].mean()
+            # Table nationale pré-calculée (une ligne par année), mise en cache par version
+            with stage("tendances nationales"):
+                trends = get_national_trends(alpha_df, version)
+            sign_series = trends.signatures
+            nosign_series = trends.non_signatures
+            sign_data = dict(zip(sign_series.index.astype(str), sign_series.values))
+            nosign_data = dict(zip(nosign_series.index.astype(str), nosign_series.values))
             
             # График для подписывающих/неподписывающих
             fig_sign = go.Figure()
@@ -205,19 +210,13 @@ def run_detailed_analysis(alpha_df):
             st.plotly_chart(fig_sign, use_container_width=True)
             
             # График для процента алфабетизации
-            years_alpha = range(1816, 1947)
+            alpha_table = trends.literacy
             alpha_means = {
-                'year': [],
-                'palpha': [],
-                'peralpha': []
+                'year': alpha_table.index.tolist(),
+                'palpha': alpha_table['palpha'].tolist(),
+                'peralpha': alpha_table['peralpha'].tolist()
             }
             
-            for year in years_alpha:
-                if f'palpha{year}' in alpha_df.columns and f'peralpha{year}' in alpha_df.columns:
-                    alpha_means['year'].append(year)
-                    alpha_means['palpha'].append(alpha_df[f'palpha{year}'].mean())
-                    alpha_means['peralpha'].append(alpha_df[f'peralpha{year}'].mean())
-            
             fig_alpha = go.Figure()
             fig_alpha.add_trace(go.Scatter(
                 x=alpha_means['year'],
@@ -243,20 +242,54 @@ def run_detailed_analysis(alpha_df):
             # Добавляем статистику изменений
             col1, col2 = st.columns(2)
             with col1:
-                years_sign = sorted(list(sign_data.keys()))
-                first_year = years_sign[0]
-                last_year = years_sign[-1]
-                sign_change = ((sign_data[last_year] - sign_data[first_year]) / sign_data[first_year] * 100)
+                first_year, last_year = sign_series.index[0], sign_series.index[-1]
                 st.metric(
                     f"Évolution capacité à signer ({first_year}-{last_year})",
-                    f"{sign_change:.1f}%"
+                    f"{trends.signature_change:.1f}%"
                 )
             with col2:
-                alpha_change = alpha_means['peralpha'][-1] - alpha_means['peralpha'][0]
                 st.metric(
                     "Évolution taux d'alphabétisation (1816-1946)",
-                    f"{alpha_change:.1f}%"
+                    f"{trends.literacy_change:.1f}%"
+                )
+        
+        with tab4:
+            st.subheader("Taux d'alphabétisation par commune en France")
+            
+            # Tuiles pré-générées hors ligne (python -m App.tuiles) : le navigateur ne
+            # charge que les tuiles visibles, aucun polygone ne passe par folium
+            tiled_years = available_years()
+            if not tiled_years:
+                st.info("Les tuiles de la carte ne sont pas encore générées : lancez `python -m App.tuiles`.")
+            else:
+                # folium, branca et streamlit_folium importés à la première carte affichée
+                import folium
+                from branca.colormap import LinearColormap
+                from streamlit_folium import st_folium
+
+                map_years = list(tiled_years)
+                default_year = 1900 if 1900 in tiled_years else map_years[-1]
+                map_year = st.select_slider("Année de la carte", options=map_years, value=default_year)
+                zooms = tiled_years[map_year]
+                
+                m = folium.Map(
+                    location=[46.6034, 1.8883],
+                    zoom_start=max(6, zooms['min_zoom']),
+                    min_zoom=zooms['min_zoom'],
+                    tiles='cartodbpositron'
                 )
+                folium.TileLayer(
+                    tiles=tile_url(map_year),
+                    attr="Alphabétisation par commune",
+                    name=f"Taux d'alphabétisation {map_year}",
+                    overlay=True,
+                    min_zoom=zooms['min_zoom'],
+                    max_native_zoom=zooms['max_zoom'],
+                    max_zoom=zooms['max_zoom'] + 3
+                ).add_to(m)
+                LinearColormap(PALETTE, vmin=0, vmax=100, caption="Taux d'alphabétisation (%)").add_to(m)
+                folium.LayerControl().add_to(m)
+                st_folium(m, width=900, height=650, returned_objects=[])
         
         # Delete everything below this point until the except statement
     except Exception as e:
@@ -1,7 +1,7 @@
 import streamlit as st
-import seaborn as sns
-import matplotlib.pyplot as plt
 import pandas as pd
+from App.graphiques import bar_chart, line_chart, show
+from App.population import ALPHA_YEARS, age_groups, commune_profile
 
 def run(agesexcommunes, alphabetisation, commune_selectionnee, votes_data):
     st.title("Graphique")
@@ -9,65 +9,45 @@ def run(agesexcommunes, alphabetisation, commune_selectionnee, votes_data):
 
     sexe_selectionne = st.sidebar.selectbox("Sélectionnez le sexe", ["Homme", "Femme"])
 
-    if sexe_selectionne == "Homme":
-        age_columns_sexe = [col for col in agesexcommunes.columns if col.startswith('poph')]
-        age_columns = [col for col in agesexcommunes.columns if col.startswith('ageh')]
-    elif sexe_selectionne == "Femme":
-        age_columns_sexe = [col for col in agesexcommunes.columns if col.startswith('popf')]
-        age_columns = [col for col in agesexcommunes.columns if col.startswith('agef')]
-
     st.sidebar.subheader(f"Choisissez un groupe d'âge pour {sexe_selectionne}")
-    age_label = st.sidebar.selectbox("Groupe d'âge", age_columns_sexe)
-
-    age_data_filtered = agesexcommunes[agesexcommunes['nomcommune'] == commune_selectionnee]
-
-    max_age_groups = 10
-    age_columns_sexe_limited = age_columns_sexe[:max_age_groups]
+    age_label = st.sidebar.selectbox("Groupe d'âge", age_groups(agesexcommunes, sexe_selectionne))
 
     st.sidebar.subheader("Sélectionnez une année d'alphabétisation")
-    annee_alphabetisation = st.sidebar.selectbox("Année", [1866, 1871, 1876, 1882, 1887, 1890, 1895, 1900, 1905, 1910, 1915, 1920, 1925, 1930, 1935, 1940, 1945, 1946])
+    annee_alphabetisation = st.sidebar.selectbox("Année", list(ALPHA_YEARS))
 
-    alpha_column = f'alpha{annee_alphabetisation}'
-    alpha_data_filtered = alphabetisation[alphabetisation['nomcommune'] == commune_selectionnee]
+    profil = commune_profile(agesexcommunes, alphabetisation, commune_selectionnee,
+                             sexe_selectionne, age_label, votes_data)
 
-    if not age_data_filtered.empty:
-        population_age = age_data_filtered[age_label].values[0]
-        st.success(f"Population {sexe_selectionne} dans le groupe d'âge {age_label} à {commune_selectionnee}: {population_age}")
+    if profil.population is not None:
+        st.success(f"Population {sexe_selectionne} dans le groupe d'âge {age_label} à {commune_selectionnee}: {profil.age_group_population}")
 
         st.subheader(f"Répartition de la population {sexe_selectionne} par groupe d'âge à {commune_selectionnee}")
-        population_values = age_data_filtered[age_columns_sexe_limited].values.flatten()
-
-        plt.figure(figsize=(10, 6))
-        sns.barplot(x=age_columns_sexe_limited, y=population_values, palette='viridis')
-        plt.xticks(rotation=45)
-        plt.xlabel("Groupe d'âge")
-        plt.ylabel("Population")
-        st.pyplot(plt)
-
-    if not alpha_data_filtered.empty:
+        fig = bar_chart(
+            profil.age_groups, profil.population,
+            xaxis_title="Groupe d'âge", yaxis_title="Population",
+            colorscale='Viridis', tickangle=45
+        )
+        show(fig)
+
+    if profil.alpha_values is not None:
         st.subheader("Évolution de l'alphabétisation au fil des années")
-        years = ['1866', '1871', '1876', '1882', '1887', '1890', '1895', '1900', '1905', '1910', '1915',
-                '1920', '1925', '1930', '1935', '1940', '1945', '1946']
-        alpha_values = alpha_data_filtered[[f'alpha{year}' for year in years]].values.flatten()
-        plt.figure(figsize=(12, 6))
-        plt.plot(years, alpha_values, marker='o', color='teal')
-        plt.title(f"Évolution de l'alphabétisation à {commune_selectionnee}")
-        plt.xlabel("Année")
-        plt.ylabel("Alphabétisation")
-        st.pyplot(plt)
+        fig = line_chart(
+            [str(year) for year in profil.alpha_years], profil.alpha_values, markers=True, color='teal',
+            title=f"Évolution de l'alphabétisation à {commune_selectionnee}",
+            xaxis_title="Année", yaxis_title="Alphabétisation"
+        )
+        show(fig)
     else:
         st.warning("Aucune donnée d'alphabétisation disponible pour cette commune.")
 
-    if not votes_data.empty:
+    if profil.votes is not None:
         st.subheader("Répartition des voix par candidat")
-        voix_columns = [col for col in votes_data.columns if col.startswith('voix')]
-        voix_data = votes_data[voix_columns].sum()
-        plt.figure(figsize=(12, 6))
-        sns.barplot(x=voix_data.index, y=voix_data.values, palette='magma')
-        plt.xticks(rotation=45)
-        plt.xlabel("Candidat")
-        plt.ylabel("Nombre de voix")
-        plt.title(f"Répartition des voix par candidat à {commune_selectionnee}")
-        st.pyplot(plt)
+        fig = bar_chart(
+            profil.votes.index, profil.votes.values,
+            title=f"Répartition des voix par candidat à {commune_selectionnee}",
+            xaxis_title="Candidat", yaxis_title="Nombre de voix",
+            colorscale='Magma', tickangle=45
+        )
+        show(fig)
     else:
         st.warning("Aucune donnée de voix disponible pour cette commune.")
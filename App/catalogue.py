@@ -0,0 +1,226 @@
+# Catalogue des jeux de données : empreinte de chaque fichier source (taille,
+# date, hachage du contenu), identifiant de version, et rechargement à chaud.
+#
+# La version d'un jeu ne dépend que de son contenu : remplacer un CSV par un
+# fichier identique ne l'invalide pas. Les caches dérivés (st.cache_data des
+# pages, magasin de résultats, stockage en colonnes) sont indexés par ces
+# versions, jeu par jeu : un fichier modifié n'invalide que ce qui en dépend.
+#
+# Chaque session lit un instantané du catalogue. Un fichier modifié est relu
+# dans un thread en arrière-plan puis remplacé d'un bloc : les nouvelles
+# sessions voient les nouvelles données, les sessions ouvertes gardent les
+# leurs jusqu'à ce qu'elles choisissent de passer à la nouvelle version.
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+
+import streamlit as st
+
+from App.chargement import DATA_FILES, load_datasets
+from App.metriques import DATASET_MEMORY, REGISTRY, counted_cache
+
+# Hachages déjà calculés, partagés entre l'application, le pipeline et le pré-calcul
+FINGERPRINTS_PATH = os.environ.get("EMPREINTES_PATH", "./Data/empreintes.json")
+# Intervalle minimal entre deux vérifications des fichiers (secondes)
+CHECK_INTERVAL = float(os.environ.get("CATALOGUE_INTERVALLE", "5"))
+# Versions d'un même jeu gardées par les caches dérivés (max_entries) : la
+# version courante et la précédente, encore lue par les sessions ouvertes
+VERSIONS_KEPT = 2
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    key: str
+    size: int
+    mtime_ns: int
+    sha256: str
+
+    @property
+    def version(self):
+        return f"{self.key}-{self.sha256[:16]}"
+
+
+_hash_lock = threading.Lock()
+_hash_cache = None
+
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 24), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _known_hashes():
+    global _hash_cache
+    if _hash_cache is None:
+        try:
+            with open(FINGERPRINTS_PATH) as f:
+                _hash_cache = json.load(f)
+        except (OSError, ValueError):
+            _hash_cache = {}
+    return _hash_cache
+
+
+def _save_hashes(hashes):
+    tmp = f"{FINGERPRINTS_PATH}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'w') as f:
+            json.dump(hashes, f, indent=1)
+        os.replace(tmp, FINGERPRINTS_PATH)
+    except OSError as e:
+        logging.warning(f"Empreintes non enregistrées ({FINGERPRINTS_PATH}) : {e}")
+
+
+def fingerprint(key, path=None):
+    # Empreinte du fichier ; le contenu n'est haché que si taille ou date ont changé.
+    # None si le fichier est absent.
+    path = path or DATA_FILES[key]
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    with _hash_lock:
+        known = _known_hashes().get(path)
+        if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+            return Fingerprint(key, stat.st_size, stat.st_mtime_ns, known['sha256'])
+    sha = _hash_file(path)
+    with _hash_lock:
+        hashes = _known_hashes()
+        hashes[path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha}
+        _save_hashes(hashes)
+    return Fingerprint(key, stat.st_size, stat.st_mtime_ns, sha)
+
+
+def dataset_version(key):
+    # Identifiant de version d'un fichier source, utilisé comme clé des caches
+    # dérivés à la place du hachage des DataFrames
+    found = fingerprint(key)
+    return f"{key}-absent" if found is None else found.version
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    # État du catalogue à un instant : {clé: DataFrame}, {clé: LoadStats}, {clé: version}
+    data: dict
+    stats: dict
+    versions: dict
+    created: float
+
+
+class Catalogue:
+
+    def __init__(self, files=DATA_FILES, check_interval=CHECK_INTERVAL):
+        self.files = dict(files)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._reloading = set()
+        self._checked = 0.0
+        # Date, taille et version relevées avant la lecture : un fichier remplacé
+        # pendant le chargement a une date différente et sera relu par refresh
+        self._stamps = {key: self._stamp(key) for key in self.files}
+        versions = {key: dataset_version(key) for key in self.files}
+        data, stats = load_datasets(self.files)
+        self._snapshot = Snapshot(data, stats, versions, time.time())
+        global _latest
+        _latest = weakref.ref(self)
+
+    def _stamp(self, key):
+        try:
+            stat = os.stat(self.files[key])
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def snapshot(self):
+        # Lecture sans verrou : l'instantané n'est jamais modifié, seulement remplacé
+        return self._snapshot
+
+    def reloading(self):
+        with self._lock:
+            return tuple(sorted(self._reloading))
+
+    def refresh(self):
+        # Vérification (au plus toutes les check_interval s) des dates et tailles ;
+        # chaque fichier modifié est relu dans son propre thread
+        now = time.monotonic()
+        if now - self._checked < self.check_interval:
+            return ()
+        self._checked = now
+        changed = []
+        for key in self.files:
+            stamp = self._stamp(key)
+            if stamp == self._stamps.get(key):
+                continue
+            with self._lock:
+                if key in self._reloading:
+                    continue
+                self._reloading.add(key)
+            changed.append(key)
+            threading.Thread(target=self._reload, args=(key, stamp), name=f"catalogue-{key}", daemon=True).start()
+        return tuple(changed)
+
+    def _reload(self, key, stamp):
+        try:
+            version = dataset_version(key)
+            if version == self._snapshot.versions.get(key):
+                # Fichier touché ou remplacé à l'identique : rien à recharger
+                logging.info(f"{key}: contenu inchangé ({version})")
+            else:
+                start = time.perf_counter()
+                data, stats = load_datasets({key: self.files[key]})
+                if key not in data:
+                    # Fichier en cours d'écriture ou invalide : nouvel essai à la prochaine vérification
+                    logging.error(f"{key}: rechargement impossible, version précédente conservée")
+                    return
+                with self._lock:
+                    old = self._snapshot
+                    self._snapshot = Snapshot(
+                        {**old.data, **data},
+                        {**old.stats, **stats},
+                        {**old.versions, key: version},
+                        time.time(),
+                    )
+                logging.info(f"{key}: rechargé en {time.perf_counter() - start:.2f} s ({version})")
+            with self._lock:
+                self._stamps[key] = stamp
+        except Exception as e:
+            logging.error(f"{key}: rechargement impossible ({e}), version précédente conservée")
+        finally:
+            with self._lock:
+                self._reloading.discard(key)
+
+
+# Dernier catalogue créé, pour les métriques ; mémoire mesurée par (jeu, version)
+_latest = None
+_memory = {}
+
+
+@REGISTRY.collector
+def _dataset_memory():
+    global _memory
+    catalogue = _latest() if _latest else None
+    if catalogue is None:
+        return
+    snapshot = catalogue.snapshot()
+    sizes, measured = {}, {}
+    for key, df in snapshot.data.items():
+        version = (key, snapshot.versions.get(key))
+        measured[version] = _memory[version] if version in _memory else int(df.memory_usage(deep=True).sum())
+        sizes[(key,)] = measured[version]
+    # Seules les versions de l'instantané courant sont gardées
+    _memory = measured
+    DATASET_MEMORY.replace(sizes)
+
+
+@counted_cache(st.cache_resource(show_spinner="Chargement des données…"))
+def load_data():
+    # Catalogue partagé par toutes les sessions (et le préchauffage). Fichiers lus
+    # en parallèle ; un fichier en erreur ne désactive que les pages qui l'utilisent.
+    return Catalogue(DATA_FILES)
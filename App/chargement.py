@@ -0,0 +1,165 @@
+import io
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Fichiers sources de l'application : clé du jeu de données -> chemin du CSV
+DATA_FILES = {
+    "agesexcommunes": "./Data/Age_csp/agesexcommunes.csv",
+    "agesexdepartements": "./Data/Age_csp/agesexdepartements.csv",
+    "alphabetisation": "./Data/Alphabetisation/alphabetisationcommunes.csv",
+    "pres_df": "./Data/Elections_csv/Pres2022.csv",
+    "leg_df": "./Data/Elections_csv/Legis2022.csv",
+    "basesfiscalcommune": "./Data/Capital_immobilier_csv/basesfiscalescommunes.csv",
+    "basesfiscaldepartement": "./Data/Capital_immobilier_csv/basesfiscalesdepartements.csv",
+    "capitalimmobilier": "./Data/Capital_immobilier_csv/capitalimmobilier.csv",
+    "capitalimmobiliercommune": "./Data/Capital_immobilier_csv/capitalimmobiliercommunes.csv",
+    "capitalimmobilierdepartement": "./Data/Capital_immobilier_csv/capitalimmobilierdepartements.csv",
+    "isfcommunes": "./Data/Capital_immobilier_csv/isfcommunes.csv",
+    "terrescommunes": "./Data/Capital_immobilier_csv/terrescommunes.csv",
+    "diplomes_communes": "./Data/Diplomes_csv/diplomescommunes.csv",
+    "diplomes_departements": "./Data/Diplomes_csv/diplomesdepartements.csv",
+}
+
+
+# Au-delà de CHUNK_BYTES, un fichier est découpé en tranches d'octets (alignées
+# sur les fins de ligne) lues en parallèle. Le lecteur C de pandas libère le
+# GIL : des threads suffisent, sans copier les DataFrames entre processus.
+CHUNK_BYTES = 32 * 1024 ** 2
+# Taille des blocs lus pour placer les limites des tranches
+SCAN_BYTES = 4 * 1024 ** 2
+
+
+@dataclass(frozen=True)
+class LoadStats:
+    key: str
+    path: str
+    seconds: float
+    rows: int
+    columns: int
+    bytes: int
+    chunks: int
+    error: str = None
+    source: str = "csv"   # "colonnes" si lu depuis le stockage en colonnes (App/stockage.py)
+
+
+def _byte_ranges(path, size, chunk_bytes):
+    # (en-tête, [(début, fin)]) : tranches commençant chacune au début d'une
+    # ligne. Un champ entre guillemets peut contenir des fins de ligne : seules
+    # comptent celles précédées d'un nombre pair de guillemets depuis le début
+    # du fichier (lecture complète, par blocs, avant le découpage).
+    starts, target, inside, offset = [], 0, False, 0
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(SCAN_BYTES), b''):
+            data = np.frombuffer(block, dtype=np.uint8)
+            newlines = data == ord('\n')
+            if inside or b'"' in block:
+                quoted = np.logical_xor.accumulate(data == ord('"')) ^ inside
+                newlines &= ~quoted
+                inside = bool(quoted[-1])
+            # Début de la ligne suivant chaque fin de ligne hors guillemets
+            line_starts = np.flatnonzero(newlines) + offset + 1
+            i = int(np.searchsorted(line_starts, target))
+            while i < len(line_starts):
+                starts.append(int(line_starts[i]))
+                target = starts[-1] + chunk_bytes
+                i = int(np.searchsorted(line_starts, target))
+            offset += len(block)
+        f.seek(0)
+        header = f.read(starts[0] if starts else size)
+    starts = starts[:1] + [start for start in starts[1:] if start < size]
+    return header, list(zip(starts, starts[1:] + [size]))
+
+
+def _parse_range(path, names, start, end, dtype=None, usecols=None):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        buffer = f.read(end - start)
+    if not buffer.strip():
+        return pd.DataFrame(columns=usecols or names)
+    return pd.read_csv(io.BytesIO(buffer), header=None, names=names, low_memory=False,
+                       dtype=dtype, usecols=usecols)
+
+
+def _read_file(pool, path, chunk_bytes):
+    # Lecture d'un fichier, en tranches parallèles s'il est gros : (DataFrame, nombre de tranches)
+    size = os.path.getsize(path)
+    if size < 2 * chunk_bytes:
+        return pd.read_csv(path, low_memory=False), 1
+    names = list(pd.read_csv(path, nrows=0).columns)
+    if len(set(names)) != len(names):
+        # Colonnes en double : renommage de pandas, pas de découpage
+        return pd.read_csv(path, low_memory=False), 1
+    _, ranges = _byte_ranges(path, size, chunk_bytes)
+    chunks = list(pool.map(lambda bounds: _parse_range(path, names, *bounds), ranges))
+
+    # Une colonne texte dans une tranche et numérique dans une autre (ex. dep :
+    # "01".."19" puis "2A") est relue en texte partout, comme le ferait une
+    # lecture d'un seul bloc
+    text_columns = [set(chunk.select_dtypes(exclude='number').columns) for chunk in chunks if len(chunk)]
+    mixed = [col for col in names if col in set.union(*text_columns) - set.intersection(*text_columns)]
+    if mixed:
+        as_text = {col: str for col in mixed}
+        reparsed = list(pool.map(
+            lambda bounds: _parse_range(path, names, *bounds, dtype=as_text, usecols=mixed), ranges
+        ))
+        for chunk, text in zip(chunks, reparsed):
+            chunk[mixed] = text[mixed]
+    return pd.concat(chunks, ignore_index=True), len(ranges)
+
+
+def read_dataset(path, workers=None, chunk_bytes=CHUNK_BYTES):
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return _read_file(pool, path, chunk_bytes)[0]
+
+
+def load_datasets(files=DATA_FILES, workers=None, chunk_bytes=CHUNK_BYTES):
+    # Lecture parallèle de tous les fichiers : ({clé: DataFrame}, {clé: LoadStats}).
+    # Un fichier illisible n'est que consigné dans ses statistiques, les autres
+    # sont chargés normalement.
+    from App.stockage import is_fresh, read_store, store_path
+
+    # Stockage en colonnes (App/stockage.py, App/pipeline.py) construit sur la
+    # version actuelle du CSV : lu à sa place
+    stored = {key for key, path in files.items() if path == DATA_FILES.get(key) and is_fresh(key)}
+
+    data, stats = {}, {}
+    # Deux pools : les fichiers d'un côté, les tranches des gros fichiers de l'autre
+    with ThreadPoolExecutor(max_workers=workers) as chunk_pool, \
+            ThreadPoolExecutor(max_workers=len(files) or 1) as file_pool:
+
+        def load(key, path):
+            start = time.perf_counter()
+            if key in stored:
+                df, chunks = read_store(store_path(key)), 1
+            else:
+                df, chunks = _read_file(chunk_pool, path, chunk_bytes)
+            return df, chunks, time.perf_counter() - start
+
+        futures = {file_pool.submit(load, key, path): key for key, path in files.items()}
+        for future in as_completed(futures):
+            key = futures[future]
+            path = files[key]
+            try:
+                df, chunks, seconds = future.result()
+            except Exception as e:
+                logging.error(f"Chargement de {key} ({path}) impossible : {e}")
+                stats[key] = LoadStats(key, path, 0.0, 0, 0, _file_size(path), 0, str(e))
+                continue
+            data[key] = df
+            source = "colonnes" if key in stored else "csv"
+            stats[key] = LoadStats(key, path, seconds, len(df), df.shape[1], _file_size(path), chunks, source=source)
+            logging.info(f"{key}: {len(df)} lignes × {df.shape[1]} colonnes en {seconds:.2f} s ({source}, {chunks} tranche(s))")
+    return data, {key: stats[key] for key in files}
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
@@ -0,0 +1,143 @@
+# Commandes de diagnostic de l'application
+#
+#   python -m App.diagnostics importtime [--runs 3] [--top 10]
+#   python -m App.diagnostics memoire [--prechauffage] [--top 15]
+import argparse
+import ast
+import logging
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+from App.pages import PAGES
+
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "MainApp.py")
+
+
+def startup_modules(path=MAIN_SCRIPT):
+    # Imports de premier niveau de MainApp, faits avant l'affichage de toute page
+    # (les imports dans un bloc conditionnel, ex. le panneau mémoire, n'en font pas partie)
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def parse_importtime(stderr):
+    # Sortie de -X importtime -> (total µs, {module: (propre µs, cumulé µs)})
+    total, modules = 0, {}
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_time, cumulative = int(match.group(1)), int(match.group(2))
+        indent, name = len(match.group(3)), match.group(4)
+        if indent == 1:
+            total += cumulative
+        modules[name] = (self_time, cumulative)
+    return total, modules
+
+
+def _run_importtime(code):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, check=True,
+    )
+    total, modules = parse_importtime(proc.stderr)
+    packages = {}
+    for name, (self_time, _) in modules.items():
+        root = name.split(".")[0]
+        packages[root] = packages.get(root, 0) + self_time
+    return total, packages, modules
+
+
+def import_time(modules, runs=3, preloaded=()):
+    # Temps d'import de `modules` dans des interpréteurs neufs (médianes), en ne
+    # comptant que le surcoût au-dessus de `preloaded` :
+    # (total en s, {paquet racine: temps propre en s}, {module: cumulé en s})
+    code = f"import {', '.join(list(preloaded) + list(modules))}"
+    totals, packages, cumulated = [], {}, {}
+    for _ in range(runs):
+        total, run_packages, parsed = _run_importtime(code)
+        if preloaded:
+            base_total, base_packages, _ = _run_importtime(f"import {', '.join(preloaded)}")
+            total -= base_total
+            run_packages = {root: value - base_packages.get(root, 0) for root, value in run_packages.items()}
+        totals.append(total)
+        for root, value in run_packages.items():
+            packages.setdefault(root, []).append(max(value, 0))
+        for name in modules:
+            if name in parsed:
+                cumulated.setdefault(name, []).append(parsed[name][1])
+    by_package = {root: statistics.median(values + [0] * (runs - len(values))) / 1e6
+                  for root, values in packages.items()}
+    by_module = {name: statistics.median(values) / 1e6 for name, values in cumulated.items()}
+    return statistics.median(totals) / 1e6, by_package, by_module
+
+
+def importtime_report(runs=3, top=10):
+    lines = []
+    modules = startup_modules()
+    startup, packages, _ = import_time(modules, runs)
+    lines.append(f"Démarrage (MainApp, avant toute page) : {startup:.3f} s")
+    for name, seconds in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        lines.append(f"    {name:<26} {seconds:7.3f} s")
+
+    # Surcoût de la première visite de chaque page, au-dessus du démarrage
+    for page in PAGES:
+        extra, packages, _ = import_time([page.module], runs, preloaded=modules)
+        lines.append(f"Page « {page.title} » ({page.module}) : +{extra:.3f} s à la première visite")
+        for name, seconds in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+            if seconds >= 0.001:
+                lines.append(f"    {name:<26} {seconds:7.3f} s")
+    return "\n".join(lines)
+
+
+def memory_command(warm=False, top=15):
+    # Jeux chargés comme dans l'application ; avec warm, les caches des vues
+    # par défaut sont remplis (étapes du préchauffage) avant d'être mesurés
+    from App.catalogue import load_data
+    from App.memoire import cache_memory, dataset_memory, memory_report
+    from App.prechauffage import STEPS
+
+    snapshot = load_data().snapshot()
+    if warm:
+        for step, (function, datasets) in STEPS.items():
+            if all(key in snapshot.data for key in datasets):
+                try:
+                    function(snapshot.data, snapshot.versions)
+                except Exception as e:
+                    logging.error(f"Préchauffage {step} : {e}")
+    datasets = [dataset_memory(name, df) for name, df in snapshot.data.items()]
+    return memory_report(datasets, cache_memory(snapshot.data.values()), top)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m App.diagnostics", description="Diagnostics de l'application")
+    commands = parser.add_subparsers(dest="command", required=True)
+    importtime = commands.add_parser("importtime", help="temps d'import au démarrage et par page")
+    importtime.add_argument("--runs", type=int, default=3)
+    importtime.add_argument("--top", type=int, default=10)
+    memoire = commands.add_parser("memoire", help="mémoire des jeux de données et des caches")
+    memoire.add_argument("--prechauffage", action="store_true", help="remplir les caches des vues par défaut")
+    memoire.add_argument("--top", type=int, default=15, help="nombre de conversions conseillées affichées")
+    args = parser.parse_args(argv)
+
+    if args.command == "importtime":
+        print(importtime_report(args.runs, args.top))
+    elif args.command == "memoire":
+        print(memory_command(args.prechauffage, args.top))
+
+
+if __name__ == "__main__":
+    main()
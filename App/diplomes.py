@@ -1,11 +1,10 @@
 import streamlit as st
-import seaborn as sns
-import matplotlib.pyplot as plt
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
+from App.graphiques import line_chart, show
 
 
 def run1(diplomes_communes, diplomes_departements, pres_df, legis_df=None):
@@ -104,13 +103,15 @@ def run1(diplomes_communes, diplomes_departements, pres_df, legis_df=None):
             # Graphiques supplémentaires depuis diplomes_pres.ipynb
             st.subheader("Graphiques supplémentaires")
             # Préparation des données
-            fig3 = plt.figure(figsize=(10, 6))
-            plt.plot(merged_df['codecommune'], merged_df['percent_high_edu'], label='Niveau d\'education')
-            plt.xlabel('Code de la commune')
-            plt.ylabel('Pourcentage de personnes avec un niveau d\'education supérieur (%)')
-            plt.title("Pourcentage de l'enseignement supérieur par commune")
-            plt.legend()
-            st.pyplot(fig3)
+            fig3 = line_chart(
+                merged_df['codecommune'].astype(str),
+                merged_df['percent_high_edu'],
+                name='Niveau d\'education',
+                title="Pourcentage de l'enseignement supérieur par commune",
+                xaxis_title='Code de la commune',
+                yaxis_title='Pourcentage de personnes avec un niveau d\'education supérieur (%)'
+            )
+            show(fig3)
     
     else:
         st.error("Il n'y a aucune donnée de vote dans l'ensemble de données sélectionné.")
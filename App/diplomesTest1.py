@@ -3,7 +3,10 @@ import seaborn as sns
 import matplotlib.pyplot as plt
 import pandas as pd
 import plotly.express as px
+from App.elections import aggregate_by_department
 
+# Helpers ligne par ligne (DataFrame.apply(axis=1)) ; pour toutes les communes
+# et toutes les années, utiliser App.indicateurs.education_shares
 def calculate_percentage_for_year_superieurs(row, year):
     sup_col_men = f'suph{year}'
     sup_col_women = f'supf{year}'
@@ -41,7 +44,10 @@ def run1(diplomes_communes, diplomes_departements, pres_df):
     
     # Объединение данных по коммунам и департаментам
     merged_communes_df = pd.merge(diplomes_communes, pres_df, left_on='codecommune', right_on='codecommune')
-    merged_departements_df = pd.merge(diplomes_departements, pres_df, left_on='nomdep', right_on='nomdep')
+    # pres_df est communal : on l'agrège d'abord par département (une ligne par
+    # département) pour éviter de répéter les colonnes de diplômes pour chaque commune
+    pres_departements = aggregate_by_department(pres_df)
+    merged_departements_df = pd.merge(diplomes_departements, pres_departements, on='nomdep', validate='many_to_one')
     
     st.write("\n### Structure après merge ###")
     st.write("Shape merged_communes:", merged_communes_df.shape)
@@ -0,0 +1,95 @@
+import json
+from dataclasses import dataclass
+
+import pandas as pd
+import streamlit as st
+
+from App.catalogue import VERSIONS_KEPT
+from App.resultats import precomputed
+
+# Jeux de données des élections (clés load_data)
+ELECTIONS = ('pres_df', 'leg_df')
+
+# Colonnes de comptage qui s'additionnent d'une commune à l'autre
+COUNT_PREFIXES = ('inscrits', 'votants', 'exprimes', 'blancs', 'nuls', 'abstentions', 'voix')
+
+# Contours des départements (cartes choroplèthes)
+GEOJSON_PATH = './Data/GeoJson/departements_uppercase_fixed.geojson'
+
+# Codes des nuances (législatives) -> libellé affiché
+CANDIDATE_LABELS = {
+    'AUG': 'Autres',
+    'NUP': 'NUPES',
+    'DVG': 'Divers Gauche',
+    'ECO': 'Écologistes',
+    'REG': 'Régionalistes',
+    'ENS': 'Ensemble',
+    'UDI': 'UDI',
+    'LR': 'Les Républicains',
+    'DVD': 'Divers Droite',
+    'REC': 'Reconquête',
+    'RN': 'Rassemblement National'
+}
+
+
+def vote_columns(df):
+    return [col for col in df.columns if col.startswith('voix')]
+
+
+def count_columns(df):
+    return [
+        col for col in df.columns
+        if col.startswith(COUNT_PREFIXES) and pd.api.types.is_numeric_dtype(df[col])
+    ]
+
+
+def candidate_choices(df):
+    # Libellé du candidat / de la nuance -> colonne voix*
+    return {
+        CANDIDATE_LABELS.get(col[4:], col[4:]): col
+        for col in vote_columns(df) if col[4:].isalpha()
+    }
+
+
+def aggregate_by_department(election_df, key='nomdep'):
+    # Résultats communaux -> une ligne par département (sommes des comptages).
+    # À joindre aux tables départementales au lieu de répéter chaque
+    # département pour chacune de ses communes.
+    columns = count_columns(election_df)
+    grouped = election_df.groupby(key, sort=False)
+    dept = grouped[columns].sum()
+    dept.insert(0, 'nb_communes', grouped.size())
+    return dept.reset_index()
+
+
+@dataclass(frozen=True)
+class DepartmentVoteShares:
+    departments: tuple     # codes département (clé 'dep' du GeoJSON)
+    exprimes: pd.Series
+    percentages: pd.DataFrame  # départements × colonnes voix*, en % des exprimés
+
+    def choropleth_frame(self, column):
+        # Table (dep, percentage) attendue par folium.Choropleth
+        return pd.DataFrame({'dep': list(self.departments), 'percentage': self.percentages[column].to_numpy()})
+
+
+def department_vote_shares(election_df, key='dep'):
+    # Pourcentage de chaque candidat par département, tous candidats en une passe
+    columns = vote_columns(election_df)
+    sums = election_df.groupby(key)[['exprimes'] + columns].sum()
+    percentages = sums[columns].div(sums['exprimes'], axis=0) * 100
+    return DepartmentVoteShares(tuple(sums.index), sums['exprimes'], percentages)
+
+
+@st.cache_data(show_spinner=False, max_entries=VERSIONS_KEPT * len(ELECTIONS))
+def get_department_vote_shares(_election_df, election, version=None):
+    stored = precomputed('vote_shares', version, election=election)
+    return stored if stored is not None else department_vote_shares(_election_df)
+
+
+@st.cache_data(show_spinner=False)
+def load_geojson(path=GEOJSON_PATH):
+    # Lu une seule fois ; cache_data rend une copie à chaque appel, folium
+    # modifie les styles des entités
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
@@ -0,0 +1,37 @@
+import plotly.graph_objects as go
+import streamlit as st
+
+# Graphiques communs en plotly (rendus côté navigateur, pas de PNG côté serveur).
+# Au-delà de WEBGL_THRESHOLD points, les courbes passent en WebGL (Scattergl).
+WEBGL_THRESHOLD = 5000
+
+
+def _scatter_trace(n_points):
+    return go.Scattergl if n_points > WEBGL_THRESHOLD else go.Scatter
+
+
+def bar_chart(x, y, title=None, xaxis_title=None, yaxis_title=None, colorscale=None, tickangle=None):
+    x, y = list(x), list(y)
+    marker = dict(color=list(range(len(x))), colorscale=colorscale) if colorscale else None
+    fig = go.Figure(go.Bar(x=x, y=y, marker=marker))
+    fig.update_layout(title=title, xaxis_title=xaxis_title, yaxis_title=yaxis_title)
+    if tickangle is not None:
+        fig.update_xaxes(tickangle=tickangle)
+    return fig
+
+
+def line_chart(x, y, name=None, title=None, xaxis_title=None, yaxis_title=None, markers=False, color=None):
+    y = list(y)
+    trace = _scatter_trace(len(y))
+    fig = go.Figure(trace(
+        x=list(x), y=y, name=name,
+        mode='lines+markers' if markers else 'lines',
+        line=dict(color=color) if color else None
+    ))
+    fig.update_layout(title=title, xaxis_title=xaxis_title, yaxis_title=yaxis_title, showlegend=name is not None)
+    return fig
+
+
+def show(fig, **kwargs):
+    st.plotly_chart(fig, use_container_width=True, **kwargs)
+
@@ -0,0 +1,307 @@
+import re
+import warnings
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from App.catalogue import VERSIONS_KEPT
+from App.resultats import precomputed
+
+# Colonnes d'identification communes aux fichiers du capital immobilier
+ID_COLUMNS = ('dep', 'nomdep', 'codecommune', 'nomcommune', 'codereg', 'nomreg')
+_YEAR_COLUMN = re.compile(r'^(.+?)((?:18|19|20)\d{2})$')
+
+
+@dataclass(frozen=True)
+class DatasetSchema:
+    name: str
+    id_columns: tuple
+    numeric_columns: tuple
+    year_groups: dict      # année -> colonnes numériques de cette année
+    other_columns: tuple   # colonnes numériques sans année
+
+    @classmethod
+    def infer(cls, name, df):
+        id_columns, numeric_columns, other_columns = [], [], []
+        year_groups = {}
+        for col in df.columns:
+            if col in ID_COLUMNS or not pd.api.types.is_numeric_dtype(df[col]):
+                id_columns.append(col)
+                continue
+            numeric_columns.append(col)
+            match = _YEAR_COLUMN.match(str(col))
+            if match:
+                year_groups.setdefault(int(match.group(2)), []).append(col)
+            else:
+                other_columns.append(col)
+        return cls(
+            name=name,
+            id_columns=tuple(id_columns),
+            numeric_columns=tuple(numeric_columns),
+            year_groups={year: tuple(cols) for year, cols in sorted(year_groups.items())},
+            other_columns=tuple(other_columns),
+        )
+
+    def columns_for_year(self, year=None):
+        if year is None:
+            return list(self.numeric_columns)
+        return list(self.year_groups.get(year, ()))
+
+
+class ImmobilierDataset:
+    # Moteur de requêtes sur un fichier du capital immobilier : valeurs
+    # numériques dans un seul bloc float64, index département / commune.
+
+    def __init__(self, name, df):
+        self.schema = DatasetSchema.infer(name, df)
+        self.ids = df[list(self.schema.id_columns)].reset_index(drop=True)
+        self.values = np.ascontiguousarray(
+            df[list(self.schema.numeric_columns)].to_numpy(dtype=np.float64, na_value=np.nan)
+        )
+        self._column_pos = {col: i for i, col in enumerate(self.schema.numeric_columns)}
+
+        # Index département -> lignes, (département, commune) -> ligne
+        codes, names = pd.factorize(self.ids['nomdep'])
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(names) + 1))
+        self.departments = list(names)
+        self.dep_codes = codes
+        self._dep_rows = {name: order[bounds[i]:bounds[i + 1]] for i, name in enumerate(names)}
+        self._commune_rows = {}
+        if 'nomcommune' in self.ids.columns:
+            for pos, key in enumerate(zip(self.ids['nomdep'], self.ids['nomcommune'])):
+                self._commune_rows.setdefault(key, pos)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def column_positions(self, columns):
+        return [self._column_pos[col] for col in columns if col in self._column_pos]
+
+    def department_rows(self, dep):
+        return self._dep_rows.get(dep, np.empty(0, dtype=np.intp))
+
+    def communes(self, dep):
+        rows = self.department_rows(dep)
+        return list(dict.fromkeys(self.ids['nomcommune'].to_numpy()[rows]))
+
+    def commune_row(self, dep, commune):
+        return self._commune_rows.get((dep, commune))
+
+    def block(self, rows, columns):
+        return self.values[np.ix_(np.atleast_1d(rows), self.column_positions(columns))]
+
+    def select(self, rows, columns, id_columns=('nomcommune',)):
+        # Petite vue DataFrame (identifiants + colonnes numériques choisies)
+        rows = np.atleast_1d(rows)
+        numeric = [col for col in columns if col in self._column_pos]
+        frame = pd.DataFrame(self.block(rows, numeric), columns=numeric)
+        ids = [col for col in dict.fromkeys(list(id_columns) + list(columns)) if col in self.ids.columns]
+        for i, col in enumerate(ids):
+            frame.insert(i, col, self.ids[col].to_numpy()[rows])
+        return frame
+
+    def describe(self, rows, columns):
+        # Équivalent de DataFrame.describe() calculé sur le bloc numérique
+        numeric = [col for col in columns if col in self._column_pos]
+        block = self.block(rows, numeric)
+        count = np.sum(~np.isnan(block), axis=0)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            stats = {
+                'count': count.astype(np.float64),
+                'mean': np.nanmean(block, axis=0),
+                'std': np.nanstd(block, axis=0, ddof=1),
+                'min': np.nanmin(block, axis=0),
+                '25%': np.nanpercentile(block, 25, axis=0),
+                '50%': np.nanpercentile(block, 50, axis=0),
+                '75%': np.nanpercentile(block, 75, axis=0),
+                'max': np.nanmax(block, axis=0),
+            }
+        return pd.DataFrame(stats, index=numeric).T
+
+    def melt(self, row, columns, id_column='nomcommune'):
+        # Format long (variable, value) d'une ligne, pour les barres et camemberts
+        numeric = [col for col in columns if col in self._column_pos]
+        return pd.DataFrame({
+            id_column: self.ids[id_column].iat[row],
+            'variable': numeric,
+            'value': self.values[row, self.column_positions(numeric)],
+        })
+
+
+# Type d'immobilier -> clé du jeu de données dans load_data
+DATASET_KEYS = {
+    "Bases fiscal commune": "basesfiscalcommune",
+    "Capital immobilier": "capitalimmobilier",
+    "ISF communes": "isfcommunes",
+    "Terres communes": "terrescommunes",
+    "Capital immobilier commune": "capitalimmobiliercommune",
+}
+
+# Jeux communaux couverts par le cube d'agrégats
+CUBE_DATASETS = ("Capital immobilier commune", "Bases fiscal commune", "ISF communes", "Terres communes")
+CUBE_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+CUBE_STATISTICS = ('sum', 'mean', 'count') + tuple(f"q{int(q * 100)}" for q in CUBE_QUANTILES)
+
+
+class AggregationCube:
+    # Sommes, moyennes, effectifs et quantiles de chaque colonne numérique,
+    # par département (départements × colonnes) et pour la France entière.
+
+    def __init__(self, dataset):
+        self.columns = dataset.schema.numeric_columns
+        self.departments = dataset.departments
+        self._column_pos = {col: i for i, col in enumerate(self.columns)}
+        self._dep_pos = {dep: i for i, dep in enumerate(self.departments)}
+
+        valid = dataset.dep_codes >= 0
+        values = dataset.values[valid]
+        grouped = pd.DataFrame(values).groupby(dataset.dep_codes[valid], sort=True)
+
+        def _table(frame):
+            return frame.reindex(range(len(self.departments))).to_numpy(dtype=np.float64)
+
+        self.department = {
+            'sum': _table(grouped.sum(min_count=1)),
+            'mean': _table(grouped.mean()),
+            'count': _table(grouped.count()),
+        }
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            self.national = {
+                'sum': np.where(np.isnan(dataset.values).all(axis=0), np.nan, np.nansum(dataset.values, axis=0)),
+                'mean': np.nanmean(dataset.values, axis=0),
+                'count': np.sum(~np.isnan(dataset.values), axis=0).astype(np.float64),
+            }
+            national_quantiles = np.nanquantile(dataset.values, CUBE_QUANTILES, axis=0)
+        for q, national_q in zip(CUBE_QUANTILES, national_quantiles):
+            key = f"q{int(q * 100)}"
+            self.department[key] = _table(grouped.quantile(q))
+            self.national[key] = national_q
+
+    def department_values(self, dep, columns, statistic='mean'):
+        positions = [self._column_pos[col] for col in columns]
+        return self.department[statistic][self._dep_pos[dep], positions]
+
+    def national_values(self, columns, statistic='mean'):
+        positions = [self._column_pos[col] for col in columns]
+        return self.national[statistic][positions]
+
+    def benchmark(self, dep, columns, statistics=CUBE_STATISTICS):
+        # Tableau (statistique × niveau) pour des colonnes, sans parcourir les communes
+        columns = [col for col in columns if col in self._column_pos]
+        rows = {}
+        for statistic in statistics:
+            rows[(statistic, dep)] = self.department_values(dep, columns, statistic)
+            rows[(statistic, 'France')] = self.national_values(columns, statistic)
+        table = pd.DataFrame.from_dict(rows, orient='index', columns=columns)
+        table.index = pd.MultiIndex.from_tuples(table.index, names=['statistique', 'niveau'])
+        return table
+
+
+HISTOGRAM_BINS = 20
+
+
+class Histograms:
+    # Histogrammes pré-calculés de chaque colonne numérique, à l'échelle
+    # nationale et par département, avec les mêmes bornes de classes.
+
+    def __init__(self, dataset, bins=HISTOGRAM_BINS):
+        self.bins = bins
+        self._column_pos = {col: i for i, col in enumerate(dataset.schema.numeric_columns)}
+        self._dep_pos = {dep: i for i, dep in enumerate(dataset.departments)}
+        values = dataset.values
+        n_deps, n_cols = len(dataset.departments), values.shape[1]
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            low = np.nanmin(values, axis=0) if len(values) else np.zeros(n_cols)
+            high = np.nanmax(values, axis=0) if len(values) else np.ones(n_cols)
+        low = np.nan_to_num(low, nan=0.0)
+        high = np.nan_to_num(high, nan=1.0)
+        high = np.where(high > low, high, low + 1.0)
+        self.edges = low[:, None] + (high - low)[:, None] * np.linspace(0, 1, bins + 1)[None, :]
+
+        # Classe de chaque valeur, puis comptages par bincount (aucune boucle par colonne)
+        valid = ~np.isnan(values)
+        scaled = (np.where(valid, values, low) - low) / (high - low) * bins
+        bin_idx = np.clip(scaled.astype(np.int32), 0, bins - 1)
+        rows, cols = np.nonzero(valid)
+        flat_bins = bin_idx[rows, cols]
+        self.national_counts = np.bincount(
+            cols * bins + flat_bins, minlength=n_cols * bins
+        ).reshape(n_cols, bins).astype(np.int32)
+
+        dep_codes = dataset.dep_codes[rows]
+        keep = dep_codes >= 0
+        self.department_counts = np.bincount(
+            (dep_codes[keep] * n_cols + cols[keep]) * bins + flat_bins[keep],
+            minlength=n_deps * n_cols * bins
+        ).reshape(n_deps, n_cols, bins).astype(np.int32)
+
+    def national(self, column):
+        pos = self._column_pos[column]
+        return self.edges[pos], self.national_counts[pos]
+
+    def department(self, dep, column):
+        pos = self._column_pos[column]
+        return self.edges[pos], self.department_counts[self._dep_pos[dep], pos]
+
+
+def commune_comparison(dataset, cube, dep, row, columns, statistic='mean'):
+    # Valeurs de la commune, du département et de la France au format long
+    # (variable, niveau, value) pour un graphique en barres groupées
+    columns = [col for col in columns if col in cube.columns]
+    commune = dataset.ids['nomcommune'].iat[row]
+    return pd.DataFrame({
+        'variable': columns * 3,
+        'niveau': [commune] * len(columns) + [dep] * len(columns) + ['France'] * len(columns),
+        'value': np.concatenate([
+            dataset.block(row, columns)[0],
+            cube.department_values(dep, columns, statistic),
+            cube.national_values(columns, statistic),
+        ]),
+    })
+
+
+@dataclass(frozen=True)
+class HistogramView:
+    column: str
+    edges: np.ndarray
+    counts: np.ndarray
+    commune_value: float   # NaN si la commune n'a pas de valeur
+
+    @property
+    def centers(self):
+        return (self.edges[:-1] + self.edges[1:]) / 2
+
+    @property
+    def widths(self):
+        return np.diff(self.edges)
+
+
+def commune_histogram(histograms, dataset, dep, row, column, national=False):
+    # Distribution d'une colonne (département ou France) et valeur de la commune
+    edges, counts = histograms.national(column) if national else histograms.department(dep, column)
+    return HistogramView(column, edges, counts, float(dataset.block(row, [column])[0, 0]))
+
+
+# Une entrée par (jeu, version) ; anciennes versions libérées après un rechargement
+@st.cache_resource(show_spinner=False, max_entries=VERSIONS_KEPT * len(DATASET_KEYS))
+def get_immobilier_dataset(_df, name, version=None):
+    return ImmobilierDataset(name, _df)
+
+
+@st.cache_resource(show_spinner=False, max_entries=VERSIONS_KEPT * len(CUBE_DATASETS))
+def get_aggregation_cube(_df, name, version=None):
+    stored = precomputed('aggregation_cube', version, name=name)
+    return stored if stored is not None else AggregationCube(get_immobilier_dataset(_df, name, version))
+
+
+@st.cache_resource(show_spinner=False, max_entries=VERSIONS_KEPT * len(DATASET_KEYS))
+def get_histograms(_df, name, version=None):
+    stored = precomputed('histograms', version, name=name)
+    return stored if stored is not None else Histograms(get_immobilier_dataset(_df, name, version))
@@ -0,0 +1,255 @@
+import re
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from App.catalogue import VERSIONS_KEPT
+from App.elections import ELECTIONS, vote_columns
+from App.resultats import precomputed
+from App.traces import stage
+
+# Niveaux d'éducation : préfixe des colonnes (suph1990, supf1990, ...)
+EDUCATION_LEVELS = ('sup', 'bac', 'nodip')
+_EDUCATION_COLUMN = re.compile(r'^(sup|bac|nodip)([hf])(\d{4})$')
+
+
+def education_years(df):
+    # Années pour lesquelles les six colonnes hommes/femmes sont présentes
+    found = {}
+    for col in df.columns:
+        match = _EDUCATION_COLUMN.match(str(col))
+        if match:
+            found.setdefault(int(match.group(3)), set()).add(match.group(1) + match.group(2))
+    complete = {f'{level}{sex}' for level in EDUCATION_LEVELS for sex in 'hf'}
+    return sorted(year for year, cols in found.items() if cols >= complete)
+
+
+def _level_block(df, level, years):
+    # Matrice communes × années (hommes + femmes), NaN comptés comme 0
+    men = df[[f'{level}h{year}' for year in years]].to_numpy(dtype=np.float64, na_value=np.nan)
+    women = df[[f'{level}f{year}' for year in years]].to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.nan_to_num(men, nan=0.0) + np.nan_to_num(women, nan=0.0)
+
+
+def education_counts(df, years=None):
+    # Effectifs par niveau : {niveau: ndarray (lignes × années)}
+    if years is None:
+        years = education_years(df)
+    years = list(years)
+    return {level: _level_block(df, level, years) for level in EDUCATION_LEVELS}, years
+
+
+def education_shares(df, years=None, zero_fill=np.nan):
+    # Parts (%) du supérieur, du bac et des sans-diplôme pour toutes les lignes
+    # et toutes les années en une passe. Un dénominateur nul donne zero_fill
+    # (NaN par défaut) au lieu d'une division par zéro.
+    counts, years = education_counts(df, years)
+    total = counts['sup'] + counts['bac'] + counts['nodip']
+    valid = total > 0
+
+    shares = {}
+    for level, block in counts.items():
+        out = np.full(block.shape, zero_fill, dtype=np.float64)
+        np.divide(block * 100.0, total, out=out, where=valid)
+        shares[level] = pd.DataFrame(out, index=df.index, columns=years)
+    return shares
+
+
+def superior_share_vs_nodip(df, years=None, zero_fill=np.nan):
+    # Indicateur historique de l'app : sup / (sup + sans diplôme), en %
+    counts, years = education_counts(df, years)
+    total = counts['sup'] + counts['nodip']
+    out = np.full(total.shape, zero_fill, dtype=np.float64)
+    np.divide(counts['sup'] * 100.0, total, out=out, where=total > 0)
+    return pd.DataFrame(out, index=df.index, columns=years)
+
+
+# Années proposées par les pages (colonnes psup/pbac disponibles)
+ANALYSIS_YEARS = tuple(range(2010, 2023))
+
+
+@dataclass(frozen=True)
+class EducationBreakdown:
+    name: str
+    year: int
+    totals: tuple   # (sup, bac, nodip), None si indisponible
+    men: tuple      # (suph, bach, nodiph), None si indisponible
+    women: tuple    # (supf, bacf, nodipf), None si indisponible
+
+
+def _by_sex(frame, year, sex):
+    return tuple(float(frame[f'{level}{sex}{year}'].sum()) for level in EDUCATION_LEVELS)
+
+
+def department_education(diplomes_departements, diplomes_communes, dep, year):
+    # Totaux du fichier départemental, répartition par sexe sommée sur les communes
+    dept = diplomes_departements[diplomes_departements['nomdep'] == dep]
+    totals = None
+    if not dept.empty:
+        totals = tuple(float(dept[f'{level}{year}'].iloc[0]) for level in EDUCATION_LEVELS)
+    communes = diplomes_communes[diplomes_communes['nomdep'] == dep]
+    men = women = None
+    if not communes.empty:
+        men, women = _by_sex(communes, year, 'h'), _by_sex(communes, year, 'f')
+    return EducationBreakdown(dep, int(year), totals, men, women)
+
+
+def commune_education(diplomes_communes, dep, commune, year):
+    # Effectifs d'une commune (hommes + femmes), None si la commune est absente
+    rows = diplomes_communes[
+        (diplomes_communes['nomcommune'] == commune) & (diplomes_communes['nomdep'] == dep)
+    ]
+    if rows.empty:
+        return None
+    row = rows.iloc[0]
+    men = tuple(float(row[f'{level}h{year}']) for level in EDUCATION_LEVELS)
+    women = tuple(float(row[f'{level}f{year}']) for level in EDUCATION_LEVELS)
+    return EducationBreakdown(commune, int(year), tuple(m + w for m, w in zip(men, women)), men, women)
+
+
+def _diploma_columns(diplomes, with_diploma, without_diploma):
+    total_diplomes = sum(diplomes[col].fillna(0) for col in with_diploma)
+    total_sans_diplome = sum(diplomes[col].fillna(0) for col in without_diploma)
+    total = total_diplomes + total_sans_diplome
+    pourcentage = np.where(total > 0, (total_diplomes / total * 100).round(2), 0)
+    return total_diplomes, pourcentage, total_sans_diplome
+
+
+def commune_diploma_table(diplomes_communes, year):
+    # Diplômés (supérieur + bac), part des diplômés et sans-diplôme par commune
+    total_diplomes, pourcentage, sans_diplome = _diploma_columns(
+        diplomes_communes,
+        [f'suph{year}', f'supf{year}', f'bach{year}', f'bacf{year}'],
+        [f'nodiph{year}', f'nodipf{year}'],
+    )
+    return pd.DataFrame({
+        'Commune': diplomes_communes['nomcommune'],
+        'Département': diplomes_communes['nomdep'],
+        'Total Diplômés': total_diplomes,
+        'Pourcentage Diplômés (%)': pourcentage,
+        'Sans Diplôme': sans_diplome,
+    })
+
+
+def department_diploma_table(diplomes_departements, year):
+    total_diplomes, pourcentage, sans_diplome = _diploma_columns(
+        diplomes_departements, [f'sup{year}', f'bac{year}'], [f'nodip{year}']
+    )
+    return pd.DataFrame({
+        'Département': diplomes_departements['nomdep'],
+        'Total Diplômés': total_diplomes,
+        'Pourcentage Diplômés (%)': pourcentage,
+        'Sans Diplôme': sans_diplome,
+    })
+
+
+@dataclass(frozen=True)
+class EducationVoteAnalysis:
+    year: int
+    candidates: tuple       # noms affichés (colonne voix* sans le préfixe)
+    vote_columns: tuple
+    points: pd.DataFrame    # une ligne par commune : percent_high_edu + voix (comptages)
+    correlations: pd.DataFrame       # percent_high_edu + voix*, matrice de corrélation
+    shares: pd.DataFrame    # parts des trois niveaux + voix en % des voix exprimées
+    level_correlations: pd.DataFrame  # candidats × (pct_superior, pct_bac, pct_nodip)
+
+    def correlation(self, column):
+        return float(self.correlations.at['percent_high_edu', column])
+
+
+def education_vote_analysis(election_df, diplomes_communes, year):
+    # Croisement communes (élection × diplômes) pour une année, tous les
+    # candidats à la fois : le choix du candidat dans la page n'est qu'une lecture.
+    year = int(year)
+    columns = vote_columns(election_df)
+    # Seules les colonnes de l'année sont jointes (et non les ~700 colonnes du fichier)
+    year_columns = [f'{level}{sex}{year}' for level in EDUCATION_LEVELS for sex in 'hf']
+    keep_columns = [col for col in diplomes_communes.columns
+                    if col in ('codecommune', 'nomcommune', 'nomdep') or col in year_columns]
+    with stage("fusion élection × diplômes", rows=len(election_df)):
+        merged = pd.merge(election_df, diplomes_communes[keep_columns], on='codecommune', how='inner')
+
+    # Supérieur / (supérieur + sans diplôme), dénominateur nul -> 0
+    percent_high_edu = superior_share_vs_nodip(merged, [year], zero_fill=0.0)[year].round(2)
+    keep = (percent_high_edu <= 100).to_numpy()
+    merged = merged[keep]
+    percent_high_edu = percent_high_edu[keep]
+
+    commune_column = next((col for col in ('nomcommune', 'nomcommune_x', 'commune') if col in merged.columns), None)
+    dep_column = next((col for col in ('nomdep', 'nomdep_x', 'departement') if col in merged.columns), None)
+    communes = merged[commune_column] if commune_column else pd.Series(merged.index, index=merged.index)
+    departements = merged[dep_column] if dep_column else 'Non spécifié'
+
+    points = pd.DataFrame({
+        'codecommune': merged['codecommune'].astype(str),
+        'commune': communes,
+        'percent_high_edu': percent_high_edu,
+    })
+    points = pd.concat([points, merged[columns]], axis=1)
+
+    shares_by_level = education_shares(merged, [year], zero_fill=0.0)
+    total_votes = merged[columns].sum(axis=1, skipna=False)
+    shares = pd.DataFrame({
+        'commune': communes,
+        'departement': departements,
+        'pct_superior': shares_by_level['sup'][year],
+        'pct_bac': shares_by_level['bac'][year],
+        'pct_nodip': shares_by_level['nodip'][year],
+    })
+    vote_shares = merged[columns].div(total_votes, axis=0).mul(100).fillna(0)
+    shares = pd.concat([shares, vote_shares], axis=1)
+
+    with stage("corrélations", rows=len(shares)):
+        level_columns = ['pct_superior', 'pct_bac', 'pct_nodip']
+        full = shares[level_columns + columns].corr()
+        level_correlations = full.loc[columns, level_columns]
+        level_correlations.index = [col[4:] for col in columns]
+
+        correlations = points[['percent_high_edu'] + columns].corr()
+
+    # Tables de points en float32 une fois les corrélations calculées : le
+    # résultat est gardé en cache et dans le magasin de résultats
+    numeric = shares.select_dtypes('float64').columns
+    shares[numeric] = shares[numeric].astype(np.float32)
+    points['percent_high_edu'] = points['percent_high_edu'].astype(np.float32)
+
+    return EducationVoteAnalysis(
+        year=year,
+        candidates=tuple(col[4:] for col in columns),
+        vote_columns=tuple(columns),
+        points=points.reset_index(drop=True),
+        correlations=correlations,
+        shares=shares.reset_index(drop=True),
+        level_correlations=level_correlations,
+    )
+
+
+def top_departments(diplomes_departements, column, n=5):
+    return diplomes_departements.nlargest(n, column)[['nomdep', column]]
+
+
+def department_trends(diplomes_departements, departments, years=ANALYSIS_YEARS):
+    # Part du supérieur (psup) par année pour quelques départements : départements × années
+    table = diplomes_departements.drop_duplicates('nomdep').set_index('nomdep')
+    return table.loc[list(departments), [f'psup{year}' for year in years]].set_axis(list(years), axis=1)
+
+
+def gender_means(diplomes_communes, years):
+    # Moyennes communales du supérieur, hommes et femmes, pour les années présentes
+    found = [year for year in years
+             if f'suph{year}' in diplomes_communes.columns and f'supf{year}' in diplomes_communes.columns]
+    return pd.DataFrame({
+        'Année': found,
+        'Hommes': [diplomes_communes[f'suph{year}'].mean() for year in found],
+        'Femmes': [diplomes_communes[f'supf{year}'].mean() for year in found],
+    })
+
+
+# Résultats mis en cache par (élection, année, versions des fichiers) : les
+# DataFrames ne sont pas hachés (paramètres préfixés par _).
+@st.cache_data(show_spinner=False, max_entries=VERSIONS_KEPT * len(ELECTIONS) * len(ANALYSIS_YEARS))
+def get_education_vote_analysis(_election_df, _diplomes_communes, election, year, versions=None):
+    stored = precomputed('education_votes', versions, election=election, year=int(year))
+    return stored if stored is not None else education_vote_analysis(_election_df, _diplomes_communes, year)
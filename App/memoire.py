@@ -0,0 +1,257 @@
+# Mémoire occupée par les jeux de données chargés et les caches Streamlit,
+# par groupe de colonnes (identifiants, colonnes annuelles, texte, autres),
+# avec les conversions qui réduiraient le plus la mémoire (catégories pour le
+# texte répétitif, entiers ou float32 pour les nombres).
+#
+# Commande : python -m App.diagnostics memoire ; panneau : ?debug=1 dans l'application.
+import logging
+import re
+import sys
+from collections import defaultdict
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from App.catalogue import VERSIONS_KEPT
+from App.chargement import DATA_FILES
+from App.stockage import ID_COLUMNS
+
+GROUPS = ('identifiants', 'années', 'texte', 'autres')
+# Colonne annuelle : nom terminé par une année (nodip1968, peralpha1850…)
+YEAR_COLUMN = re.compile(r'\D(1[6-9]|20)\d\d$')
+# Texte converti en catégorie si au plus cette part de valeurs distinctes
+CATEGORY_RATIO = 0.5
+
+
+@dataclass(frozen=True)
+class Conversion:
+    # Colonnes d'un même groupe et d'un même type, convertibles vers `target`
+    dataset: str
+    group: str
+    dtype: str
+    target: str
+    columns: tuple
+    saved: int               # octets gagnés
+
+
+@dataclass(frozen=True)
+class DatasetMemory:
+    name: str
+    rows: int
+    columns: int
+    bytes: int
+    groups: dict             # groupe -> octets
+    conversions: tuple       # Conversion, gain décroissant
+
+
+@dataclass(frozen=True)
+class CacheMemory:
+    kind: str                # st_cache_data / st_cache_resource
+    function: str
+    entries: int             # None si inconnu
+    bytes: int               # None si la mesure est indisponible
+
+
+def column_group(name, series):
+    if name in ID_COLUMNS:
+        return 'identifiants'
+    if YEAR_COLUMN.search(str(name)):
+        return 'années'
+    if pd.api.types.is_string_dtype(series.dtype) or pd.api.types.is_object_dtype(series.dtype):
+        return 'texte'
+    return 'autres'
+
+
+def _integer_target(series):
+    # Plus petit type entier pouvant contenir la colonne, ou None
+    values = series.to_numpy()
+    if series.dtype.kind == 'f':
+        if np.isnan(values).any() or not (values == np.round(values)).all():
+            return None
+    if not len(values):
+        return None
+    downcast = 'unsigned' if values.min() >= 0 else 'integer'
+    return pd.to_numeric(series, downcast=downcast).dtype
+
+
+def conversion(series, used):
+    # (type conseillé, octets gagnés) ou None
+    if pd.api.types.is_string_dtype(series.dtype) or pd.api.types.is_object_dtype(series.dtype):
+        if len(series) and series.nunique(dropna=False) <= CATEGORY_RATIO * len(series):
+            saved = used - int(series.astype('category').memory_usage(deep=True, index=False))
+            return ('category', saved) if saved > 0 else None
+        return None
+    if series.dtype.kind not in 'iuf':
+        return None
+    target = _integer_target(series)
+    if target is None and series.dtype == np.float64:
+        target = np.dtype(np.float32)
+    if target is None or np.dtype(target).itemsize >= series.dtype.itemsize:
+        return None
+    return str(target), (series.dtype.itemsize - np.dtype(target).itemsize) * len(series)
+
+
+def dataset_memory(name, df):
+    usage = df.memory_usage(deep=True, index=False)
+    groups = dict.fromkeys(GROUPS, 0)
+    found = defaultdict(lambda: ([], 0))
+    for column in df.columns:
+        series = df[column]
+        group = column_group(column, series)
+        used = int(usage[column])
+        groups[group] += used
+        suggested = conversion(series, used)
+        if suggested is not None:
+            key = (group, str(series.dtype), suggested[0])
+            columns, saved = found[key]
+            found[key] = (columns + [column], saved + suggested[1])
+    conversions = sorted(
+        (Conversion(name, group, dtype, target, tuple(columns), saved)
+         for (group, dtype, target), (columns, saved) in found.items()),
+        key=lambda c: -c.saved,
+    )
+    return DatasetMemory(name, len(df), df.shape[1], int(usage.sum()), groups, tuple(conversions))
+
+
+@st.cache_data(show_spinner=False, max_entries=VERSIONS_KEPT * len(DATA_FILES))
+def get_dataset_memory(_df, name, version=None):
+    # Mesure indexée par la version du fichier (le DataFrame n'est pas haché)
+    return dataset_memory(name, _df)
+
+
+def object_memory(value, seen):
+    # Mémoire approximative d'un objet : DataFrames et tableaux numpy qu'il
+    # contient (attributs, dictionnaires, listes), chacun compté une fois ;
+    # les objets déjà dans `seen` (jeux de données mesurés à part) sont ignorés
+    total, stack = 0, [value]
+    while stack:
+        value = stack.pop()
+        if id(value) in seen:
+            continue
+        seen.add(id(value))
+        if isinstance(value, pd.DataFrame):
+            total += int(value.memory_usage(deep=True).sum())
+        elif isinstance(value, (pd.Series, pd.Index)):
+            total += int(value.memory_usage(deep=True))
+        elif isinstance(value, np.ndarray):
+            # Les vues partagent la mémoire de leur tableau
+            total += value.nbytes if value.base is None else 0
+        elif isinstance(value, dict):
+            total += sys.getsizeof(value)
+            stack.extend(value.keys())
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            total += sys.getsizeof(value)
+            stack.extend(value)
+        elif hasattr(value, '__dict__') and not isinstance(value, type):
+            total += sys.getsizeof(value)
+            stack.extend(vars(value).values())
+        elif hasattr(value, '__slots__'):
+            total += sys.getsizeof(value)
+            stack.extend(getattr(value, slot) for slot in value.__slots__ if hasattr(value, slot))
+        else:
+            total += sys.getsizeof(value)
+    return total
+
+
+def _resource_memory(exclude):
+    # Objets des caches st.cache_resource mesurés avec object_memory, hors
+    # DataFrames de `exclude` (jeux chargés). Streamlit n'expose pas ces objets
+    # (et ne mesure ces entrées qu'avec server.enableExpensiveMemoryStats) :
+    # lecture de son état interne, qui peut changer d'une version à l'autre.
+    from streamlit.runtime.caching.cache_resource_api import get_resource_cache_stats_provider
+
+    provider = get_resource_cache_stats_provider()
+    with provider._caches_lock:
+        caches = [cache for by_key in provider._function_caches.values() for cache in by_key.values()]
+    seen = {id(df) for df in exclude}
+    totals = defaultdict(lambda: [0, 0])
+    for cache in caches:
+        with cache._mem_cache_lock:
+            results = list(cache._mem_cache.values())
+        for result in results:
+            total = totals[cache.display_name]
+            total[0] += 1
+            total[1] += object_memory(result.value, seen)
+    return [CacheMemory("st_cache_resource", function, entries, size)
+            for function, (entries, size) in totals.items()]
+
+
+def cache_memory(exclude=()):
+    # st.cache_data : taille des résultats sérialisés, par fonction (statistiques
+    # publiques de Streamlit, sans le nombre d'entrées). st.cache_resource :
+    # mesure de _resource_memory, ou « indisponible » si elle échoue.
+    from streamlit.runtime.caching.cache_data_api import get_data_cache_stats_provider
+    from streamlit.runtime.caching.cache_resource_api import get_resource_cache_stats_provider
+
+    sizes = defaultdict(int)
+    for stats in get_data_cache_stats_provider().get_stats().values():
+        for stat in stats:
+            sizes[stat.cache_name] += stat.byte_length
+    caches = [CacheMemory("st_cache_data", function, None, size) for function, size in sizes.items()]
+    try:
+        caches += _resource_memory(exclude)
+    except Exception as e:
+        logging.warning(f"Mémoire des caches st.cache_resource indisponible : {e!r}")
+        names = {stat.cache_name for stats in get_resource_cache_stats_provider().get_stats().values()
+                 for stat in stats}
+        caches += [CacheMemory("st_cache_resource", function, None, None) for function in sorted(names)]
+    return sorted(caches, key=lambda c: -(c.bytes or 0))
+
+
+def _mb(size):
+    return f"{size / 1e6:8.2f} Mo" if size is not None else f"{'indisponible':>11}"
+
+
+def _columns_label(columns, shown=3):
+    names = ", ".join(map(str, columns[:shown]))
+    return f"{names}, … ({len(columns)} colonnes)" if len(columns) > shown else names
+
+
+def memory_report(datasets, caches=(), top=15):
+    lines = [f"Jeux de données : {_mb(sum(d.bytes for d in datasets))}"]
+    lines.append(f"    {'jeu':<30} {'lignes':>8} {'col.':>5} {'total':>11}  "
+                 + "  ".join(f"{group:>12}" for group in GROUPS))
+    for d in sorted(datasets, key=lambda d: -d.bytes):
+        lines.append(f"    {d.name:<30} {d.rows:>8} {d.columns:>5} {_mb(d.bytes)}  "
+                     + "  ".join(f"{d.groups[group] / 1e6:9.2f} Mo" for group in GROUPS))
+    if caches:
+        lines.append(f"Caches : {_mb(sum(c.bytes or 0 for c in caches))}")
+        for c in caches:
+            entries = f"{c.entries:>3} entrée(s)" if c.entries is not None else " " * 13
+            lines.append(f"    {c.kind:<18} {c.function:<60} {entries} {_mb(c.bytes)}")
+    conversions = sorted((c for d in datasets for c in d.conversions), key=lambda c: -c.saved)[:top]
+    if conversions:
+        lines.append(f"Conversions conseillées : gain {_mb(sum(c.saved for c in conversions))}")
+        for c in conversions:
+            lines.append(f"    {c.dataset:<30} {c.group:<12} {c.dtype:>8} -> {c.target:<8} "
+                         f"-{_mb(c.saved).strip():>10}  {_columns_label(c.columns)}")
+    return "\n".join(lines)
+
+
+def show_memory_panel(snapshot):
+    with st.expander("Débogage : mémoire des données et des caches"):
+        datasets = [get_dataset_memory(df, name, snapshot.versions.get(name))
+                    for name, df in snapshot.data.items()]
+        st.dataframe(pd.DataFrame([
+            {"jeu": d.name, "lignes": d.rows, "colonnes": d.columns, "Mo": round(d.bytes / 1e6, 2),
+             **{group: round(d.groups[group] / 1e6, 2) for group in GROUPS}}
+            for d in sorted(datasets, key=lambda d: -d.bytes)
+        ]), hide_index=True)
+        conversions = sorted((c for d in datasets for c in d.conversions), key=lambda c: -c.saved)
+        if conversions:
+            st.caption("Conversions conseillées")
+            st.dataframe(pd.DataFrame([
+                {"jeu": c.dataset, "groupe": c.group, "type": c.dtype, "conseillé": c.target,
+                 "gain Mo": round(c.saved / 1e6, 2), "colonnes": _columns_label(c.columns)}
+                for c in conversions
+            ]), hide_index=True)
+        # La taille des caches st.cache_resource est mesurée objet par objet : lent
+        if st.checkbox("Mesurer les caches"):
+            st.dataframe(pd.DataFrame([
+                {"cache": c.kind, "fonction": c.function, "entrées": c.entries,
+                 "Mo": round(c.bytes / 1e6, 2) if c.bytes is not None else None}
+                for c in cache_memory(snapshot.data.values())
+            ]), hide_index=True)
@@ -0,0 +1,258 @@
+# Métriques de l'application au format texte de Prometheus, servies par le
+# serveur de santé (App/sante.py) sur /metrics et, si METRIQUES_FICHIER est
+# défini, écrites dans ce fichier toutes les METRIQUES_INTERVALLE secondes
+# (collecteur « textfile » de node_exporter).
+#
+#   app_dataset_memory_bytes{dataset}           mémoire des jeux chargés
+#   app_cache_requests_total{cache, result}     succès / calculs des caches
+#   app_geocoding_seconds{result}               latence de Nominatim
+#   app_page_render_seconds{page}               durée des rendus de page
+#
+# Enregistrer une mesure ne coûte qu'un verrou et une addition ; les valeurs
+# coûteuses (mémoire) sont calculées par des collecteurs, à la lecture.
+import bisect
+import functools
+import logging
+import os
+import threading
+import time
+
+from App.sante import route
+
+METRICS_PATH = os.environ.get("METRIQUES_FICHIER")
+WRITE_INTERVAL = float(os.environ.get("METRIQUES_INTERVALLE", "15"))
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} : étiquettes {sorted(labels)} au lieu de {list(self.label_names)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def _samples(self):
+        with self._lock:
+            return [(key, value) for key, value in self._values.items()]
+
+    def exposition(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in sorted(self._samples()):
+            lines.append(f"{self.name}{_labels(self.label_names, key)} {_number(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def replace(self, values):
+        # Remplace toutes les séries : {tuple d'étiquettes: valeur}
+        with self._lock:
+            self._values = {tuple(map(str, key)): value for key, value in values.items()}
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                # Comptes par intervalle (+Inf en dernier), somme
+                counts = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            counts[0][bisect.bisect_left(self.buckets, value)] += 1
+            counts[1] += value
+
+    def _samples(self):
+        with self._lock:
+            return [(key, (list(counts), total)) for key, (counts, total) in self._values.items()]
+
+    def exposition(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, (counts, total) in sorted(self._samples()):
+            cumulated = 0
+            for bound, count in zip((*self.buckets, float('inf')), counts):
+                cumulated += count
+                le = (("le", _number(bound)),)
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulated}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {cumulated}")
+        return lines
+
+
+class Registry:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._collectors = []
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Métrique déjà enregistrée : {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self._register(Counter(name, help, labels))
+
+    def gauge(self, name, help, labels=()):
+        return self._register(Gauge(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def collector(self, function):
+        # Fonction sans argument appelée avant chaque lecture (mise à jour des jauges)
+        with self._lock:
+            self._collectors.append(function)
+        return function
+
+    def exposition(self):
+        with self._lock:
+            collectors, metrics = list(self._collectors), list(self._metrics.values())
+        for collect in collectors:
+            try:
+                collect()
+            except Exception as e:
+                logging.error(f"Métriques : collecteur {collect.__name__} en erreur : {e}")
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.exposition())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+DATASET_MEMORY = REGISTRY.gauge(
+    "app_dataset_memory_bytes", "Mémoire occupée par chaque jeu de données chargé (octets)", ("dataset",))
+CACHE_REQUESTS = REGISTRY.counter(
+    "app_cache_requests_total", "Appels des fonctions en cache : hit (résultat en cache) ou miss (calculé)",
+    ("cache", "result"))
+GEOCODING_SECONDS = REGISTRY.histogram(
+    "app_geocoding_seconds", "Durée des requêtes de géocodage Nominatim (secondes)", ("result",))
+PAGE_RENDER_SECONDS = REGISTRY.histogram(
+    "app_page_render_seconds", "Durée du rendu de chaque page, par rerun (secondes)", ("page",),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+RESIDENT_MEMORY = REGISTRY.gauge("process_resident_memory_bytes", "Mémoire résidente du processus (octets)")
+
+
+@REGISTRY.collector
+def _resident_memory():
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return
+    RESIDENT_MEMORY.set(pages * os.sysconf("SC_PAGE_SIZE"))
+
+
+_cache_local = threading.local()
+
+
+def counted_cache(cache):
+    # Applique le décorateur de cache Streamlit `cache` et compte les appels :
+    # « miss » si la fonction a été exécutée pendant l'appel, « hit » sinon
+    #
+    #   @counted_cache(st.cache_data(show_spinner=False))
+    #   def prepare_national_data(...):
+    def decorate(function):
+        name = function.__name__
+
+        @functools.wraps(function)
+        def compute(*args, **kwargs):
+            _cache_local.computed = True
+            return function(*args, **kwargs)
+
+        cached = cache(compute)
+
+        @functools.wraps(function)
+        def call(*args, **kwargs):
+            outer = getattr(_cache_local, 'computed', False)
+            _cache_local.computed = False
+            try:
+                result = cached(*args, **kwargs)
+                CACHE_REQUESTS.inc(cache=name, result='miss' if _cache_local.computed else 'hit')
+                return result
+            finally:
+                _cache_local.computed = outer
+
+        call.clear = cached.clear
+        return call
+    return decorate
+
+
+@route("/metrics")
+def _metrics():
+    return 200, "text/plain; version=0.0.4", REGISTRY.exposition().encode()
+
+
+def write_metrics(path=METRICS_PATH):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        f.write(REGISTRY.exposition())
+    os.replace(tmp, path)
+
+
+def start_metrics_writer(path=METRICS_PATH, interval=WRITE_INTERVAL):
+    def loop():
+        while True:
+            try:
+                write_metrics(path)
+            except OSError as e:
+                logging.warning(f"Métriques non écrites ({path}) : {e}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name="metriques", daemon=True)
+    thread.start()
+    logging.info(f"Métriques écrites dans {path} toutes les {interval:g} s")
+    return thread
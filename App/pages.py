@@ -0,0 +1,81 @@
+import importlib
+from dataclasses import dataclass, field
+
+# Registre des pages : chaque entrée du menu est associée au chemin de son
+# module, importé seulement à la première visite de la page.
+
+
+@dataclass(frozen=True)
+class Page:
+    title: str
+    icon: str
+    module: str
+    function: str
+    # paramètre de la fonction -> clé du jeu de données dans load_data
+    arguments: dict = field(default_factory=dict)
+    # paramètre recevant la version des données (None : pas de paramètre)
+    version_argument: str = None
+    # clé du jeu versionné, ou None pour passer {clé: version} de tous les jeux
+    version_of: str = None
+
+    @property
+    def datasets(self):
+        return tuple(dict.fromkeys(self.arguments.values()))
+
+    def missing(self, data):
+        # Jeux de données de la page absents de data (fichier manquant ou illisible)
+        return tuple(key for key in self.datasets if key not in data)
+
+    def load(self):
+        return getattr(importlib.import_module(self.module), self.function)
+
+    def kwargs(self, data, versions):
+        kwargs = {param: data[key] for param, key in self.arguments.items()}
+        if self.version_argument:
+            kwargs[self.version_argument] = versions.get(self.version_of) if self.version_of else dict(versions)
+        return kwargs
+
+
+PAGES = (
+    Page(
+        "Carte interactive", "map", "App.app1", "run_elections",
+        arguments={
+            "pres_df": "pres_df",
+            "leg_df": "leg_df",
+            "diplomes_communes": "diplomes_communes",
+            "diplomes_departements": "diplomes_departements",
+        },
+        version_argument="versions",
+    ),
+    Page(
+        "Capital_immobilier", "bar-chart", "App.app2", "run_immobilier",
+        arguments={
+            "basesfiscalcommune": "basesfiscalcommune",
+            "basesfiscaldepartement": "basesfiscaldepartement",
+            "capitalimmobilier": "capitalimmobilier",
+            "capitalimmobiliercommune": "capitalimmobiliercommune",
+            "capitalimmobilierdepartement": "capitalimmobilierdepartement",
+            "isfcommunes": "isfcommunes",
+            "terrescommunes": "terrescommunes",
+        },
+        version_argument="versions",
+    ),
+    Page(
+        "Diplomes", "book", "App.app3", "run_diplomes",
+        arguments={
+            "diplomes_communes": "diplomes_communes",
+            "diplomes_departements": "diplomes_departements",
+            "pres_df": "pres_df",
+            "leg_df": "leg_df",
+        },
+        version_argument="versions",
+    ),
+    Page(
+        "Analyse historique", "clock-history", "App.app4", "run_detailed_analysis",
+        arguments={"alpha_df": "alphabetisation"},
+        version_argument="version",
+        version_of="alphabetisation",
+    ),
+)
+
+PAGES_BY_TITLE = {page.title: page for page in PAGES}
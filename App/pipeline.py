@@ -0,0 +1,224 @@
+# Préparation des données (remplace les notebooks de Data_Prep/), en étapes :
+#
+#   ingest -> clean -> export
+#
+#   python -m App.pipeline [--etapes clean export ...] [--force]
+#
+# Chaque étape lit les tables produites par les précédentes (stockage en
+# colonnes, App/stockage.py) sous Data/pipeline/<étape>/<table>. Son empreinte
+# est le hachage de ses entrées (contenu des CSV sources, voir App/catalogue.py,
+# et des tables amont) : une étape dont les entrées n'ont pas changé n'est pas
+# relancée, et une table recalculée à l'identique ne relance pas les suivantes.
+# L'export place les tables finales dans Data/colonnes/, lues par load_data.
+# Les parts par niveau d'éducation ne sont pas pré-calculées ici : les pages
+# les calculent pour les seules lignes et années affichées (App/indicateurs.py).
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from dataclasses import dataclass
+
+import pandas as pd
+
+from App.catalogue import dataset_version, fingerprint
+from App.chargement import DATA_FILES
+from App.stockage import (STORE_DIR, copy_store, ingest_csv, keep_diplomes_column, read_meta, read_store,
+                          store_path, write_store)
+
+WORK_DIR = "./Data/pipeline"
+MANIFEST = "manifest.json"
+STEPS = ('ingest', 'clean', 'export')
+# À incrémenter quand le code d'une étape change : toutes les empreintes changent
+REVISION = 2
+
+
+@dataclass(frozen=True)
+class Stage:
+    step: str
+    table: str
+    inputs: tuple    # "csv:<clé DATA_FILES>" ou "<étape>/<table>"
+    build: object    # build(chemins des entrées, dossier de sortie)
+
+    @property
+    def name(self):
+        return f"{self.step}/{self.table}"
+
+
+def _ingest(inputs, out_dir):
+    # Copie brute et typée du CSV, lue en flux
+    ingest_csv(inputs[0], out_dir)
+
+
+def _id_columns(df):
+    return [col for col in df.columns if not pd.api.types.is_numeric_dtype(df[col])]
+
+
+def _clean_ids(df, table=None):
+    # Identifiants texte sans espaces. Aucune ligne écartée : la table exportée
+    # remplace le CSV sous la même version, elle doit en garder toutes les
+    # lignes. Les communes sans code ou en double sont seulement signalées.
+    # Pas de dropna sur les valeurs (comme dans le notebook) : les pages
+    # traitent déjà les années manquantes et garderaient trop peu de communes.
+    df = df.copy()
+    for col in _id_columns(df):
+        df[col] = df[col].str.strip()
+    missing = int(df['codecommune'].isna().sum())
+    duplicated = int(df['codecommune'].dropna().duplicated().sum())
+    if missing or duplicated:
+        logging.warning(f"{table or 'table'}: {missing} ligne(s) sans codecommune, "
+                        f"{duplicated} codecommune en double (gardées)")
+    return df
+
+
+def _clean(inputs, out_dir):
+    write_store(_clean_ids(read_store(inputs[0]), out_dir), out_dir)
+
+
+def _clean_diplomes(inputs, out_dir):
+    # Colonnes annuelles avant 1945 écartées (filtre du notebook prep_diplomes_communes)
+    df = _clean_ids(read_store(inputs[0]), out_dir)
+    write_store(df[[col for col in df.columns if keep_diplomes_column(col)]], out_dir)
+
+
+STAGES = (
+    Stage('ingest', 'diplomes_communes', ('csv:diplomes_communes',), _ingest),
+    Stage('ingest', 'alphabetisation', ('csv:alphabetisation',), _ingest),
+    Stage('clean', 'diplomes_communes', ('ingest/diplomes_communes',), _clean_diplomes),
+    Stage('clean', 'alphabetisation', ('ingest/alphabetisation',), _clean),
+)
+
+# Tables exportées vers Data/colonnes/ : nom load_data -> table du pipeline
+EXPORTS = {
+    'diplomes_communes': 'clean/diplomes_communes',
+    'alphabetisation': 'clean/alphabetisation',
+}
+
+
+def _hash_files(paths):
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 24), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def _table_hash(directory):
+    return _hash_files([os.path.join(directory, name) for name in ("valeurs.npy", "ids.csv")])
+
+
+def _fingerprint(*parts):
+    return hashlib.sha256(json.dumps([REVISION, *parts]).encode()).hexdigest()
+
+
+class Pipeline:
+
+    def __init__(self, work_dir=WORK_DIR, store_dir=STORE_DIR):
+        self.work_dir = work_dir
+        self.store_dir = store_dir
+        self.manifest_path = os.path.join(work_dir, MANIFEST)
+        try:
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError):
+            self.manifest = {}
+        self.manifest.setdefault('stages', {})
+
+    def _save(self):
+        os.makedirs(self.work_dir, exist_ok=True)
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(tmp, self.manifest_path)
+
+    def _prune(self):
+        # Tables d'étapes ou d'exports retirés du pipeline : supprimées du
+        # manifeste et du disque
+        known = {stage.name for stage in STAGES} | {f"export/{key}" for key in EXPORTS}
+        removed = [name for name in self.manifest['stages'] if name not in known]
+        for name in removed:
+            step, _, table = name.partition('/')
+            path = store_path(table, self.store_dir) if step == 'export' else os.path.join(self.work_dir, name)
+            shutil.rmtree(path, ignore_errors=True)
+            del self.manifest['stages'][name]
+            logging.info(f"{name}: retiré du pipeline, supprimé")
+        if removed:
+            self._save()
+
+    def _input(self, name):
+        # (chemin, hachage du contenu) d'une entrée d'étape
+        if name.startswith('csv:'):
+            key = name[4:]
+            return DATA_FILES[key], fingerprint(key).sha256
+        return os.path.join(self.work_dir, name), self.manifest['stages'][name]['output']
+
+    def _run(self, name, fingerprint, out_dir, build, force):
+        known = self.manifest['stages'].get(name)
+        if not force and known and known['fingerprint'] == fingerprint and read_meta(out_dir) is not None:
+            logging.info(f"{name}: à jour")
+            return False
+        start = time.perf_counter()
+        build(out_dir)
+        seconds = time.perf_counter() - start
+        self.manifest['stages'][name] = {
+            'fingerprint': fingerprint,
+            'output': _table_hash(out_dir),
+            'rows': read_meta(out_dir)['rows'],
+            'seconds': round(seconds, 3),
+        }
+        self._save()
+        logging.info(f"{name}: {self.manifest['stages'][name]['rows']} lignes en {seconds:.2f} s")
+        return True
+
+    def run(self, steps=STEPS, force=False):
+        # Étapes dans l'ordre ; renvoie les noms des étapes relancées
+        self._prune()
+        rerun = []
+        for stage in STAGES:
+            if stage.step not in steps:
+                continue
+            if any(name.startswith('csv:') and not os.path.exists(DATA_FILES[name[4:]]) for name in stage.inputs):
+                logging.warning(f"{stage.name}: fichier source absent, ignoré")
+                continue
+            if any(not name.startswith('csv:') and name not in self.manifest['stages'] for name in stage.inputs):
+                logging.warning(f"{stage.name}: étape amont jamais exécutée, ignoré")
+                continue
+            inputs = [self._input(name) for name in stage.inputs]
+            fingerprint = _fingerprint(stage.name, [sha for _, sha in inputs])
+            out_dir = os.path.join(self.work_dir, stage.name)
+            paths = [path for path, _ in inputs]
+            if self._run(stage.name, fingerprint, out_dir, lambda out, build=stage.build: build(paths, out), force):
+                rerun.append(stage.name)
+
+        if 'export' in steps:
+            for key, table in EXPORTS.items():
+                if table not in self.manifest['stages']:
+                    continue
+                # La version du CSV (lue par load_data) fait partie de l'empreinte
+                version = dataset_version(key)
+                fingerprint = _fingerprint('export', key, self.manifest['stages'][table]['output'], version)
+                source = os.path.join(self.work_dir, table)
+                build = lambda out, source=source, version=version: copy_store(source, out, version)
+                if self._run(f"export/{key}", fingerprint, store_path(key, self.store_dir), build, force):
+                    rerun.append(f"export/{key}")
+        return rerun
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prépare les données de l'application")
+    parser.add_argument('--etapes', nargs='+', choices=STEPS, default=list(STEPS))
+    parser.add_argument('--travail', default=WORK_DIR, help="dossier des tables intermédiaires")
+    parser.add_argument('--sortie', default=STORE_DIR)
+    parser.add_argument('--force', action='store_true')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    rerun = Pipeline(args.travail, args.sortie).run(args.etapes, args.force)
+    logging.info(f"{len(rerun)} étape(s) relancée(s)" + (f" : {', '.join(rerun)}" if rerun else ""))
+
+
+if __name__ == '__main__':
+    main()
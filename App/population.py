@@ -0,0 +1,61 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from App.elections import vote_columns
+
+# Préfixes des colonnes d'âge par sexe : (population par groupe, âges)
+AGE_PREFIXES = {'Homme': ('poph', 'ageh'), 'Femme': ('popf', 'agef')}
+MAX_AGE_GROUPS = 10
+ALPHA_YEARS = (1866, 1871, 1876, 1882, 1887, 1890, 1895, 1900, 1905, 1910, 1915,
+               1920, 1925, 1930, 1935, 1940, 1945, 1946)
+
+
+def age_groups(agesexcommunes, sex):
+    population_prefix, _ = AGE_PREFIXES[sex]
+    return [col for col in agesexcommunes.columns if col.startswith(population_prefix)]
+
+
+@dataclass(frozen=True)
+class CommuneProfile:
+    commune: str
+    sex: str
+    age_group: str
+    age_group_population: float  # None si la commune est absente du fichier âge/sexe
+    age_groups: tuple            # MAX_AGE_GROUPS premiers groupes d'âge
+    population: np.ndarray       # None si la commune est absente du fichier âge/sexe
+    alpha_years: tuple
+    alpha_values: np.ndarray     # None sans données d'alphabétisation
+    votes: pd.Series             # voix par candidat, None sans données de vote
+
+
+def commune_profile(agesexcommunes, alphabetisation, commune, sex, age_group, votes_data=None):
+    groups = age_groups(agesexcommunes, sex)[:MAX_AGE_GROUPS]
+
+    age_rows = agesexcommunes[agesexcommunes['nomcommune'] == commune]
+    selected = population = None
+    if not age_rows.empty:
+        selected = age_rows[age_group].values[0]
+        population = age_rows[groups].values.flatten()
+
+    alpha_rows = alphabetisation[alphabetisation['nomcommune'] == commune]
+    alpha_values = None
+    if not alpha_rows.empty:
+        alpha_values = alpha_rows[[f'alpha{year}' for year in ALPHA_YEARS]].values.flatten()
+
+    votes = None
+    if votes_data is not None and not votes_data.empty:
+        votes = votes_data[vote_columns(votes_data)].sum()
+
+    return CommuneProfile(
+        commune=commune,
+        sex=sex,
+        age_group=age_group,
+        age_group_population=selected,
+        age_groups=tuple(groups),
+        population=population,
+        alpha_years=ALPHA_YEARS,
+        alpha_values=alpha_values,
+        votes=votes,
+    )
@@ -0,0 +1,143 @@
+# Pré-calcul hors ligne des résultats des pages pour toutes les combinaisons
+# de paramètres, écrits dans le magasin de résultats (App/resultats.py).
+#
+#   python -m App.precalcul [--processus 4] [--types education_votes ...] [--force]
+#
+# Les combinaisons sont réparties sur un pool de processus ; chaque processus
+# ne lit que les fichiers dont ses calculs ont besoin, une seule fois. Un
+# résultat déjà présent pour la même version des fichiers sources est sauté.
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+
+from App.alphabetisation import DepartmentStats, LiteracySeries, national_table, national_trends
+from App.catalogue import dataset_version
+from App.chargement import DATA_FILES, read_dataset
+from App.elections import ELECTIONS, department_vote_shares
+from App.immobilier import CUBE_DATASETS, DATASET_KEYS, AggregationCube, Histograms, ImmobilierDataset
+from App.indicateurs import ANALYSIS_YEARS, education_vote_analysis
+from App.resultats import STORE_PATH, ResultStore, encode, params_key, version_key
+from App.stockage import is_fresh, read_store, store_path
+
+
+@dataclass(frozen=True)
+class Job:
+    kind: str
+    params: dict
+    datasets: tuple   # clés load_data, dans l'ordre de la version stockée
+
+    def version(self, versions):
+        return version_key(tuple(versions[key] for key in self.datasets))
+
+
+def jobs():
+    # Toutes les combinaisons servies par les pages. Les résultats couvrent
+    # déjà toutes les valeurs d'un paramètre quand la page n'en fait qu'une
+    # lecture (candidats d'une élection, départements × années d'une série).
+    for election in ELECTIONS:
+        yield Job('vote_shares', {'election': election}, (election,))
+        for year in ANALYSIS_YEARS:
+            yield Job('education_votes', {'election': election, 'year': year}, (election, 'diplomes_communes'))
+    yield Job('department_stats', {'prefix': 'peralpha'}, ('alphabetisation',))
+    yield Job('national_trends', {}, ('alphabetisation',))
+    for name, key in DATASET_KEYS.items():
+        yield Job('histograms', {'name': name}, (key,))
+        if name in CUBE_DATASETS:
+            yield Job('aggregation_cube', {'name': name}, (key,))
+
+
+# Fichiers lus par le processus courant, gardés pour les calculs suivants
+_FRAMES = {}
+
+
+def _frame(key):
+    # Mêmes données que load_data : sorties du pipeline quand elles sont à jour
+    if key not in _FRAMES:
+        _FRAMES[key] = read_store(store_path(key)) if is_fresh(key) else read_dataset(DATA_FILES[key])
+    return _FRAMES[key]
+
+
+def _compute(job):
+    frames = [_frame(key) for key in job.datasets]
+    params = job.params
+    if job.kind == 'vote_shares':
+        result = department_vote_shares(frames[0])
+    elif job.kind == 'education_votes':
+        result = education_vote_analysis(frames[0], frames[1], params['year'])
+    elif job.kind == 'department_stats':
+        result = DepartmentStats(LiteracySeries(frames[0]), params['prefix'])
+    elif job.kind == 'national_trends':
+        result = national_trends(national_table(LiteracySeries(frames[0])))
+    elif job.kind == 'histograms':
+        result = Histograms(ImmobilierDataset(params['name'], frames[0]))
+    elif job.kind == 'aggregation_cube':
+        result = AggregationCube(ImmobilierDataset(params['name'], frames[0]))
+    else:
+        raise ValueError(f"type de résultat inconnu : {job.kind}")
+    return encode(result)
+
+
+def _run(job):
+    start = time.perf_counter()
+    payload = _compute(job)
+    return payload, time.perf_counter() - start
+
+
+def precompute(store, kinds=None, processes=None, force=False):
+    versions = {key: dataset_version(key) for key in DATA_FILES}
+    stored = store.versions()
+    pending = []
+    for job in jobs():
+        if kinds and job.kind not in kinds:
+            continue
+        if any(versions[key].endswith('-absent') for key in job.datasets):
+            logging.warning(f"{job.kind} {job.params}: fichier source absent, ignoré")
+            continue
+        if not force and stored.get((job.kind, params_key(job.params))) == job.version(versions):
+            continue
+        pending.append(job)
+    if not pending:
+        logging.info("Magasin à jour")
+        return 0
+
+    # Les combinaisons qui lisent les mêmes fichiers sont soumises ensemble :
+    # un processus réutilise les fichiers déjà lus pour ses calculs suivants
+    pending.sort(key=lambda job: job.datasets)
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = {pool.submit(_run, job): job for job in pending}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                payload, seconds = future.result()
+            except Exception as e:
+                logging.error(f"{job.kind} {job.params}: {e}")
+                continue
+            store.put(job.kind, job.params, job.version(versions), payload)
+            logging.info(f"{job.kind} {job.params}: {seconds:.2f} s, {len(payload) / 1024:.0f} Kio")
+    return len(pending)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pré-calcule les résultats des pages")
+    parser.add_argument('--sortie', default=STORE_PATH)
+    parser.add_argument('--processus', type=int, default=os.cpu_count())
+    parser.add_argument('--types', nargs='+', help="types de résultats à calculer (tous par défaut)")
+    parser.add_argument('--force', action='store_true')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.sortie)), exist_ok=True)
+    store = ResultStore(args.sortie)
+    try:
+        precompute(store, args.types, args.processus, args.force)
+        for kind, (count, size) in store.summary().items():
+            logging.info(f"{kind}: {count} résultats, {size / 1024 ** 2:.1f} Mio")
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+# Préchauffage des caches au démarrage du serveur, dans un thread : lecture
+# des données, index de recherche, GeoJSON et vues par défaut des pages
+# (élection présidentielle, année 2010, premier jeu immobilier), avec les
+# mêmes arguments que les pages pour que leurs appels trouvent le cache.
+# Le serveur de santé (App/sante.py) ne répond « prêt » qu'à la fin, et jamais
+# si le runtime Streamlit n'apparaît pas : les caches remplis sans lui seraient
+# ceux de repli de Streamlit, pas ceux des sessions.
+import logging
+import threading
+import time
+
+from App.sante import READINESS
+
+DEFAULT_ELECTION = 'pres_df'
+DEFAULT_YEAR = 2010
+# Délai d'attente du runtime Streamlit (les caches st.cache_data en dépendent)
+RUNTIME_TIMEOUT = 60
+
+_lock = threading.Lock()
+_thread = None
+
+
+def _wait_for_runtime(timeout=RUNTIME_TIMEOUT):
+    from streamlit.runtime import Runtime
+
+    # True si le runtime existe (avant la fin du délai)
+    deadline = time.monotonic() + timeout
+    while not Runtime.exists() and time.monotonic() < deadline:
+        time.sleep(0.1)
+    return Runtime.exists()
+
+
+def _elections(data, versions):
+    from App.elections import get_department_vote_shares
+    from App.recherche import get_search_index
+
+    # Pourcentages de tous les candidats : couvre le premier candidat affiché
+    get_department_vote_shares(data[DEFAULT_ELECTION], DEFAULT_ELECTION, versions.get(DEFAULT_ELECTION))
+    get_search_index(data[DEFAULT_ELECTION], 'nomcommune', DEFAULT_ELECTION, versions.get(DEFAULT_ELECTION))
+
+
+def _diplomes(data, versions):
+    from App.indicateurs import get_education_vote_analysis
+    from App.recherche import get_search_index
+
+    get_education_vote_analysis(
+        data[DEFAULT_ELECTION], data['diplomes_communes'], DEFAULT_ELECTION, DEFAULT_YEAR,
+        (versions.get(DEFAULT_ELECTION), versions.get('diplomes_communes'))
+    )
+    get_search_index(data['diplomes_communes'], 'nomcommune', 'diplomes_communes',
+                     versions.get('diplomes_communes'))
+
+
+def _alphabetisation(data, versions):
+    from App.alphabetisation import get_department_stats, get_literacy_series, get_national_trends
+
+    # Statistiques de tous les départements : couvre le premier département affiché
+    version = versions.get('alphabetisation')
+    get_literacy_series(data['alphabetisation'], version)
+    get_department_stats(data['alphabetisation'], version)
+    get_national_trends(data['alphabetisation'], version)
+
+
+def _immobilier(data, versions):
+    from App.immobilier import (CUBE_DATASETS, DATASET_KEYS, get_aggregation_cube, get_histograms,
+                                get_immobilier_dataset)
+    from App.recherche import get_search_index
+
+    name, key = next(iter(DATASET_KEYS.items()))
+    df, version = data[key], versions.get(key)
+    get_immobilier_dataset(df, name, version)
+    get_search_index(df, 'nomcommune', name, version)
+    get_histograms(df, name, version)
+    if name in CUBE_DATASETS:
+        get_aggregation_cube(df, name, version)
+
+
+def _geojson(data, versions):
+    from App.elections import load_geojson
+
+    load_geojson()
+
+
+# Étape -> (fonction(data, versions), jeux de données nécessaires)
+STEPS = {
+    'geojson': (_geojson, ()),
+    'elections': (_elections, (DEFAULT_ELECTION,)),
+    'diplomes': (_diplomes, (DEFAULT_ELECTION, 'diplomes_communes')),
+    'alphabetisation': (_alphabetisation, ('alphabetisation',)),
+    'immobilier': (_immobilier, ('basesfiscalcommune',)),   # premier jeu de DATASET_KEYS
+}
+
+
+def _timed(step, function, *args):
+    READINESS.begin(step)
+    start = time.perf_counter()
+    try:
+        result = function(*args)
+    except Exception as e:
+        READINESS.fail(step, time.perf_counter() - start, str(e))
+        logging.error(f"Préchauffage {step} : {e}")
+        return None
+    READINESS.done(step, time.perf_counter() - start)
+    logging.info(f"Préchauffage {step} : {time.perf_counter() - start:.2f} s")
+    return result
+
+
+def warm_up():
+    from App.catalogue import load_data
+
+    if not _wait_for_runtime():
+        READINESS.fail('runtime', RUNTIME_TIMEOUT, f"runtime Streamlit absent après {RUNTIME_TIMEOUT} s")
+        logging.error(f"Préchauffage annulé : runtime Streamlit absent après {RUNTIME_TIMEOUT} s")
+        return
+    start = time.perf_counter()
+    catalogue = _timed('donnees', load_data)
+    if catalogue is not None:
+        snapshot = catalogue.snapshot()
+        for step, (function, datasets) in STEPS.items():
+            missing = [key for key in datasets if key not in snapshot.data]
+            if missing:
+                READINESS.skip(step, f"non chargé : {', '.join(missing)}")
+                continue
+            _timed(step, function, snapshot.data, snapshot.versions)
+    READINESS.finish()
+    logging.info(f"Préchauffage terminé en {time.perf_counter() - start:.2f} s")
+
+
+def start_warm_up():
+    # Une seule fois par processus, quel que soit le nombre d'appels
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=warm_up, name="prechauffage", daemon=True)
+            _thread.start()
+    return _thread
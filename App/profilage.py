@@ -0,0 +1,204 @@
+# Profilage par échantillonnage d'un rerun, pour les combinaisons lentes :
+# activé pour tout le serveur avec PROFILAGE=1, ou par session avec ?profil=1
+# si le serveur l'autorise (PROFILAGE_AUTORISE=1).
+#
+# Un thread relève la pile du thread de la page toutes les PROFILAGE_INTERVALLE
+# secondes (sys._current_frames, sans instrumenter le code). Chaque rerun
+# profilé écrit dans PROFILS_PATH :
+#
+#   <date>-<page>.folded   piles repliées (« a;b;c nombre »), lisibles par
+#                          flamegraph.pl, speedscope ou inferno
+#   <date>-<page>.json     page, durée, nombre d'échantillons et état des
+#                          widgets (libellé -> valeur) au moment du rerun
+#
+# Seuls les PROFILS_MAX derniers profils sont gardés.
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+PROFILE_ENV = "PROFILAGE"
+# Autorise ?profil=1 : sans lui, un visiteur ne peut pas lancer le profilage
+QUERY_ENV = "PROFILAGE_AUTORISE"
+PROFILES_DIR = os.environ.get("PROFILS_PATH", "./profils")
+SAMPLE_INTERVAL = float(os.environ.get("PROFILAGE_INTERVALLE", "0.005"))
+MAX_PROFILES = int(os.environ.get("PROFILS_MAX", "50"))
+
+
+def profiling_enabled():
+    if os.environ.get(PROFILE_ENV) == "1":
+        return True
+    return os.environ.get(QUERY_ENV) == "1" and st.query_params.get("profil") == "1"
+
+
+@lru_cache(maxsize=None)
+def _frame_name(code):
+    filename = code.co_filename
+    for marker in ('site-packages' + os.sep, 'dist-packages' + os.sep):
+        if marker in filename:
+            filename = filename.split(marker, 1)[1]
+            break
+    else:
+        if filename.startswith(os.getcwd() + os.sep):
+            filename = os.path.relpath(filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class Sampler(threading.Thread):
+    # Relève la pile d'un thread ; les `skip` cadres les plus externes (runtime
+    # Streamlit au-dessus du script) sont ignorés
+
+    def __init__(self, thread_id, skip=0, interval=SAMPLE_INTERVAL):
+        super().__init__(name="profilage", daemon=True)
+        self.thread_id = thread_id
+        self.skip = skip
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            # Clé : objets code, de l'extérieur vers l'intérieur (formatés à la fin)
+            self.stacks[tuple(reversed(codes))[self.skip:]] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def folded(self, root):
+        lines = []
+        for codes, count in self.stacks.most_common():
+            lines.append(";".join([root, *map(_frame_name, codes)]) + f" {count}")
+        return "\n".join(lines) + "\n"
+
+
+@dataclass
+class Profile:
+    page: str
+    path: str = None        # fichier .folded, une fois écrit
+    samples: int = 0
+    seconds: float = 0.0
+
+
+@contextmanager
+def _widget_labels():
+    # Libellés des widgets envoyés pendant le bloc : {id du widget: libellé}.
+    # _enqueue est interne à Streamlit : s'il disparaît, aucun libellé.
+    ctx = get_script_run_ctx()
+    labels = {}
+    enqueue = getattr(ctx, '_enqueue', None)
+    if enqueue is None:
+        yield labels
+        return
+
+    def recording_enqueue(msg):
+        if msg.WhichOneof('type') == 'delta' and msg.delta.WhichOneof('type') == 'new_element':
+            element = msg.delta.new_element
+            widget = getattr(element, element.WhichOneof('type') or '', None)
+            if getattr(widget, 'id', None) and hasattr(widget, 'label'):
+                labels[widget.id] = widget.label
+        enqueue(msg)
+
+    ctx._enqueue = recording_enqueue
+    try:
+        yield labels
+    finally:
+        ctx._enqueue = enqueue
+
+
+def _json_value(value):
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, (list, tuple, set)) and all(isinstance(v, (str, int, float, bool)) for v in value):
+        return list(value)
+    return repr(value)[:200]
+
+
+def widget_state(labels):
+    # Valeurs des widgets de la page (libellé -> valeur) et clés simples de la session
+    ctx = get_script_run_ctx()
+    widgets = {}
+    for widget_id, label in labels.items():
+        try:
+            widgets[label] = _json_value(ctx.session_state[widget_id])
+        except (KeyError, AttributeError):
+            continue
+    session = {key: _json_value(value) for key, value in st.session_state.to_dict().items()
+               if isinstance(value, (str, int, float, bool))}
+    return {'widgets': widgets, 'session': session, 'parametres': st.query_params.to_dict()}
+
+
+def _write(profile, sampler, state, started):
+    os.makedirs(PROFILES_DIR, exist_ok=True)
+    slug = re.sub(r'\W+', '_', profile.page).strip('_').lower()
+    base = os.path.join(PROFILES_DIR, f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(started))}"
+                                      f"-{int(started * 1000) % 1000:03d}-{slug}")
+    with open(f"{base}.folded", 'w') as f:
+        f.write(sampler.folded(f"page {profile.page}"))
+    with open(f"{base}.json", 'w') as f:
+        json.dump({
+            'page': profile.page,
+            'debut': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(started)),
+            'secondes': round(profile.seconds, 4),
+            'intervalle': sampler.interval,
+            'echantillons': profile.samples,
+            **state,
+        }, f, ensure_ascii=False, indent=1)
+    profile.path = f"{base}.folded"
+    _prune(PROFILES_DIR, MAX_PROFILES)
+
+
+def _prune(directory, keep):
+    # Profils les plus anciens supprimés (noms préfixés par la date), fichiers .folded et .json
+    bases = sorted({name.rsplit('.', 1)[0] for name in os.listdir(directory)
+                    if name.endswith(('.folded', '.json'))})
+    for base in bases[:max(len(bases) - keep, 0)]:
+        for extension in ('.folded', '.json'):
+            try:
+                os.remove(os.path.join(directory, base + extension))
+            except FileNotFoundError:
+                pass
+
+
+@contextmanager
+def profiled(page, enabled=None):
+    # Profile le bloc si le profilage est actif ; renvoie un Profile (None sinon)
+    if not (profiling_enabled() if enabled is None else enabled):
+        yield None
+        return
+    # Cadres au-dessus de l'appelant (0 : ce générateur, 1 : __enter__, 2 : appelant)
+    skip, frame = 0, sys._getframe(2).f_back
+    while frame is not None:
+        skip, frame = skip + 1, frame.f_back
+    profile = Profile(page)
+    sampler = Sampler(threading.get_ident(), skip)
+    started, start = time.time(), time.perf_counter()
+    sampler.start()
+    try:
+        with _widget_labels() as labels:
+            yield profile
+    finally:
+        sampler.stop()
+        profile.seconds = time.perf_counter() - start
+        profile.samples = sum(sampler.stacks.values())
+        try:
+            _write(profile, sampler, widget_state(labels), started)
+            logging.info(f"Profil de « {page} » : {profile.samples} échantillons en "
+                         f"{profile.seconds:.2f} s -> {profile.path}")
+        except OSError as e:
+            logging.error(f"Profil de « {page} » non enregistré : {e}")
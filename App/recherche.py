@@ -0,0 +1,155 @@
+import bisect
+import unicodedata
+
+import numpy as np
+import streamlit as st
+
+from App.catalogue import VERSIONS_KEPT
+from App.chargement import DATA_FILES
+
+
+def normalize_name(name):
+    # Minuscules sans accents, tirets/apostrophes remplacés par des espaces
+    if name is None or (isinstance(name, float) and np.isnan(name)):
+        return ""
+    text = unicodedata.normalize("NFKD", str(name))
+    text = "".join(c for c in text if not unicodedata.combining(c)).casefold()
+    for sep in "-'’_":
+        text = text.replace(sep, " ")
+    return " ".join(text.split())
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    # Index de recherche sur une colonne de noms (communes ou départements).
+    # Construit une seule fois : préfixes triés + listes de trigrammes, de
+    # caractères et de paires de caractères.
+
+    def __init__(self, names):
+        self.names = [("" if n is None else str(n)) for n in names]
+        self.normalized = [normalize_name(n) for n in self.names]
+
+        # Préfixes : tous les mots de chaque nom, triés
+        entries = []
+        for pos, norm in enumerate(self.normalized):
+            words = norm.split(" ")
+            for i in range(len(words)):
+                entries.append((" ".join(words[i:]), pos))
+        entries.sort()
+        self._prefix_keys = [key for key, _ in entries]
+        self._prefix_pos = np.array([pos for _, pos in entries], dtype=np.int32)
+        # Préfixe du nom entier (premier mot) ou d'un mot suivant
+        self._prefix_whole = np.array([key == self.normalized[pos] for key, pos in entries], dtype=bool)
+
+        # Trigrammes -> positions ; caractères et paires de caractères -> positions,
+        # pour les requêtes courtes (sous-chaînes exactes, sans vérification)
+        postings, short = {}, {}
+        for pos, norm in enumerate(self.normalized):
+            for tri in _trigrams(norm):
+                postings.setdefault(tri, []).append(pos)
+            for gram in {norm[i:i + k] for k in (1, 2) for i in range(len(norm) - k + 1)}:
+                short.setdefault(gram, []).append(pos)
+        self._postings = {tri: np.array(p, dtype=np.int32) for tri, p in postings.items()}
+        self._short_postings = {gram: np.array(p, dtype=np.int32) for gram, p in short.items()}
+
+        # Rang de chaque nom à score égal : le plus court, puis l'ordre alphabétique
+        self._by_rank = np.array(
+            sorted(range(len(self.normalized)), key=lambda pos: (len(self.normalized[pos]), self.normalized[pos], pos)),
+            dtype=np.int64,
+        )
+        self._rank = np.empty(len(self._by_rank), dtype=np.int64)
+        self._rank[self._by_rank] = np.arange(len(self._by_rank))
+
+    def __len__(self):
+        return len(self.names)
+
+    def _prefix_matches(self, query):
+        # (noms égaux à la requête, noms qui la commencent, noms dont un mot suivant la commence)
+        lo = bisect.bisect_left(self._prefix_keys, query)
+        mid = bisect.bisect_right(self._prefix_keys, query, lo)
+        hi = bisect.bisect_left(self._prefix_keys, query + "￿", mid)
+        positions, whole = self._prefix_pos[lo:hi], self._prefix_whole[lo:hi]
+        return positions[:mid - lo][whole[:mid - lo]], positions[whole], positions[~whole]
+
+    def _trigram_candidates(self, query):
+        # Trigrammes bruts de la requête, sans chevauchement (plus le dernier) :
+        # tous présents dans un nom qui la contient
+        lists = []
+        for tri in {query[i:i + 3] for i in [*range(0, len(query) - 2, 3), len(query) - 3]}:
+            posting = self._postings.get(tri)
+            if posting is None:
+                return np.empty(0, dtype=np.int32)
+            lists.append(posting)
+        if not lists:
+            return np.arange(len(self.names), dtype=np.int32)
+        lists.sort(key=len)
+        candidates = lists[0]
+        for posting in lists[1:]:
+            candidates = candidates[np.isin(candidates, posting, assume_unique=True)]
+            if candidates.size == 0:
+                break
+        return candidates
+
+    def search(self, query, limit=50, restrict_to=None):
+        # Retourne les positions des lignes correspondantes, classées :
+        # nom exact, début du nom, début d'un mot, puis sous-chaîne.
+        query = normalize_name(query)
+        if not query:
+            return []
+
+        # Moins de trois caractères : sous-chaînes exactes via les caractères et
+        # paires ; trois caractères : le trigramme lui-même ; au-delà, les noms
+        # contenant tous les trigrammes, vérifiés à la sélection
+        if len(query) < 3:
+            candidates = self._short_postings.get(query, np.empty(0, dtype=np.int32))
+        else:
+            candidates = self._trigram_candidates(query)
+        if restrict_to is not None:
+            candidates = np.intersect1d(candidates, np.asarray(restrict_to, dtype=np.int32))
+        if candidates.size == 0:
+            return []
+
+        # Score par nom, affecté du moins bon au meilleur, puis lu aux candidats
+        # (les noms qui commencent par la requête en font tous partie)
+        exact, name_prefix, word_prefix = self._prefix_matches(query)
+        scores = np.full(len(self.names), 3, dtype=np.int64)
+        scores[word_prefix] = 2
+        scores[name_prefix] = 1
+        scores[exact] = 0
+        scores = scores[candidates]
+
+        # Tri par (score, rang) en une clé entière
+        keys = np.sort(scores * len(self.names) + self._rank[candidates])
+        if len(query) <= 3:
+            return self._by_rank[keys[:limit] % len(self.names)].tolist()
+
+        # Candidats par trigrammes seulement (score 3) : vérifiés dans l'ordre du
+        # classement, jusqu'à la limite
+        sure = int(np.searchsorted(keys, 3 * len(self.names)))
+        ranked = self._by_rank[keys[:sure][:limit] % len(self.names)].tolist()
+        for pos in self._by_rank[keys[sure:] % len(self.names)].tolist():
+            if limit is not None and len(ranked) == limit:
+                break
+            if query in self.normalized[pos]:
+                ranked.append(pos)
+        return ranked
+
+    def search_names(self, query, limit=50, restrict_to=None):
+        return [self.names[pos] for pos in self.search(query, limit, restrict_to)]
+
+
+def filter_options(index, options_positions, query, limit=None):
+    # Type-ahead : restreint une liste d'options (positions dans l'index) à la saisie
+    if not query:
+        return [index.names[pos] for pos in options_positions]
+    return index.search_names(query, limit=limit, restrict_to=options_positions)
+
+
+@st.cache_resource(show_spinner=False, max_entries=VERSIONS_KEPT * len(DATA_FILES))
+def get_search_index(_df, column, dataset, version=None):
+    # Un index par (jeu de données, colonne, version), partagé par toutes les pages et sessions
+    return SearchIndex(_df[column].tolist())
@@ -0,0 +1,146 @@
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+
+import streamlit as st
+
+# Magasin des résultats pré-calculés (python -m App.precalcul) : une table
+# SQLite, une ligne par (type de résultat, paramètres), résultat picklé et
+# compressé. La version des fichiers sources est stockée avec chaque ligne :
+# un résultat calculé sur d'anciennes données n'est jamais servi.
+STORE_PATH = os.environ.get("PRECALCUL_PATH", "./Data/precalcul.sqlite")
+COMPRESSION_LEVEL = 6
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS resultats (
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    version TEXT NOT NULL,
+    created REAL NOT NULL,
+    size INTEGER NOT NULL,
+    payload BLOB NOT NULL,
+    PRIMARY KEY (kind, params)
+)
+"""
+
+
+def params_key(params):
+    return json.dumps(params, sort_keys=True, separators=(",", ":"))
+
+
+def version_key(version):
+    # Version d'un fichier, ou tuple de versions quand le résultat dépend de plusieurs fichiers
+    if isinstance(version, (tuple, list)):
+        return "|".join(str(part) for part in version)
+    return str(version)
+
+
+def encode(result):
+    return zlib.compress(pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL), COMPRESSION_LEVEL)
+
+
+def decode(payload):
+    return pickle.loads(zlib.decompress(payload))
+
+
+class ResultStore:
+
+    def __init__(self, path, readonly=False):
+        self.path = path
+        self.readonly = readonly
+        self._lock = threading.Lock()
+        self._file = None
+        self._conn = self._connect()
+
+    def _connect(self):
+        if not self.readonly:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute(_SCHEMA)
+            return conn
+        stat = os.stat(self.path)
+        self._file = (stat.st_dev, stat.st_ino)
+        return sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+
+    def refresh(self):
+        # Lecture seule : les écritures en place sont vues par SQLite, mais un
+        # fichier remplacé (nouvel inode) demande une nouvelle connexion, et
+        # l'ancienne est fermée. False si le fichier n'existe plus.
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        if (stat.st_dev, stat.st_ino) == self._file:
+            return True
+        with self._lock:
+            if (stat.st_dev, stat.st_ino) != self._file:
+                self._conn.close()
+                self._file = None
+                try:
+                    self._conn = self._connect()
+                except (OSError, sqlite3.Error):
+                    # Remplacé pendant la réouverture : nouvel essai au prochain appel
+                    return False
+        return True
+
+    def versions(self):
+        # {(type, paramètres JSON): version} de tout le magasin
+        with self._lock:
+            rows = self._conn.execute("SELECT kind, params, version FROM resultats").fetchall()
+        return {(kind, params): version for kind, params, version in rows}
+
+    def get(self, kind, params, version):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload FROM resultats WHERE kind = ? AND params = ? AND version = ?",
+                (kind, params_key(params), version_key(version)),
+            ).fetchone()
+        return None if row is None else decode(row[0])
+
+    def put(self, kind, params, version, payload):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO resultats VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, params_key(params), version_key(version), time.time(), len(payload), payload),
+            )
+
+    def summary(self):
+        # {type: (nombre de résultats, octets compressés)}
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT kind, COUNT(*), SUM(size) FROM resultats GROUP BY kind ORDER BY kind"
+            ).fetchall()
+        return {kind: (count, size) for kind, count, size in rows}
+
+    def close(self):
+        self._conn.close()
+
+
+@st.cache_resource(show_spinner=False)
+def _open_store(path):
+    # Une connexion par chemin, rouverte par ResultStore.refresh si le fichier est remplacé
+    return ResultStore(path, readonly=True)
+
+
+def get_result_store(path=STORE_PATH):
+    # Magasin en lecture seule ; None s'il n'existe pas
+    if not os.path.exists(path):
+        return None
+    try:
+        store = _open_store(path)
+    except sqlite3.Error:
+        return None
+    return store if store.refresh() else None
+
+
+def precomputed(kind, version, **params):
+    # Résultat pré-calculé pour ces paramètres et cette version des données, sinon None
+    if version is None:
+        return None
+    store = get_result_store()
+    if store is None:
+        return None
+    return store.get(kind, params, version)
@@ -0,0 +1,115 @@
+# Serveur de santé, à côté du serveur Streamlit, sur SANTE_PORT :
+#
+#   /sante  vivant : 200 dès que le processus répond
+#   /pret   prêt : 503 tant que le préchauffage (App/prechauffage.py) n'est pas
+#           terminé, puis 200 ; détail des étapes en JSON dans les deux cas
+#
+# D'autres chemins peuvent être ajoutés avec @route (ex. /metrics, App/metriques.py).
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HEALTH_HOST = os.environ.get("SANTE_HOTE", "0.0.0.0")
+HEALTH_PORT = int(os.environ.get("SANTE_PORT", "8502"))
+
+
+class Readiness:
+    # État du démarrage, écrit par le préchauffage et lu par le serveur
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._steps = {}
+        self._finished = None
+
+    def begin(self, step):
+        with self._lock:
+            self._steps[step] = {'etat': 'en cours'}
+
+    def done(self, step, seconds):
+        with self._lock:
+            self._steps[step] = {'etat': 'fait', 'secondes': round(seconds, 3)}
+
+    def fail(self, step, seconds, error):
+        with self._lock:
+            self._steps[step] = {'etat': 'erreur', 'secondes': round(seconds, 3), 'erreur': error}
+
+    def skip(self, step, reason):
+        with self._lock:
+            self._steps[step] = {'etat': 'ignoré', 'raison': reason}
+
+    def finish(self):
+        with self._lock:
+            self._finished = time.time()
+
+    @property
+    def ready(self):
+        return self._finished is not None
+
+    def report(self):
+        with self._lock:
+            return {
+                'pret': self._finished is not None,
+                'secondes': round((self._finished or time.time()) - self._started, 3),
+                'etapes': {step: dict(info) for step, info in self._steps.items()},
+            }
+
+
+READINESS = Readiness()
+
+# Chemin -> fonction sans argument renvoyant (code HTTP, type de contenu, corps)
+ROUTES = {}
+
+
+def route(path):
+    def register(handler):
+        ROUTES[path] = handler
+        return handler
+    return register
+
+
+def _json(status, payload):
+    return status, "application/json", json.dumps(payload, ensure_ascii=False).encode()
+
+
+@route("/sante")
+def _alive():
+    return _json(200, {'vivant': True})
+
+
+@route("/pret")
+def _ready():
+    report = READINESS.report()
+    return _json(200 if report['pret'] else 503, report)
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        handler = ROUTES.get(self.path.split('?', 1)[0])
+        if handler is None:
+            status, content_type, body = 404, "text/plain", b"introuvable\n"
+        else:
+            try:
+                status, content_type, body = handler()
+            except Exception as e:
+                logging.exception(f"Serveur de santé : {self.path}")
+                status, content_type, body = 500, "text/plain", f"{e}\n".encode()
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug("Serveur de santé : " + format % args)
+
+
+def start_health_server(host=HEALTH_HOST, port=HEALTH_PORT):
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="sante", daemon=True).start()
+    logging.info(f"Serveur de santé sur {host}:{server.server_address[1]}")
+    return server
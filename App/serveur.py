@@ -0,0 +1,55 @@
+# Serveur de santé, métriques et préchauffage des caches, démarrés une seule
+# fois par processus par start_services :
+#
+#   streamlit run MainApp.py           au premier rerun de MainApp
+#   python -m App.serveur [options]    avant le serveur Streamlit (options de
+#                                      streamlit run, ex. --server.port 8501)
+#
+# Le préchauffage tourne dans le même processus que les sessions et attend le
+# runtime Streamlit : les caches qu'il remplit sont ceux des sessions. Les
+# métriques sont servies sur /metrics et, si METRIQUES_FICHIER est défini,
+# écrites dans ce fichier.
+import logging
+import os
+import sys
+import threading
+
+from App.metriques import METRICS_PATH, start_metrics_writer
+from App.prechauffage import start_warm_up
+from App.sante import HEALTH_PORT, start_health_server
+
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "MainApp.py")
+
+_lock = threading.Lock()
+_started = False
+
+
+def start_services():
+    # True au premier appel du processus, False ensuite
+    global _started
+    with _lock:
+        if _started:
+            return False
+        _started = True
+    try:
+        start_health_server()
+    except OSError as e:
+        # Port déjà pris (autre instance) : l'application fonctionne sans
+        logging.error(f"Serveur de santé non démarré (port {HEALTH_PORT}) : {e}")
+    if METRICS_PATH:
+        start_metrics_writer()
+    start_warm_up()
+    return True
+
+
+def main():
+    from streamlit.web import cli
+
+    logging.basicConfig(level=logging.INFO)
+    start_services()
+    sys.argv = ["streamlit", "run", MAIN_SCRIPT, *sys.argv[1:]]
+    sys.exit(cli.main())
+
+
+if __name__ == '__main__':
+    main()
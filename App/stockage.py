@@ -0,0 +1,249 @@
+# Stockage en colonnes des gros fichiers communaux, alimenté en flux.
+#
+#   python -m App.stockage diplomes_communes [--lignes 5000] [--premiere-annee 1945]
+#
+# Le CSV est lu par paquets de lignes : seules les colonnes retenues sont
+# analysées (filtre sur l'en-tête), directement en float32, et chaque paquet
+# est écrit à la suite dans une matrice .npy pré-allouée (memmap). La mémoire
+# pendant l'ingestion reste proche de la taille de la table finale.
+#
+# Contenu du dossier : valeurs.npy (lignes × colonnes numériques, float32),
+# ids.csv (colonnes d'identification) et meta.json (colonnes, types des
+# identifiants, nombre de lignes, version du fichier source). Les
+# identifiants sont relus avec les types que pd.read_csv donne au CSV
+# (codecommune en int64 s'il est numérique), comme ceux de chargement.py :
+# les jointures entre un jeu stocké et un jeu lu en CSV restent possibles.
+import argparse
+import json
+import logging
+import os
+import re
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from App.catalogue import dataset_version
+from App.chargement import DATA_FILES
+
+STORE_DIR = "./Data/colonnes"
+CHUNK_ROWS = 5000
+ID_COLUMNS = ('dep', 'nomdep', 'codecommune', 'nomcommune', 'codereg', 'nomreg')
+
+# Diplômes : colonnes annuelles avant 1945 écartées (même filtre que le
+# notebook Data_Prep/prep_diplomes_communes.ipynb, appliqué à la lecture)
+DIPLOMES_FIRST_YEAR = 1945
+_DIPLOMES_YEAR_COLUMN = re.compile(r'^(?:nodip|bac|sup)[fh]?(\d{4})$|^(?:per|p)(?:bac|sup)(\d{4})$')
+
+
+def keep_diplomes_column(column, first_year=DIPLOMES_FIRST_YEAR):
+    match = _DIPLOMES_YEAR_COLUMN.match(column)
+    return match is None or int(match.group(1) or match.group(2)) >= first_year
+
+
+# Jeux stockés en colonnes : clé load_data -> filtre des colonnes
+STORED_DATASETS = {
+    "diplomes_communes": keep_diplomes_column,
+}
+
+def store_path(key, root=STORE_DIR):
+    return os.path.join(root, key)
+
+
+def _max_rows(path):
+    # Borne haute du nombre de lignes de données : fins de ligne hors en-tête
+    # (un champ entre guillemets peut contenir des fins de ligne, les lignes
+    # vides sont ignorées par pandas : le nombre exact vient de la lecture)
+    lines, last = 0, b"\n"
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 24), b''):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    return max(lines + (last != b"\n") - 1, 0)
+
+
+def _text_columns(csv_path, header, sample_rows=1000):
+    # Colonnes d'identification et colonnes texte (repérées sur les premières lignes)
+    sample = pd.read_csv(csv_path, nrows=sample_rows, low_memory=False)
+    numeric = set(sample.select_dtypes(include='number').columns)
+    return [col for col in header if col in ID_COLUMNS or col not in numeric]
+
+
+def _late_text_columns(csv_path, columns, chunk_rows):
+    # Colonnes numériques sur les premières lignes mais pas sur tout le fichier
+    # (lecture complète, seulement quand la conversion en float32 a échoué)
+    found = set()
+    for chunk in pd.read_csv(csv_path, usecols=columns, chunksize=chunk_rows):
+        found.update(chunk.select_dtypes(exclude='number').columns)
+    return [col for col in columns if col in found]
+
+
+def _publish(out_dir, tmp_values, ids, meta):
+    # Remplacement des anciens fichiers seulement une fois tout écrit (meta en dernier)
+    tmp_ids = os.path.join(out_dir, "ids.csv.tmp")
+    ids.to_csv(tmp_ids, index=False)
+    # Types relevés comme pd.read_csv les déduirait du CSV d'origine (mêmes valeurs)
+    inferred = pd.read_csv(tmp_ids, low_memory=False).dtypes
+    meta = {**meta, 'id_dtypes': {col: str(dtype) for col, dtype in inferred.items()}}
+    tmp_meta = os.path.join(out_dir, "meta.json.tmp")
+    with open(tmp_meta, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_values, os.path.join(out_dir, "valeurs.npy"))
+    os.replace(tmp_ids, os.path.join(out_dir, "ids.csv"))
+    os.replace(tmp_meta, os.path.join(out_dir, "meta.json"))
+    return meta
+
+
+def _ingest_values(csv_path, out_dir, id_columns, value_columns, chunk_rows):
+    # (matrice temporaire valeurs.tmp.npy, identifiants, nombre de lignes)
+    capacity = _max_rows(csv_path)
+    os.makedirs(out_dir, exist_ok=True)
+    tmp_values = os.path.join(out_dir, "valeurs.tmp.npy")
+    values = np.lib.format.open_memmap(tmp_values, mode='w+', dtype=np.float32,
+                                       shape=(capacity, len(value_columns)))
+    ids = []
+    offset = 0
+    reader = pd.read_csv(
+        csv_path,
+        usecols=id_columns + value_columns,
+        dtype={**{col: str for col in id_columns}, **{col: np.float32 for col in value_columns}},
+        chunksize=chunk_rows,
+    )
+    for chunk in reader:
+        if offset + len(chunk) > capacity:
+            raise ValueError(f"{csv_path}: plus de {capacity} lignes lues")
+        values[offset:offset + len(chunk)] = chunk[value_columns].to_numpy(dtype=np.float32, na_value=np.nan)
+        ids.append(chunk[id_columns])
+        offset += len(chunk)
+    values.flush()
+    if offset < capacity:
+        # Fins de ligne dans des champs ou lignes vides : matrice ramenée aux lignes lues
+        exact = os.path.join(out_dir, "valeurs.exact.tmp.npy")
+        np.save(exact, values[:offset])
+        del values
+        os.replace(exact, tmp_values)
+    else:
+        del values
+    return tmp_values, pd.concat(ids, ignore_index=True), offset
+
+
+def ingest_csv(csv_path, out_dir, keep=None, chunk_rows=CHUNK_ROWS, version=None):
+    header = list(pd.read_csv(csv_path, nrows=0).columns)
+    id_columns = _text_columns(csv_path, header)
+    value_columns = [col for col in header if col not in id_columns and (keep is None or keep(col))]
+    try:
+        tmp_values, ids, n_rows = _ingest_values(csv_path, out_dir, id_columns, value_columns, chunk_rows)
+    except ValueError:
+        # Texte au-delà des premières lignes dans une colonne supposée numérique :
+        # colonne gardée en texte, comme pd.read_csv sur le fichier entier
+        late = _late_text_columns(csv_path, value_columns, chunk_rows)
+        if not late:
+            raise
+        logging.warning(f"{csv_path}: colonnes non numériques stockées en texte : {', '.join(late)}")
+        id_columns = [col for col in header if col in id_columns or col in late]
+        value_columns = [col for col in value_columns if col not in late]
+        tmp_values, ids, n_rows = _ingest_values(csv_path, out_dir, id_columns, value_columns, chunk_rows)
+
+    return _publish(out_dir, tmp_values, ids, {
+        'source': csv_path,
+        'version': version,
+        'rows': n_rows,
+        'id_columns': id_columns,
+        'value_columns': value_columns,
+        'dropped_columns': len(header) - len(id_columns) - len(value_columns),
+    })
+
+
+def write_store(df, out_dir, version=None, source=None):
+    # Écriture d'un DataFrame déjà en mémoire : colonnes texte en ids, le reste en float32
+    id_columns = [col for col in df.columns
+                  if col in ID_COLUMNS or not pd.api.types.is_numeric_dtype(df[col])]
+    value_columns = [col for col in df.columns if col not in id_columns]
+    os.makedirs(out_dir, exist_ok=True)
+    tmp_values = os.path.join(out_dir, "valeurs.tmp.npy")
+    np.save(tmp_values, df[value_columns].to_numpy(dtype=np.float32, na_value=np.nan))
+    return _publish(out_dir, tmp_values, df[id_columns], {
+        'source': source,
+        'version': version,
+        'rows': len(df),
+        'id_columns': id_columns,
+        'value_columns': value_columns,
+        'dropped_columns': 0,
+    })
+
+
+def copy_store(source, out_dir, version):
+    # Copie d'un stockage existant sous une autre version (export du pipeline)
+    os.makedirs(out_dir, exist_ok=True)
+    tmp_values = os.path.join(out_dir, "valeurs.tmp.npy")
+    shutil.copyfile(os.path.join(source, "valeurs.npy"), tmp_values)
+    return _publish(out_dir, tmp_values, _read_ids(source, read_meta(source)),
+                    {**read_meta(source), 'source': source, 'version': version})
+
+
+def read_meta(out_dir):
+    try:
+        with open(os.path.join(out_dir, "meta.json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_fresh(key, source=None, root=STORE_DIR):
+    # Le stockage existe et a été construit à partir de la version actuelle du
+    # CSV (celui de source pour une table dérivée)
+    meta = read_meta(store_path(key, root))
+    return meta is not None and meta['version'] == dataset_version(source or key)
+
+
+def _read_ids(out_dir, meta):
+    # Types de meta.json ; pour un stockage plus ancien, déduits comme par pd.read_csv
+    return pd.read_csv(os.path.join(out_dir, "ids.csv"), dtype=meta.get('id_dtypes'), low_memory=False)
+
+
+def read_store(out_dir):
+    # DataFrame (identifiants typés comme dans le CSV + colonnes float32) à partir du stockage
+    meta = read_meta(out_dir)
+    values = np.load(os.path.join(out_dir, "valeurs.npy"), mmap_mode='r')
+    ids = _read_ids(out_dir, meta)
+    frame = pd.DataFrame(np.asarray(values), columns=meta['value_columns'])
+    return pd.concat([ids[meta['id_columns']], frame], axis=1)
+
+
+def _peak_rss_mib():
+    # Pic de mémoire du processus (module resource : Unix seulement)
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestion en flux d'un CSV vers le stockage en colonnes")
+    parser.add_argument('jeu', choices=sorted(STORED_DATASETS))
+    parser.add_argument('--csv', help="chemin du CSV (par défaut celui de l'application)")
+    parser.add_argument('--sortie', default=STORE_DIR)
+    parser.add_argument('--lignes', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--premiere-annee', type=int, default=DIPLOMES_FIRST_YEAR)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    keep = STORED_DATASETS[args.jeu]
+    if keep is keep_diplomes_column:
+        keep = lambda col: keep_diplomes_column(col, args.premiere_annee)
+    csv_path = args.csv or DATA_FILES[args.jeu]
+    start = time.perf_counter()
+    meta = ingest_csv(csv_path, store_path(args.jeu, args.sortie), keep, args.lignes,
+                      dataset_version(args.jeu) if args.csv is None else None)
+    peak = _peak_rss_mib()
+    logging.info(
+        f"{args.jeu}: {meta['rows']} lignes, {len(meta['value_columns'])} colonnes gardées, "
+        f"{meta['dropped_columns']} écartées, {time.perf_counter() - start:.1f} s"
+        + (f", pic mémoire {peak:.0f} Mio" if peak is not None else "")
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+# Mesure des étapes de chaque rendu de page : durée, lignes traitées et octets
+# envoyés au navigateur (messages Streamlit sérialisés pendant l'étape).
+#
+#   with stage("fusion", rows=len(df)) as s:
+#       ...
+#       s.rows = len(resultat)      # ou après coup
+#
+# MainApp ouvre une trace par rerun (begin_trace / end_trace). Les étapes hors
+# trace (pré-calcul, préchauffage, scripts) ne coûtent qu'un appel de fonction.
+# Chaque rerun produit une ligne de log JSON (logger App.traces) ; le panneau
+# de débogage s'affiche avec ?debug=1 ou TRACES_PANNEAU=1. La durée totale
+# alimente l'histogramme app_page_render_seconds (App/metriques.py).
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from App.metriques import PAGE_RENDER_SECONDS
+
+LOGGER = logging.getLogger("App.traces")
+PANEL_ENV = "TRACES_PANNEAU"
+# Nombre de traces gardées par session pour le panneau
+HISTORY = 10
+
+_local = threading.local()
+
+
+@dataclass
+class StageRecord:
+    name: str
+    depth: int
+    seconds: float = 0.0
+    rows: int = None
+    bytes: int = 0
+
+
+class Trace:
+
+    def __init__(self, page):
+        self.page = page
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+        self.bytes = 0        # octets envoyés depuis le début du rerun
+        self.records = []
+        self.depth = 0
+
+
+def current_trace():
+    return getattr(_local, 'trace', None)
+
+
+@contextmanager
+def stage(name, rows=None):
+    trace = current_trace()
+    record = StageRecord(name, trace.depth if trace else 0, rows=rows)
+    if trace is None:
+        yield record
+        return
+    trace.records.append(record)
+    trace.depth += 1
+    start, sent = time.perf_counter(), trace.bytes
+    try:
+        yield record
+    finally:
+        record.seconds = time.perf_counter() - start
+        record.bytes = trace.bytes - sent
+        trace.depth -= 1
+
+
+def _count_sent_bytes():
+    # Compte la taille des messages envoyés par la session courante (une seule
+    # enveloppe par contexte de script). _enqueue est interne à Streamlit :
+    # s'il disparaît, les octets ne sont pas comptés.
+    ctx = get_script_run_ctx()
+    enqueue = getattr(ctx, '_enqueue', None)
+    if enqueue is None or getattr(enqueue, '_traces', False):
+        return
+
+    def counting_enqueue(msg):
+        trace = current_trace()
+        if trace is not None:
+            trace.bytes += msg.ByteSize()
+        enqueue(msg)
+
+    counting_enqueue._traces = True
+    ctx._enqueue = counting_enqueue
+
+
+def begin_trace(page):
+    # Remplace une trace restée ouverte (rerun interrompu par st.stop)
+    _count_sent_bytes()
+    _local.trace = Trace(page)
+    return _local.trace
+
+
+def end_trace(trace):
+    if current_trace() is trace:
+        _local.trace = None
+    trace.seconds = time.perf_counter() - trace.started
+    PAGE_RENDER_SECONDS.observe(trace.seconds, page=trace.page)
+    LOGGER.info(json.dumps({
+        'evenement': 'rendu',
+        'page': trace.page,
+        'secondes': round(trace.seconds, 4),
+        'octets': trace.bytes,
+        'etapes': [
+            {'nom': r.name, 'profondeur': r.depth, 'secondes': round(r.seconds, 4),
+             'lignes': r.rows, 'octets': r.bytes}
+            for r in trace.records
+        ],
+    }, ensure_ascii=False))
+    history = st.session_state.setdefault('traces', [])
+    history.append(trace)
+    del history[:-HISTORY]
+
+
+def panel_enabled():
+    return os.environ.get(PANEL_ENV) == "1" or st.query_params.get("debug") == "1"
+
+
+def show_panel(trace):
+    with st.expander(f"Débogage : rendu de « {trace.page} » en {trace.seconds * 1000:.0f} ms, "
+                     f"{trace.bytes / 1024:.0f} Kio envoyés"):
+        st.dataframe(pd.DataFrame([
+            {
+                "étape": "  " * record.depth + record.name,
+                "ms": round(record.seconds * 1000, 1),
+                "lignes": record.rows,
+                "Kio envoyés": round(record.bytes / 1024, 1),
+            }
+            for record in trace.records
+        ]), hide_index=True)
+        previous = st.session_state.get('traces', [])[:-1]
+        if previous:
+            st.caption("Rendus précédents : " + ", ".join(
+                f"{t.page} {t.seconds * 1000:.0f} ms" for t in reversed(previous)
+            ))
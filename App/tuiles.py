@@ -0,0 +1,276 @@
+# Génération hors ligne des tuiles raster de la carte nationale d'alphabétisation
+# par commune (peralpha{année}), servies ensuite en statique par Streamlit.
+#
+#   python -m App.tuiles --annees 1816 1946 --zoom 5 9
+#
+# Les tuiles sont écrites dans ./static/tuiles/peralpha/{année}/{z}/{x}/{y}.png.
+# Chaque année a un manifeste avec l'empreinte (géométrie + valeurs + zooms) :
+# une année déjà générée avec les mêmes entrées est sautée.
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+
+import numpy as np
+import pandas as pd
+
+TILE_SIZE = 256
+TILES_DIR = "./static/tuiles"
+# URL absolue : la carte folium est rendue dans l'iframe de streamlit_folium
+TILES_URL = os.environ.get("ANALYSEVOTES_TUILES_URL", "/app/static/tuiles")
+DEFAULT_GEOJSON = "./Data/GeoJson/communes.geojson"
+DEFAULT_CSV = "./Data/Alphabetisation/alphabetisationcommunes.csv"
+LAYER = "peralpha"
+
+# Palette YlOrRd (0 -> 100 %)
+PALETTE = ['#ffffcc', '#ffeda0', '#fed976', '#feb24c', '#fd8d3c',
+           '#fc4e2a', '#e31a1c', '#bd0026', '#800026']
+# À incrémenter quand la palette ou le rendu change : toutes les années sont regénérées
+PALETTE_VERSION = 2
+NO_DATA_COLOR = (210, 210, 210, 140)
+FILL_ALPHA = 210
+
+
+def normalize_code(code):
+    # Codes INSEE sur 5 caractères ("1001" -> "01001", "2B110" inchangé)
+    code = str(code).strip()
+    if code.endswith(".0"):
+        code = code[:-2]
+    return code.zfill(5) if code.isdigit() else code.upper()
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _mercator(lonlat):
+    # lon/lat -> coordonnées Web Mercator normalisées dans [0, 1]
+    lon = lonlat[:, 0]
+    lat = np.clip(lonlat[:, 1], -85.05112878, 85.05112878)
+    sin = np.sin(np.radians(lat))
+    x = (lon + 180.0) / 360.0
+    y = 0.5 - np.log((1 + sin) / (1 - sin)) / (4 * np.pi)
+    return np.column_stack([x, y])
+
+
+def value_colors(values):
+    # Taux (%) -> RGBA, interpolation linéaire dans la palette
+    stops = np.array([[int(c[i:i + 2], 16) for i in (1, 3, 5)] for c in PALETTE], dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    missing = np.isnan(values)
+    position = np.clip(np.nan_to_num(values) / 100.0, 0, 1) * (len(PALETTE) - 1)
+    low = np.floor(position).astype(int)
+    high = np.minimum(low + 1, len(PALETTE) - 1)
+    frac = (position - low)[:, None]
+    rgb = np.rint(stops[low] * (1 - frac) + stops[high] * frac).astype(np.uint8)
+    colors = [(*map(int, c), FILL_ALPHA) for c in rgb]
+    for i in np.flatnonzero(missing):
+        colors[i] = NO_DATA_COLOR
+    return colors
+
+
+class CommuneGeometry:
+    # Polygones des communes en Web Mercator (contour extérieur puis trous),
+    # chargés une fois par exécution
+
+    def __init__(self, path, code_property='code'):
+        with open(path, 'r', encoding='utf-8') as f:
+            geojson = json.load(f)
+        self.fingerprint = _file_hash(path)
+
+        codes, shapes, boxes = [], [], []
+        for feature in geojson['features']:
+            geometry = feature.get('geometry') or {}
+            if geometry.get('type') == 'Polygon':
+                polygons = [geometry['coordinates']]
+            elif geometry.get('type') == 'MultiPolygon':
+                polygons = geometry['coordinates']
+            else:
+                continue
+            rings = [[_mercator(np.asarray(ring, dtype=np.float64)[:, :2]) for ring in polygon]
+                     for polygon in polygons]
+            stacked = np.vstack([polygon[0] for polygon in rings])
+            codes.append(normalize_code(feature['properties'][code_property]))
+            shapes.append(rings)
+            boxes.append([*stacked.min(axis=0), *stacked.max(axis=0)])
+
+        boxes = np.array(boxes, dtype=np.float64)
+        # Les plus grandes communes d'abord : les enclaves sont dessinées par-dessus
+        area = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+        order = np.argsort(-area, kind='stable')
+        self.codes = [codes[i] for i in order]
+        self.polygons = [shapes[i] for i in order]
+        self.boxes = boxes[order]
+        self.extent = (*self.boxes[:, :2].min(axis=0), *self.boxes[:, 2:].max(axis=0))
+
+    def tile_range(self, zoom):
+        n = 2 ** zoom
+        x0, y0, x1, y1 = (np.clip(np.array(self.extent) * n, 0, n - 1)).astype(int)
+        return range(x0, x1 + 1), range(y0, y1 + 1)
+
+    def features_in_tile(self, zoom, x, y):
+        n = 2 ** zoom
+        minx, miny, maxx, maxy = x / n, y / n, (x + 1) / n, (y + 1) / n
+        b = self.boxes
+        return np.flatnonzero((b[:, 0] <= maxx) & (b[:, 2] >= minx) & (b[:, 1] <= maxy) & (b[:, 3] >= miny))
+
+
+def _pixels(ring, scale, origin):
+    # Sommets en pixels de la tuile, points confondus à ce zoom supprimés ; None si dégénéré
+    pixels = np.rint(ring * scale - origin)
+    keep = np.ones(len(pixels), dtype=bool)
+    keep[1:] = np.any(pixels[1:] != pixels[:-1], axis=1)
+    pixels = pixels[keep]
+    return [tuple(p) for p in pixels.tolist()] if len(pixels) >= 3 else None
+
+
+def render_tile(geometry, colors, zoom, x, y):
+    from PIL import Image, ImageDraw
+
+    features = geometry.features_in_tile(zoom, x, y)
+    if features.size == 0:
+        return None
+    scale = TILE_SIZE * 2 ** zoom
+    origin = np.array([x * TILE_SIZE, y * TILE_SIZE], dtype=np.float64)
+    image = Image.new('RGBA', (TILE_SIZE, TILE_SIZE), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    for i in features:
+        color = colors[i]
+        for polygon in geometry.polygons[i]:
+            exterior = _pixels(polygon[0], scale, origin)
+            if exterior is None:
+                continue
+            holes = [hole for hole in (_pixels(ring, scale, origin) for ring in polygon[1:]) if hole]
+            if not holes:
+                draw.polygon(exterior, fill=color)
+                continue
+            # Polygone à trous (commune enclavée à l'intérieur) : masque du
+            # contour moins les trous, pour ne pas recouvrir l'enclave
+            mask = Image.new('L', (TILE_SIZE, TILE_SIZE), 0)
+            mask_draw = ImageDraw.Draw(mask)
+            mask_draw.polygon(exterior, fill=255)
+            for hole in holes:
+                mask_draw.polygon(hole, fill=0)
+            image.paste(Image.new('RGBA', (TILE_SIZE, TILE_SIZE), color), (0, 0), mask)
+    return image
+
+
+def _year_fingerprint(geometry, values, zooms):
+    digest = hashlib.sha256()
+    digest.update(geometry.fingerprint.encode())
+    digest.update(np.ascontiguousarray(values, dtype=np.float32).tobytes())
+    digest.update(f"{list(zooms)}-{PALETTE_VERSION}".encode())
+    return digest.hexdigest()
+
+
+def _read_json(path, default):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def _write_json(path, payload):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(payload, f)
+    os.replace(tmp, path)
+
+
+def build_year(geometry, values, year, zooms, out_dir=TILES_DIR, force=False):
+    # Génère toutes les tuiles d'une année ; retourne le nombre de tuiles écrites
+    # (0 si l'année est déjà à jour)
+    year_dir = os.path.join(out_dir, LAYER, str(year))
+    manifest_path = os.path.join(year_dir, 'manifest.json')
+    fingerprint = _year_fingerprint(geometry, values, zooms)
+    if not force and _read_json(manifest_path, {}).get('fingerprint') == fingerprint:
+        return 0
+
+    # Tuiles écrites dans un dossier temporaire qui remplace ensuite celui de
+    # l'année : aucune tuile d'une génération précédente ne reste en place
+    build_dir = f"{year_dir}.tmp"
+    shutil.rmtree(build_dir, ignore_errors=True)
+    colors = value_colors(values)
+    written = 0
+    for zoom in zooms:
+        xs, ys = geometry.tile_range(zoom)
+        for x in xs:
+            for y in ys:
+                image = render_tile(geometry, colors, zoom, x, y)
+                if image is None:
+                    continue
+                tile_dir = os.path.join(build_dir, str(zoom), str(x))
+                os.makedirs(tile_dir, exist_ok=True)
+                image.save(os.path.join(tile_dir, f"{y}.png"), optimize=True)
+                written += 1
+
+    os.makedirs(build_dir, exist_ok=True)
+    _write_json(os.path.join(build_dir, 'manifest.json'),
+                {'fingerprint': fingerprint, 'zooms': list(zooms), 'tiles': written})
+    shutil.rmtree(year_dir, ignore_errors=True)
+    os.rename(build_dir, year_dir)
+    index_path = os.path.join(out_dir, LAYER, 'index.json')
+    index = _read_json(index_path, {})
+    index[str(year)] = {'min_zoom': min(zooms), 'max_zoom': max(zooms)}
+    _write_json(index_path, index)
+    return written
+
+
+def available_years(out_dir=TILES_DIR):
+    # Années déjà générées : {année: {'min_zoom', 'max_zoom'}}
+    index = _read_json(os.path.join(out_dir, LAYER, 'index.json'), {})
+    return {int(year): zooms for year, zooms in sorted(index.items())}
+
+
+def tile_url(year):
+    return f"{TILES_URL}/{LAYER}/{year}/{{z}}/{{x}}/{{y}}.png"
+
+
+def load_values(csv_path, years):
+    columns = [f"{LAYER}{year}" for year in years]
+    wanted = set(columns) | {'codecommune'}
+    df = pd.read_csv(csv_path, usecols=lambda col: col in wanted, dtype={'codecommune': str})
+    df['codecommune'] = df['codecommune'].map(normalize_code)
+    return df.drop_duplicates('codecommune').set_index('codecommune')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère les tuiles de la carte d'alphabétisation par commune")
+    parser.add_argument('--geojson', default=DEFAULT_GEOJSON)
+    parser.add_argument('--code-property', default='code')
+    parser.add_argument('--csv', default=DEFAULT_CSV)
+    parser.add_argument('--annees', nargs=2, type=int, default=[1816, 1946], metavar=('DEBUT', 'FIN'))
+    parser.add_argument('--zoom', nargs=2, type=int, default=[5, 9], metavar=('MIN', 'MAX'))
+    parser.add_argument('--sortie', default=TILES_DIR)
+    parser.add_argument('--force', action='store_true')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    geometry = CommuneGeometry(args.geojson, args.code_property)
+    header = pd.read_csv(args.csv, nrows=0).columns
+    pattern = re.compile(rf'^{LAYER}(\d{{4}})$')
+    years = [
+        int(m.group(1)) for col in header if (m := pattern.match(col))
+        and args.annees[0] <= int(m.group(1)) <= args.annees[1]
+    ]
+    values = load_values(args.csv, years).reindex(geometry.codes)
+    zooms = range(args.zoom[0], args.zoom[1] + 1)
+
+    for year in years:
+        written = build_year(geometry, values[f"{LAYER}{year}"].to_numpy(), year, zooms, args.sortie, args.force)
+        if written:
+            logging.info(f"{year}: {written} tuiles générées")
+        else:
+            logging.info(f"{year}: à jour")
+
+
+if __name__ == '__main__':
+    main()
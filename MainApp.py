@@ -1,80 +1,91 @@
 import pandas as pd
 import streamlit as st
 import logging
-import App.app1, App.app2, App.app3, App.app4
+from App.catalogue import load_data
+from App.pages import PAGES, PAGES_BY_TITLE
+from App.profilage import profiled
+from App.serveur import start_services
+from App.traces import begin_trace, end_trace, panel_enabled, show_panel, stage
 from streamlit_option_menu import option_menu
 
 st.set_page_config(page_title="Data Visualization", layout="wide")
 logging.basicConfig(level=logging.INFO)
+# Serveur de santé, métriques et préchauffage : une fois par processus, voir App/serveur.py
+start_services()
 
 st.title("🌍 DATAVISUALISATION")
 
 selected = option_menu(
     menu_title=None,
-    options=["Carte interactive", "Capital_immobilier", "Diplomes", "Analyse historique"],
-    icons=["map", "bar-chart", "book", "clock-history"],
+    options=[page.title for page in PAGES],
+    icons=[page.icon for page in PAGES],
     menu_icon="cast",
     default_index=0,
     orientation="horizontal",
 )
 
-@st.cache_data
-def load_data():
-    try:
-        data_files = {
-            "agesexcommunes": "./Data/Age_csp/agesexcommunes.csv",
-            "agesexdepartements": "./Data/Age_csp/agesexdepartements.csv",
-            "alphabetisation": "./Data/Alphabetisation/alphabetisationcommunes.csv",
-            "pres_df": "./Data/Elections_csv/Pres2022.csv",
-            "leg_df": "./Data/Elections_csv/Legis2022.csv",
-            "basesfiscalcommune": "./Data/Capital_immobilier_csv/basesfiscalescommunes.csv",
-            "basesfiscaldepartement": "./Data/Capital_immobilier_csv/basesfiscalesdepartements.csv",
-            "capitalimmobilier": "./Data/Capital_immobilier_csv/capitalimmobilier.csv",
-            "capitalimmobiliercommune": "./Data/Capital_immobilier_csv/capitalimmobiliercommunes.csv",
-            "capitalimmobilierdepartement": "./Data/Capital_immobilier_csv/capitalimmobilierdepartements.csv",
-            "isfcommunes": "./Data/Capital_immobilier_csv/isfcommunes.csv",
-            "terrescommunes": "./Data/Capital_immobilier_csv/terrescommunes.csv",
-            "diplomes_communes": "./Data/Diplomes_csv/diplomescommunes.csv",
-            "diplomes_departements": "./Data/Diplomes_csv/diplomesdepartements.csv",
-        }
+# Étapes du rerun mesurées (durée, lignes, octets envoyés), voir App/traces.py
+trace = begin_trace(selected)
 
-        data = {key: pd.read_csv(path, low_memory=False) for key, path in data_files.items()}
-        return data
-    except Exception as e:
-        logging.error(f"Erreur lors du chargement des données: {e}")
-        return None
+# Catalogue partagé ; un fichier modifié est relu en arrière-plan sans redémarrer le serveur
+with stage("données"):
+    catalogue = load_data()
+    catalogue.refresh()
+latest = catalogue.snapshot()
+# Chaque session garde ses données jusqu'à ce qu'elle choisisse les nouvelles
+snapshot = st.session_state.setdefault("donnees", latest)
+if snapshot is not latest:
+    changed = sorted(key for key, version in latest.versions.items() if snapshot.versions.get(key) != version)
+    st.sidebar.info(f"Nouvelles données disponibles : {', '.join(changed)}")
+    if st.sidebar.button("Utiliser les nouvelles données"):
+        st.session_state.donnees = latest
+        st.rerun()
+reloading = catalogue.reloading()
+if reloading:
+    st.sidebar.caption(f"Rechargement en cours : {', '.join(reloading)}")
 
-data = load_data()
+data, load_stats, versions = snapshot.data, snapshot.stats, snapshot.versions
 if data:
     locals().update(data)
 else:
     st.error("Impossible de charger les données.")
     st.stop()
 
-if selected == "Carte interactive":
-    st.session_state.page = 'Carte interactive'
-    App.app1.run_elections(data["pres_df"], data["leg_df"], data["diplomes_communes"], data["diplomes_departements"])
-elif selected == "Capital_immobilier":
-    st.session_state.page = 'Capital_immobilier'
-    App.app2.run_immobilier(
-        basesfiscalcommune=data["basesfiscalcommune"],
-        basesfiscaldepartement=data["basesfiscaldepartement"],
-        capitalimmobilier=data["capitalimmobilier"],
-        capitalimmobiliercommune=data["capitalimmobiliercommune"],
-        capitalimmobilierdepartement=data["capitalimmobilierdepartement"],
-        isfcommunes=data["isfcommunes"],
-        terrescommunes=data["terrescommunes"]
-    )
-elif selected == "Diplomes":
-    st.session_state.page = 'Diplomes'
-    App.app3.run_diplomes(
-        diplomes_communes=data["diplomes_communes"],
-        diplomes_departements=data["diplomes_departements"],
-        pres_df=data["pres_df"],
-        leg_df=data["leg_df"]
-    )
-elif selected == "Analyse historique":
-    st.session_state.page = 'Analyse historique'
-    App.app4.run_detailed_analysis(
-        alpha_df=data["alphabetisation"]
-    )
+with stage("tableau de chargement"), st.sidebar.expander("Chargement des données"):
+    st.dataframe(pd.DataFrame([
+        {
+            "fichier": stats.key,
+            "lignes": stats.rows,
+            "colonnes": stats.columns,
+            "Mo": round(stats.bytes / 1e6, 1),
+            "secondes": round(stats.seconds, 2),
+            "source": stats.source,
+            "version": versions.get(stats.key, "").rsplit("-", 1)[-1],
+            "tranches": stats.chunks,
+            "erreur": stats.error or "",
+        }
+        for stats in load_stats.values()
+    ]), hide_index=True)
+
+# Le module de la page n'est importé qu'à sa première visite
+page = PAGES_BY_TITLE[selected]
+st.session_state.page = page.title
+missing = page.missing(data)
+if missing:
+    st.error(f"Page indisponible : fichiers non chargés ({', '.join(missing)}).")
+    st.stop()
+# PROFILAGE=1 (ou ?profil=1 si PROFILAGE_AUTORISE=1) : profil par échantillonnage du rerun, voir App/profilage.py
+try:
+    with profiled(page.title) as profile:
+        with stage("import de la page"):
+            render = page.load()
+        with stage(f"page {page.title}"):
+            render(**page.kwargs(data, versions))
+finally:
+    end_trace(trace)
+if profile is not None:
+    st.sidebar.caption(f"Profil enregistré ({profile.samples} échantillons, {profile.seconds:.2f} s)")
+if panel_enabled():
+    show_panel(trace)
+    from App.memoire import show_memory_panel
+    show_memory_panel(snapshot)
@@ -0,0 +1,74 @@
+# Compare la formule des parts de diplômes de la page Diplomes avant
+# App.indicateurs (total des six colonnes, parts à 0 si le total est nul ou
+# NaN), appliquée ligne par ligne (DataFrame.apply(axis=1)) comme les helpers
+# de diplomesTest1, au calcul vectorisé sur le vrai fichier des diplômes.
+#
+#   python -m benchmarks.bench_indicateurs [chemin_csv] [--annees N]
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from App.indicateurs import EDUCATION_LEVELS, education_shares, education_years
+
+DEFAULT_PATH = "./Data/Diplomes_csv/diplomescommunes.csv"
+
+
+def _timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def baseline_shares(row, year):
+    # Formule d'origine : un effectif NaN rend le total NaN, et les trois parts 0
+    counts = [row[f'{level}h{year}'] + row[f'{level}f{year}'] for level in EDUCATION_LEVELS]
+    total = sum(counts)
+    if pd.isna(total) or total == 0:
+        return pd.Series(0.0, index=EDUCATION_LEVELS)
+    return pd.Series([count / total * 100 for count in counts], index=EDUCATION_LEVELS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des indicateurs de diplômes")
+    parser.add_argument("path", nargs="?", default=DEFAULT_PATH)
+    parser.add_argument("--annees", type=int, default=None,
+                        help="limiter le calcul ligne par ligne aux N premières années")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.path, low_memory=False)
+    years = education_years(df)
+    if args.annees:
+        years = years[:args.annees]
+    print(f"{len(df)} communes, {len(years)} années ({years[0]}-{years[-1]})")
+
+    def rowwise():
+        return {year: df.apply(lambda row: baseline_shares(row, year), axis=1) for year in years}
+
+    def vectorized():
+        return education_shares(df, years, zero_fill=0.0)
+
+    slow, t_slow = _timed(rowwise)
+    fast, t_fast = _timed(vectorized)
+
+    # Contrôle : mêmes parts, sauf quand un effectif manque (NaN compté comme 0
+    # dans le total vectorisé, parts à 0 dans la formule d'origine)
+    columns = [f'{level}{sex}{year}' for year in years for level in EDUCATION_LEVELS for sex in 'hf']
+    partial = df[columns].isna().to_numpy().reshape(len(df), len(years), -1).any(axis=2)
+    mismatches = np.zeros((len(df), len(years)), dtype=bool)
+    for level in EDUCATION_LEVELS:
+        expected = pd.DataFrame({year: slow[year][level] for year in years}).to_numpy(dtype=np.float64)
+        mismatches |= ~np.isclose(expected, fast[level].to_numpy())
+
+    print(f"ligne par ligne : {t_slow:8.3f} s")
+    print(f"vectorisé       : {t_fast:8.3f} s  (3 indicateurs × {len(years)} années)")
+    print(f"accélération    : ×{t_slow / t_fast:,.0f}")
+    print(f"cellules divergentes : {int(mismatches.sum())}, "
+          f"dont {int((mismatches & partial).sum())} avec un effectif NaN")
+    if (mismatches & ~partial).any():
+        raise SystemExit("divergence hors effectifs NaN")
+
+
+if __name__ == "__main__":
+    main()
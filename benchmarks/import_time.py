@@ -0,0 +1,28 @@
+# Temps d'import des pages au démarrage d'un worker, mesuré avec -X importtime
+# dans un interpréteur neuf (médiane sur plusieurs exécutions).
+#
+#   python -m benchmarks.import_time [--modules App.app1 App.app2 ...] [--top 15]
+#
+# Le détail par page (démarrage + première visite) : python -m App.diagnostics importtime
+import argparse
+
+from App.diagnostics import import_time
+
+DEFAULT_MODULES = ["App.app1", "App.app2", "App.app3", "App.app4"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Temps d'import des modules de l'application")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    total, by_package, _ = import_time(args.modules, args.runs)
+    print(f"import {', '.join(args.modules)} : {total:.3f} s (médiane sur {args.runs} exécutions)")
+    for name, seconds in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {name:<28} {seconds:7.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+# Benchmarks des chemins de calcul des pages sur des données synthétiques
+# (benchmarks/synthetique.py), de 1k à 1M communes. Chaque cas est mesuré
+# plusieurs fois (médiane et minimum) et le tout est écrit dans un rapport JSON.
+#
+#   python -m benchmarks.run_benchmarks --tailles 1000 35000 100000 --sortie rapport.json
+#   python -m benchmarks.run_benchmarks --reference rapport.json --tolerance 0.25
+#
+# Avec --reference, les cas plus lents que la référence (médiane au-delà de
+# la tolérance) sont listés et la commande sort en erreur : à lancer avant
+# chaque déploiement, sur la même machine que la référence.
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import plotly
+import plotly.graph_objects as go
+
+from App.alphabetisation import DepartmentStats, LiteracySeries, national_table
+from App.elections import aggregate_by_department, vote_columns
+from App.indicateurs import education_shares
+from App.recherche import SearchIndex
+from benchmarks.synthetique import ALPHA_YEARS, DIPLOMES_YEARS, generate
+
+DEFAULT_SIZES = [1000, 10000, 35000]
+CORRELATION_YEAR = 2010
+# En dessous de ce temps, les écarts relèvent du bruit de mesure
+NOISE_FLOOR = 0.005
+# Requêtes de la recherche de communes : trigrammes et mots fréquents des noms
+# synthétiques, requêtes courtes (sous-chaînes) ; objectif par requête
+SEARCH_QUERIES = ['sai', 'saint', 'saint bourg', 'fontaine', 'ville 12', 'la', 'a', '1']
+SEARCH_TARGET = 0.001
+SEARCH_REPEAT = 100
+
+
+def _measure(func, repeat):
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return result, {'median': statistics.median(times), 'min': min(times), 'runs': repeat}
+
+
+def _csv_files(size, seed, diplomes_years, alpha_years, cache_dir):
+    # Fichiers CSV synthétiques, générés une fois par jeu de paramètres
+    folder = os.path.join(cache_dir, f"n{size}-s{seed}-d{len(diplomes_years)}-a{len(alpha_years)}")
+    datasets = None
+    paths = {}
+    for key in ('pres_df', 'diplomes_communes', 'alphabetisation'):
+        paths[key] = os.path.join(folder, f"{key}.csv")
+        if not os.path.exists(paths[key]):
+            if datasets is None:
+                os.makedirs(folder, exist_ok=True)
+                datasets = generate(size, seed, diplomes_years, alpha_years)
+            datasets[key].to_csv(paths[key], index=False)
+    return paths
+
+
+def run_size(size, repeat, seed, diplomes_years, alpha_years, cache_dir):
+    paths = _csv_files(size, seed, diplomes_years, alpha_years, cache_dir)
+    results = {}
+
+    def case(name, func):
+        value, results[name] = _measure(func, repeat)
+        print(f"  {name:<14} {results[name]['median']:9.4f} s", flush=True)
+        return value
+
+    data = case('load', lambda: {key: pd.read_csv(path, low_memory=False) for key, path in paths.items()})
+    pres_df, diplomes, alpha_df = data['pres_df'], data['diplomes_communes'], data['alphabetisation']
+
+    merged = case('join', lambda: pd.merge(pres_df, diplomes, on='codecommune', how='inner'))
+    case('groupby', lambda: aggregate_by_department(pres_df))
+
+    votes = vote_columns(merged)
+
+    def correlation():
+        shares = education_shares(merged, [CORRELATION_YEAR], zero_fill=0.0)
+        table = pd.DataFrame({'percent_high_edu': shares['sup'][CORRELATION_YEAR]})
+        for col in votes:
+            table[col] = merged[col] / merged['exprimes'] * 100
+        return table.corr()
+    case('correlation', correlation)
+
+    series = case('series', lambda: LiteracySeries(alpha_df))
+    case('ranking', lambda: DepartmentStats(series, 'peralpha'))
+    case('national', lambda: national_table(series))
+    index = case('search_index', lambda: SearchIndex(diplomes['nomcommune'].astype(str).tolist()))
+
+    def search():
+        # Médiane par requête, chacune répétée SEARCH_REPEAT fois
+        medians = {}
+        for query in SEARCH_QUERIES:
+            _, timing = _measure(lambda: [index.search(query) for _ in range(SEARCH_REPEAT)], repeat)
+            medians[query] = timing['median'] / SEARCH_REPEAT
+        return medians
+    medians = case('search', search)
+    results['search']['queries'] = medians
+    slowest = max(medians, key=medians.get)
+    status = "objectif atteint" if medians[slowest] < SEARCH_TARGET else "OBJECTIF DÉPASSÉ"
+    print(f"  {'':<14} requête la plus lente : {slowest!r} en {medians[slowest] * 1000:.3f} ms "
+          f"({status}, {SEARCH_TARGET * 1000:.0f} ms)", flush=True)
+
+    def figure():
+        # Nuage éducation / votes de la page Diplomes, sérialisé comme par st.plotly_chart
+        shares = education_shares(merged, [CORRELATION_YEAR], zero_fill=0.0)['sup'][CORRELATION_YEAR]
+        fig = go.Figure(go.Scattergl(
+            x=shares.to_numpy(), y=(merged[votes[0]] / merged['exprimes'] * 100).to_numpy(),
+            mode='markers', text=merged['nomcommune_x'].to_numpy(),  # nomcommune de pres_df après la jointure
+        ))
+        return fig.to_json()
+    case('figure', figure)
+    return results
+
+
+def compare(report, reference, tolerance):
+    # Cas dont la médiane dépasse celle de la référence de plus de `tolerance`
+    regressions = []
+    for size, cases in report['results'].items():
+        for name, timing in cases.items():
+            baseline = reference.get('results', {}).get(size, {}).get(name)
+            if baseline is None or baseline['median'] < NOISE_FLOOR:
+                continue
+            ratio = timing['median'] / baseline['median']
+            if ratio > 1 + tolerance:
+                regressions.append((size, name, baseline['median'], timing['median'], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks sur données synthétiques")
+    parser.add_argument("--tailles", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="nombres de communes (1000 à 1000000)")
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--graine", type=int, default=0)
+    parser.add_argument("--annees-diplomes", type=int, default=len(DIPLOMES_YEARS),
+                        help="nombre d'années de diplômes (les plus récentes)")
+    parser.add_argument("--annees-alpha", type=int, default=len(ALPHA_YEARS),
+                        help="nombre d'années d'alphabétisation (les premières)")
+    parser.add_argument("--cache", default=os.path.join(tempfile.gettempdir(), "benchmarks-synthetique"))
+    parser.add_argument("--sortie", default="benchmarks/rapport.json")
+    parser.add_argument("--reference", help="rapport JSON de référence")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="ralentissement relatif toléré (0.25 = +25 %%)")
+    args = parser.parse_args()
+
+    diplomes_years = DIPLOMES_YEARS[-args.annees_diplomes:]
+    alpha_years = ALPHA_YEARS[:args.annees_alpha]
+    if CORRELATION_YEAR not in diplomes_years:
+        parser.error(f"--annees-diplomes doit inclure {CORRELATION_YEAR}")
+
+    report = {
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'machine': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpus': os.cpu_count(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'plotly': plotly.__version__,
+        },
+        'parameters': {
+            'repetitions': args.repetitions,
+            'seed': args.graine,
+            'diplomes_years': len(diplomes_years),
+            'alpha_years': len(alpha_years),
+        },
+        'results': {},
+    }
+    for size in args.tailles:
+        print(f"{size} communes", flush=True)
+        report['results'][str(size)] = run_size(
+            size, args.repetitions, args.graine, diplomes_years, alpha_years, args.cache
+        )
+
+    with open(args.sortie, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Rapport écrit dans {args.sortie}")
+
+    if args.reference:
+        with open(args.reference) as f:
+            reference = json.load(f)
+        regressions = compare(report, reference, args.tolerance)
+        for size, name, before, after, ratio in regressions:
+            print(f"RÉGRESSION {name} ({size} communes) : {before:.4f} s -> {after:.4f} s (×{ratio:.2f})")
+        if regressions:
+            sys.exit(1)
+        print(f"Aucune régression au-delà de +{args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
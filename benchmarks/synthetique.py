@@ -0,0 +1,121 @@
+# Jeux de données synthétiques aux schémas des vrais fichiers (élections 2022,
+# diplômes par commune et par département, alphabétisation), de 1k à 1M communes.
+import numpy as np
+import pandas as pd
+
+CANDIDATES = ['ROUSSEL', 'ARTHAUD', 'POUTOU', 'MELENCHON', 'JADOT', 'HIDALGO',
+              'LASSALLE', 'MACRON', 'PECRESSE', 'ZEMMOUR', 'DUPONTAIGNAN', 'MLEPEN']
+DIPLOMES_YEARS = list(range(1962, 2023))
+SIGNATURE_YEARS = [1686, 1786, 1816, 1854, 1856, 1860, 1866, 1872]
+ALPHA_YEARS = list(range(1816, 1947))
+N_DEPARTMENTS = 96
+
+
+def departments():
+    codes = [f"{i:02d}" for i in range(1, 20)] + ['2A', '2B'] + [f"{i:02d}" for i in range(21, 96)]
+    return codes[:N_DEPARTMENTS], [f"DEPARTEMENT-{code}" for code in codes[:N_DEPARTMENTS]]
+
+
+def communes(n, seed=0):
+    # Identifiants : dep, nomdep, codecommune, nomcommune (tailles de départements inégales)
+    rng = np.random.default_rng(seed)
+    dep_codes, dep_names = departments()
+    weights = rng.gamma(2.0, 1.0, N_DEPARTMENTS)
+    dep_idx = np.sort(rng.choice(N_DEPARTMENTS, size=n, p=weights / weights.sum()))
+    rank_in_dep = np.arange(n) - np.searchsorted(dep_idx, dep_idx)
+    codes = np.array(dep_codes, dtype=object)[dep_idx]
+    syllables = np.array(['SAINT', 'BOURG', 'VILLE', 'MONT', 'LA', 'FONTAINE', 'LES', 'SUR', 'ROCHE', 'VAL'])
+    names = [
+        "-".join(syllables[rng.integers(0, len(syllables), 1 + i % 3)]) + f"-{i}"
+        for i in range(n)
+    ]
+    return pd.DataFrame({
+        'dep': codes,
+        'nomdep': np.array(dep_names, dtype=object)[dep_idx],
+        'codecommune': [f"{code}{r + 1:03d}" if r < 999 else f"{code}{r + 1}" for code, r in zip(codes, rank_in_dep)],
+        'nomcommune': names,
+    })
+
+
+def elections(ids, seed=1):
+    rng = np.random.default_rng(seed)
+    n = len(ids)
+    inscrits = rng.lognormal(6.5, 1.3, n).astype(np.int64) + 20
+    votants = (inscrits * rng.uniform(0.55, 0.85, n)).astype(np.int64)
+    exprimes = (votants * rng.uniform(0.93, 0.99, n)).astype(np.int64)
+    shares = rng.dirichlet(np.linspace(1, 6, len(CANDIDATES)), n)
+    votes = np.floor(shares * exprimes[:, None]).astype(np.int64)
+    df = ids.copy()
+    df['inscrits'], df['votants'], df['exprimes'] = inscrits, votants, exprimes
+    for i, candidate in enumerate(CANDIDATES):
+        df[f'voix{candidate}'] = votes[:, i]
+    return df
+
+
+def diplomes_communes(ids, years=DIPLOMES_YEARS, seed=2):
+    rng = np.random.default_rng(seed)
+    n = len(ids)
+    population = rng.lognormal(6.0, 1.3, n)
+    columns = {}
+    for t, year in enumerate(years):
+        progress = t / max(len(years) - 1, 1)
+        sup_rate = 0.03 + 0.25 * progress
+        bac_rate = 0.08 + 0.15 * progress
+        for sex in 'hf':
+            pop = population * rng.uniform(0.45, 0.55, n)
+            sup = pop * np.clip(rng.normal(sup_rate, 0.03, n), 0, 1)
+            bac = pop * np.clip(rng.normal(bac_rate, 0.03, n), 0, 1)
+            columns[f'sup{sex}{year}'] = sup
+            columns[f'bac{sex}{year}'] = bac
+            columns[f'nodip{sex}{year}'] = np.maximum(pop - sup - bac, 0)
+        for level in ('sup', 'bac', 'nodip'):
+            columns[f'{level}{year}'] = columns[f'{level}h{year}'] + columns[f'{level}f{year}']
+        total = columns[f'sup{year}'] + columns[f'bac{year}'] + columns[f'nodip{year}']
+        columns[f'psup{year}'] = columns[f'sup{year}'] / total * 100
+        columns[f'pbac{year}'] = columns[f'bac{year}'] / total * 100
+    values = pd.DataFrame(columns)
+    # Quelques valeurs manquantes, comme dans le vrai fichier
+    mask = rng.random(values.shape) < 0.005
+    values = values.mask(mask)
+    return pd.concat([ids.reset_index(drop=True), values], axis=1)
+
+
+def diplomes_departements(diplomes):
+    counts = [col for col in diplomes.columns if col.startswith(('sup', 'bac', 'nodip'))]
+    dept = diplomes.groupby(['dep', 'nomdep'], sort=False)[counts].sum().reset_index()
+    shares = {}
+    for year in sorted({int(col[-4:]) for col in counts}):
+        total = dept[f'sup{year}'] + dept[f'bac{year}'] + dept[f'nodip{year}']
+        shares[f'psup{year}'] = dept[f'sup{year}'] / total * 100
+        shares[f'pbac{year}'] = dept[f'bac{year}'] / total * 100
+    return pd.concat([dept, pd.DataFrame(shares)], axis=1)
+
+
+def alphabetisation(ids, years=ALPHA_YEARS, seed=3):
+    rng = np.random.default_rng(seed)
+    n = len(ids)
+    base = rng.uniform(5, 60, n)
+    columns = {}
+    for year in SIGNATURE_YEARS:
+        scale = rng.lognormal(0.5, 1.2, n)
+        columns[f'conjsign{year}'] = scale * rng.uniform(0, 1, n)
+        columns[f'conjnosi{year}'] = scale * rng.uniform(0, 3, n)
+    population = rng.lognormal(6.0, 1.2, n)
+    for t, year in enumerate(years):
+        rate = np.clip(base + (100 - base) * (t / len(years)) + rng.normal(0, 3, n), 0, 100)
+        columns[f'palpha{year}'] = population * rate / 100
+        columns[f'peralpha{year}'] = rate
+    return pd.concat([ids.reset_index(drop=True), pd.DataFrame(columns)], axis=1)
+
+
+def generate(n, seed=0, diplomes_years=DIPLOMES_YEARS, alpha_years=ALPHA_YEARS):
+    # Tous les jeux pour n communes : {clé load_data: DataFrame}.
+    # À 1M communes, réduire les années (environ 8 Go avec toutes les années).
+    ids = communes(n, seed)
+    diplomes = diplomes_communes(ids, diplomes_years, seed + 2)
+    return {
+        'pres_df': elections(ids, seed + 1),
+        'diplomes_communes': diplomes,
+        'diplomes_departements': diplomes_departements(diplomes),
+        'alphabetisation': alphabetisation(ids, alpha_years, seed + 3),
+    }
@@ -0,0 +1,5 @@
+# Tests des fonctions de calcul (sans Streamlit en marche) : python -m pytest tests
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
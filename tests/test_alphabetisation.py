@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from App.alphabetisation import (
+    DepartmentStats, LiteracySeries, department_comparison, national_table, national_trends,
+)
+
+
+def _alpha():
+    # Colonnes annuelles volontairement dans le désordre
+    return pd.DataFrame({
+        'nomdep': ['Ain', 'Ain', 'Aisne'],
+        'nomcommune': ['Belley', 'Ambérieu', 'Laon'],
+        'peralpha1860': [60.0, np.nan, 80.0],
+        'peralpha1850': [50.0, 40.0, 70.0],
+        'palpha1850': [100.0, 200.0, 300.0],
+        'conjsign1900': [1.0, 2.0, 3.0],
+        'autre1850': [0.0, 0.0, 0.0],
+    })
+
+
+def test_years_sorted_and_blocks_contiguous():
+    series = LiteracySeries(_alpha())
+    assert series.years['peralpha'].tolist() == [1850, 1860]
+    block = series.blocks['peralpha']
+    assert block.dtype == np.float32 and block.flags['C_CONTIGUOUS']
+    assert block[:, 0].tolist() == [50.0, 40.0, 70.0]
+    assert series.years['conjnosi'].tolist() == []
+    assert series.blocks['conjnosi'].shape == (3, 0)
+
+
+def test_lookup_by_department_and_commune():
+    series = LiteracySeries(_alpha())
+    assert series.department_names() == ['Ain', 'Aisne']
+    assert series.communes_of('Ain') == ['Ambérieu', 'Belley']
+    assert series.communes_of('Inconnu') == []
+    assert series.locate('Aisne', 'Laon') == 2
+    assert series.locate('Ain', 'Laon') is None
+    assert series.year_index('peralpha', 1860) == 1
+    assert series.year_index('peralpha', 1855) is None
+
+
+def test_commune_history_drops_missing_years():
+    series = LiteracySeries(_alpha())
+    years, values = series.commune_history(1)
+    assert years.tolist() == [1850] and values.tolist() == [40.0]
+    years, values = series.commune_history(0, first=1855)
+    assert years.tolist() == [1860] and values.tolist() == [60.0]
+
+
+def test_national_means_ignore_missing_values():
+    table = national_table(LiteracySeries(_alpha()))
+    assert table.loc[1850, 'peralpha'] == pytest.approx(160 / 3)
+    assert table.loc[1860, 'peralpha'] == pytest.approx(70.0)
+    assert np.isnan(table.loc[1900, 'peralpha'])
+    assert table.index.tolist() == [1850, 1860, 1900]
+
+
+def test_national_trends_changes():
+    table = pd.DataFrame({
+        'conjsign': [np.nan, 40.0, 60.0],
+        'conjnosi': [np.nan, 60.0, 40.0],
+        'palpha': [10.0, 20.0, np.nan],
+        'peralpha': [30.0, 45.0, np.nan],
+    }, index=pd.Index([1800, 1850, 1950], name='year'))
+    trends = national_trends(table)
+    assert trends.signatures.index.tolist() == [1850, 1950]
+    assert trends.signature_change == pytest.approx(50.0)
+    # Alphabétisation limitée à 1816-1946 et aux années complètes
+    assert trends.literacy.index.tolist() == [1850]
+    assert trends.literacy_change == 0.0
+    empty = national_trends(table.assign(conjsign=np.nan))
+    assert np.isnan(empty.signature_change)
+
+
+def _department():
+    # Ain : 1, 2, 3, 4 et un point aberrant (100) ; une valeur manquante en 1860
+    return pd.DataFrame({
+        'nomdep': ['Ain'] * 5 + ['Aisne'],
+        'nomcommune': ['a', 'b', 'c', 'd', 'e', 'f'],
+        'peralpha1850': [1.0, 2.0, 3.0, 4.0, 100.0, 50.0],
+        'peralpha1860': [1.0, np.nan, 3.0, 4.0, 5.0, 50.0],
+    })
+
+
+def test_quartiles_fences_and_outliers():
+    series = LiteracySeries(_department())
+    stats = DepartmentStats(series)
+    box = stats.box('Ain', 0)
+    assert (box['q1'], box['median'], box['q3']) == (2.0, 3.0, 4.0)
+    assert box['mean'] == pytest.approx(22.0)
+    # Moustaches bornées aux valeurs observées dans [q1 - 1,5 IQR, q3 + 1,5 IQR]
+    assert (box['lowerfence'], box['upperfence']) == (1.0, 4.0)
+    assert box['outliers'].tolist() == [100.0]
+    assert box['outlier_positions'].tolist() == [4]
+    assert stats.box('Ain', 1)['outliers'].tolist() == []
+
+
+def test_ranks_within_department():
+    series = LiteracySeries(_department())
+    stats = DepartmentStats(series)
+    assert stats.rank(4, 0) == (1.0, 5, 20.0)
+    assert stats.rank(0, 0)[0] == 5.0
+    assert stats.rank(5, 0) == (1.0, 1, 100.0)
+    # Valeur manquante : pas de rang, mais le département compte toujours 5 communes
+    rank, total, _ = stats.rank(1, 1)
+    assert np.isnan(rank) and total == 5
+    assert stats.summary('Ain', 1)['count'] == 4
+    assert stats.summary('Ain', 1)['total'] == 5
+    assert stats.values(series, 'Ain', 1).tolist()[2:] == [3.0, 4.0, 5.0]
+
+
+def test_department_comparison_for_missing_year():
+    series = LiteracySeries(_department())
+    stats = DepartmentStats(series)
+    assert department_comparison(series, stats, 0, 'Ain', 1900) is None
+    comparison = department_comparison(series, stats, 2, 'Ain', 1860)
+    assert comparison.year_index == 1
+    assert comparison.commune_value == 3.0
+    assert comparison.rank == 3.0 and comparison.total == 5
+
+
+def test_box_without_values():
+    df = _department().assign(peralpha1870=[np.nan] * 5 + [20.0])
+    stats = DepartmentStats(LiteracySeries(df))
+    box = stats.box('Ain', 2)
+    assert np.isnan(box['q1']) and np.isnan(box['lowerfence']) and np.isnan(box['upperfence'])
+    assert len(box['outliers']) == 0
+    # Département d'une seule commune : boîte réduite à la valeur, sans aberrant
+    single = stats.box('Aisne', 2)
+    assert single['lowerfence'] == single['upperfence'] == single['median'] == 20.0
+    assert len(single['outliers']) == 0
@@ -0,0 +1,56 @@
+import time
+
+import pandas as pd
+import pytest
+
+from App import catalogue
+from App.catalogue import Catalogue
+from App.chargement import DATA_FILES
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalogue, 'FINGERPRINTS_PATH', str(tmp_path / "empreintes.json"))
+    monkeypatch.setattr(catalogue, '_hash_cache', None)
+    path = str(tmp_path / "alphabetisation.csv")
+    pd.DataFrame({'codecommune': ['01001'], 'peralpha1900': [50.0]}).to_csv(path, index=False)
+    monkeypatch.setitem(DATA_FILES, 'alphabetisation', path)
+    return path
+
+
+def _wait_reloaded(cat, timeout=10):
+    deadline = time.monotonic() + timeout
+    while cat.reloading() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not cat.reloading()
+
+
+def test_refresh_picks_up_changed_file(source):
+    cat = Catalogue({'alphabetisation': source}, check_interval=0)
+    before = cat.snapshot()
+    assert before.data['alphabetisation']['peralpha1900'].tolist() == [50.0]
+
+    pd.DataFrame({'codecommune': ['01001', '2A004'], 'peralpha1900': [62.5, 80.0]}).to_csv(source, index=False)
+    assert cat.refresh() == ('alphabetisation',)
+    _wait_reloaded(cat)
+
+    after = cat.snapshot()
+    assert after.data['alphabetisation']['peralpha1900'].tolist() == [62.5, 80.0]
+    assert after.versions['alphabetisation'] != before.versions['alphabetisation']
+    # Les sessions ouvertes gardent leur instantané
+    assert before.data['alphabetisation']['peralpha1900'].tolist() == [50.0]
+    assert cat.refresh() == ()
+
+
+def test_identical_content_keeps_snapshot(source):
+    cat = Catalogue({'alphabetisation': source}, check_interval=0)
+    before = cat.snapshot()
+    with open(source) as f:
+        content = f.read()
+    time.sleep(0.01)
+    with open(source, 'w') as f:
+        f.write(content)
+    assert cat.refresh() == ('alphabetisation',)
+    _wait_reloaded(cat)
+    assert cat.snapshot() is before
+    assert cat.refresh() == ()
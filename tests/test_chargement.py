@@ -0,0 +1,22 @@
+import pandas as pd
+import pytest
+
+from App.chargement import read_dataset
+
+
+@pytest.fixture
+def quoted_csv(tmp_path):
+    # Champs entre guillemets avec fins de ligne, guillemets doublés et virgules
+    texts = ['simple', '"ligne\nsur deux"', '"avec ""guillemets"" et\nretour"', '"a,b"']
+    lines = ['id,texte,valeur,dep']
+    for i in range(400):
+        lines.append(f'{i},{texts[i % 4]},{i / 7:.3f},{("01", "2A", "13")[i % 3]}')
+    path = tmp_path / "communes.csv"
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path)
+
+
+@pytest.mark.parametrize('chunk_bytes', [300, 517, 1166, 4000])
+def test_chunks_match_single_read(quoted_csv, chunk_bytes):
+    pd.testing.assert_frame_equal(read_dataset(quoted_csv, chunk_bytes=chunk_bytes),
+                                  pd.read_csv(quoted_csv, low_memory=False))
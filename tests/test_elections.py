@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from App.elections import candidate_choices, department_vote_shares
+
+
+def _election():
+    return pd.DataFrame({
+        'dep': ['01', '01', '02', '03'],
+        'nomcommune': ['a', 'b', 'c', 'd'],
+        'exprimes': [100, 300, 200, 0],
+        'voixRN': [50, 150, 20, 0],
+        'voixNUP': [25, 75, 180, 0],
+    })
+
+
+def test_shares_summed_over_communes():
+    shares = department_vote_shares(_election())
+    assert shares.departments == ('01', '02', '03')
+    assert shares.exprimes.tolist() == [400, 200, 0]
+    assert shares.percentages.loc['01'].tolist() == pytest.approx([50.0, 25.0])
+    assert shares.percentages.loc['02', 'voixNUP'] == pytest.approx(90.0)
+    # Aucun exprimé : pourcentage inconnu, pas de division par zéro
+    assert shares.percentages.loc['03'].isna().all()
+
+
+def test_choropleth_frame():
+    frame = department_vote_shares(_election()).choropleth_frame('voixRN')
+    assert list(frame.columns) == ['dep', 'percentage']
+    assert frame['dep'].tolist() == ['01', '02', '03']
+    assert frame['percentage'].tolist()[:2] == pytest.approx([50.0, 10.0])
+    assert np.isnan(frame['percentage'].iat[2])
+
+
+def test_candidate_choices_use_labels():
+    df = _election().assign(voixDUPONT=0, voix2=0)
+    assert candidate_choices(df) == {
+        'Rassemblement National': 'voixRN', 'NUPES': 'voixNUP', 'DUPONT': 'voixDUPONT',
+    }
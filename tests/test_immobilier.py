@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from App.immobilier import AggregationCube, Histograms, ImmobilierDataset, commune_comparison, commune_histogram
+
+
+def _dataset():
+    # Ain : 1, 2, 3, 4 ; Aisne : 10 et une valeur manquante ; une commune sans département
+    return ImmobilierDataset('test', pd.DataFrame({
+        'nomdep': ['Ain', 'Ain', 'Ain', 'Ain', 'Aisne', 'Aisne', None],
+        'nomcommune': ['a', 'b', 'c', 'd', 'e', 'f', 'g'],
+        'codecommune': ['01001', '01002', '01003', '01004', '02001', '02002', '99999'],
+        'valeur1900': [1.0, 2.0, 3.0, 4.0, 10.0, np.nan, 5.0],
+        'surface': [1.0, 1.0, 1.0, 1.0, np.nan, np.nan, 2.0],
+    }))
+
+
+def test_schema_separates_ids_and_years():
+    schema = _dataset().schema
+    assert schema.id_columns == ('nomdep', 'nomcommune', 'codecommune')
+    assert schema.year_groups == {1900: ('valeur1900',)}
+    assert schema.other_columns == ('surface',)
+
+
+def test_lookups_and_selection():
+    dataset = _dataset()
+    assert len(dataset) == 7
+    assert dataset.departments == ['Ain', 'Aisne']
+    assert dataset.communes('Aisne') == ['e', 'f']
+    assert dataset.department_rows('Inconnu').tolist() == []
+    assert dataset.commune_row('Ain', 'c') == 2
+    assert dataset.commune_row('Aisne', 'c') is None
+    frame = dataset.select([0, 4], ['surface', 'codecommune', 'inconnue'])
+    assert frame.columns.tolist() == ['nomcommune', 'codecommune', 'surface']
+    assert frame['codecommune'].tolist() == ['01001', '02001']
+    long = dataset.melt(4, ['valeur1900', 'surface'])
+    assert long['variable'].tolist() == ['valeur1900', 'surface']
+    assert long['value'].iat[0] == 10.0 and np.isnan(long['value'].iat[1])
+
+
+def test_describe_matches_pandas():
+    dataset = _dataset()
+    rows = dataset.department_rows('Aisne').tolist() + [0, 1]
+    expected = dataset.select(rows, ['valeur1900', 'surface'])[['valeur1900', 'surface']].describe()
+    pd.testing.assert_frame_equal(dataset.describe(rows, ['valeur1900', 'surface']), expected)
+
+
+def test_department_statistics():
+    cube = AggregationCube(_dataset())
+    ain = {stat: cube.department_values('Ain', ['valeur1900'], stat)[0]
+           for stat in ('sum', 'mean', 'count', 'q10', 'q50', 'q90')}
+    assert ain == pytest.approx({'sum': 10.0, 'mean': 2.5, 'count': 4.0, 'q10': 1.3, 'q50': 2.5, 'q90': 3.7})
+    # Aucune valeur : somme NaN (et non 0), effectif nul
+    assert np.isnan(cube.department_values('Aisne', ['surface'], 'sum')[0])
+    assert cube.department_values('Aisne', ['surface'], 'count')[0] == 0.0
+
+
+def test_national_statistics_include_rows_without_department():
+    cube = AggregationCube(_dataset())
+    assert cube.national_values(['valeur1900'], 'sum')[0] == pytest.approx(25.0)
+    assert cube.national_values(['valeur1900'], 'count')[0] == 6.0
+    assert cube.national_values(['valeur1900'], 'q50')[0] == pytest.approx(3.5)
+    assert cube.national_values(['surface'], 'sum')[0] == pytest.approx(6.0)
+
+
+def test_benchmark_and_commune_comparison():
+    dataset = _dataset()
+    cube = AggregationCube(dataset)
+    table = cube.benchmark('Ain', ['valeur1900', 'inconnue'], statistics=('mean', 'q50'))
+    assert list(table.columns) == ['valeur1900']
+    assert table.loc[('q50', 'France'), 'valeur1900'] == pytest.approx(3.5)
+    comparison = commune_comparison(dataset, cube, 'Ain', 0, ['valeur1900'])
+    assert comparison['niveau'].tolist() == ['a', 'Ain', 'France']
+    assert comparison['value'].tolist() == pytest.approx([1.0, 2.5, 25 / 6])
+
+
+def test_histogram_bins_shared_by_departments():
+    histograms = Histograms(_dataset(), bins=3)
+    edges, counts = histograms.national('valeur1900')
+    assert edges.tolist() == [1.0, 4.0, 7.0, 10.0]
+    # Borne gauche incluse, maximum dans la dernière classe, NaN ignorés
+    assert counts.tolist() == [3, 2, 1]
+    ain_edges, ain_counts = histograms.department('Ain', 'valeur1900')
+    assert ain_edges.tolist() == edges.tolist()
+    assert ain_counts.tolist() == [3, 1, 0]
+    # La commune sans département n'est comptée qu'à l'échelle nationale
+    assert histograms.department('Aisne', 'valeur1900')[1].tolist() == [0, 0, 1]
+
+
+def test_histogram_of_constant_column():
+    histograms = Histograms(_dataset(), bins=2)
+    edges, counts = histograms.department('Ain', 'surface')
+    assert edges.tolist() == [1.0, 1.5, 2.0]
+    assert counts.tolist() == [4, 0]
+    constant = ImmobilierDataset('constante', pd.DataFrame({'nomdep': ['Ain'] * 2, 'valeur': [7.0, 7.0]}))
+    edges, counts = Histograms(constant, bins=2).national('valeur')
+    assert edges.tolist() == [7.0, 7.5, 8.0]
+    assert counts.tolist() == [2, 0]
+
+
+def test_commune_histogram_value():
+    dataset = _dataset()
+    histograms = Histograms(dataset, bins=3)
+    view = commune_histogram(histograms, dataset, 'Aisne', 5, 'valeur1900')
+    assert np.isnan(view.commune_value)
+    assert view.centers.tolist() == [2.5, 5.5, 8.5]
+    assert view.widths.tolist() == [3.0, 3.0, 3.0]
+    assert commune_histogram(histograms, dataset, 'Ain', 1, 'valeur1900', national=True).counts.sum() == 6
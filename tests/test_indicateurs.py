@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from App.indicateurs import education_counts, education_shares, education_years, superior_share_vs_nodip
+
+
+def _communes(rows, years=(1990, 2000)):
+    # rows : [(suph, supf, bach, bacf, nodiph, nodipf)] identiques pour chaque année
+    data = {}
+    for year in years:
+        for i, level in enumerate(('sup', 'bac', 'nodip')):
+            data[f'{level}h{year}'] = [row[2 * i] for row in rows]
+            data[f'{level}f{year}'] = [row[2 * i + 1] for row in rows]
+    return pd.DataFrame(data, index=[f'c{i}' for i in range(len(rows))])
+
+
+def test_education_years_needs_all_six_columns():
+    df = _communes([(1, 1, 1, 1, 1, 1)])
+    df['suph2010'] = 1.0      # année incomplète
+    assert education_years(df) == [1990, 2000]
+
+
+def test_shares_sum_men_and_women():
+    df = _communes([(10, 10, 20, 20, 10, 30)])
+    shares = education_shares(df)
+    assert shares['sup'].loc['c0', 1990] == pytest.approx(20.0)
+    assert shares['bac'].loc['c0', 1990] == pytest.approx(40.0)
+    assert shares['nodip'].loc['c0', 2000] == pytest.approx(40.0)
+    assert list(shares['sup'].columns) == [1990, 2000]
+    assert list(shares['sup'].index) == ['c0']
+
+
+def test_missing_counts_are_zero():
+    # NaN compté comme 0 (et non propagé) : seules les femmes du supérieur manquent
+    df = _communes([(10, np.nan, 10, 10, 10, 10)])
+    counts, _ = education_counts(df)
+    assert counts['sup'][0, 0] == 10.0
+    assert education_shares(df)['sup'].loc['c0', 1990] == pytest.approx(20.0)
+
+
+def test_zero_denominator_gives_zero_fill():
+    df = _communes([(0, 0, 0, 0, 0, 0), (np.nan,) * 6])
+    shares = education_shares(df)
+    assert shares['sup'].isna().all().all()
+    filled = education_shares(df, [1990], zero_fill=0.0)
+    assert (filled['bac'][1990] == 0.0).all()
+
+
+def test_superior_share_vs_nodip_ignores_bac():
+    df = _communes([(5, 5, 100, 100, 10, 20)])
+    assert superior_share_vs_nodip(df, [1990]).loc['c0', 1990] == pytest.approx(25.0)
@@ -0,0 +1,44 @@
+import pytest
+
+from App.metriques import Registry
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    histogram = registry.histogram("app_test_seconds", "Durée de test", ("page",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, page="Diplomes")
+    histogram.observe(0.2, page="Accueil")
+
+    lines = registry.exposition().splitlines()
+    assert lines[:2] == ["# HELP app_test_seconds Durée de test", "# TYPE app_test_seconds histogram"]
+    assert lines[2:] == [
+        'app_test_seconds_bucket{page="Accueil",le="0.1"} 0',
+        'app_test_seconds_bucket{page="Accueil",le="1.0"} 1',
+        'app_test_seconds_bucket{page="Accueil",le="+Inf"} 1',
+        'app_test_seconds_sum{page="Accueil"} 0.2',
+        'app_test_seconds_count{page="Accueil"} 1',
+        # 0.1 est compté dans le seau le="0.1" (borne incluse)
+        'app_test_seconds_bucket{page="Diplomes",le="0.1"} 2',
+        'app_test_seconds_bucket{page="Diplomes",le="1.0"} 3',
+        'app_test_seconds_bucket{page="Diplomes",le="+Inf"} 4',
+        'app_test_seconds_sum{page="Diplomes"} 3.65',
+        'app_test_seconds_count{page="Diplomes"} 4',
+    ]
+
+
+def test_counter_gauge_and_labels():
+    registry = Registry()
+    counter = registry.counter("app_test_total", "Appels", ("cache", "result"))
+    counter.inc(cache="get_x", result="hit")
+    counter.inc(2, cache="get_x", result="hit")
+    gauge = registry.gauge("app_test_bytes", "Mémoire", ("dataset",))
+    gauge.replace({('a"b',): 10})
+
+    lines = registry.exposition().splitlines()
+    assert 'app_test_total{cache="get_x",result="hit"} 3' in lines
+    assert 'app_test_bytes{dataset="a\\"b"} 10' in lines
+    with pytest.raises(ValueError):
+        counter.inc(cache="get_x")
+    with pytest.raises(ValueError):
+        registry.counter("app_test_total", "Doublon")
@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+from App import catalogue
+from App.chargement import DATA_FILES
+from App.pipeline import Pipeline
+from App.stockage import read_store, store_path
+
+
+def _write_alphabetisation(path, rate):
+    pd.DataFrame({
+        'dep': ['01', '2A'],
+        'codecommune': [' 01001', '2A004 '],
+        'nomcommune': ["L'Abbergement", 'Ajaccio'],
+        'peralpha1900': [rate, 80.0],
+    }).to_csv(path, index=False)
+
+
+@pytest.fixture
+def sources(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalogue, 'FINGERPRINTS_PATH', str(tmp_path / "empreintes.json"))
+    monkeypatch.setattr(catalogue, '_hash_cache', None)
+    paths = {key: str(tmp_path / f"{key}.csv") for key in ('diplomes_communes', 'alphabetisation')}
+    pd.DataFrame({
+        'codecommune': ['01001', '2A004'],
+        'nodiph1900': [1.0, 2.0],
+        'nodiph2000': [3.0, 4.0],
+    }).to_csv(paths['diplomes_communes'], index=False)
+    _write_alphabetisation(paths['alphabetisation'], 50.0)
+    for key, path in paths.items():
+        monkeypatch.setitem(DATA_FILES, key, path)
+    return paths
+
+
+def test_changed_input_reruns_only_downstream(sources, tmp_path):
+    pipeline = Pipeline(str(tmp_path / "pipeline"), str(tmp_path / "colonnes"))
+    assert len(pipeline.run()) == 6
+    assert pipeline.run() == []
+
+    _write_alphabetisation(sources['alphabetisation'], 62.5)
+    pipeline = Pipeline(str(tmp_path / "pipeline"), str(tmp_path / "colonnes"))
+    assert pipeline.run() == ['ingest/alphabetisation', 'clean/alphabetisation', 'export/alphabetisation']
+
+    exported = read_store(store_path('alphabetisation', str(tmp_path / "colonnes")))
+    assert exported['peralpha1900'].tolist() == [62.5, 80.0]
+    assert exported['codecommune'].tolist() == ['01001', '2A004']
+    diplomes = read_store(store_path('diplomes_communes', str(tmp_path / "colonnes")))
+    assert list(diplomes.columns) == ['codecommune', 'nodiph2000']
+
+
+def test_identical_content_reruns_nothing(sources, tmp_path):
+    pipeline = Pipeline(str(tmp_path / "pipeline"), str(tmp_path / "colonnes"))
+    pipeline.run()
+    # Fichier réécrit à l'identique : nouvelle date, même contenu
+    _write_alphabetisation(sources['alphabetisation'], 50.0)
+    assert pipeline.run() == []
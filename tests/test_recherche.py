@@ -0,0 +1,60 @@
+from App.recherche import SearchIndex, filter_options, normalize_name
+
+NAMES = ["Saint-Étienne", "Étampes", "L'Abergement-de-Varey", "Paris", "Pari", "Sainte-Marie", "Trappes"]
+
+
+def test_normalize_name():
+    assert normalize_name("L'Abergement-de-Varey") == "l abergement de varey"
+    assert normalize_name("  Saint–Étienne ") == "saint–etienne"
+    assert normalize_name("SAINT-ÉTIENNE") == "saint etienne"
+    assert normalize_name(None) == ""
+    assert normalize_name(float("nan")) == ""
+
+
+def test_accents_and_case_ignored():
+    index = SearchIndex(NAMES)
+    assert index.search_names("etienne") == ["Saint-Étienne"]
+    assert index.search_names("ÉTAMPES") == ["Étampes"]
+
+
+def test_ranking_exact_then_prefix_then_word_then_substring():
+    index = SearchIndex(["Faubourg", "Saint-Aubin", "Aubenas", "Aube"])
+    assert index.search_names("aube") == ["Aube", "Aubenas"]
+    assert index.search_names("aub") == ["Aube", "Aubenas", "Saint-Aubin", "Faubourg"]
+    # À rang égal, le nom le plus court d'abord
+    assert SearchIndex(NAMES).search_names("saint") == ["Sainte-Marie", "Saint-Étienne"]
+
+
+def test_short_query_matches_substrings():
+    index = SearchIndex(NAMES)
+    # Moins de trois caractères : sous-chaînes aussi, après les débuts de mots
+    assert index.search_names("tr") == ["Trappes"]
+    assert index.search_names("pe") == ["Étampes", "Trappes"]
+    assert index.search_names("ri") == ["Pari", "Paris", "Sainte-Marie"]
+    assert index.search_names("de") == ["L'Abergement-de-Varey"]
+    assert index.search_names("") == []
+
+
+def test_trigram_candidates_are_checked():
+    # Tous les trigrammes de "abcd" sont présents, mais pas la sous-chaîne
+    index = SearchIndex(["Abcxbcd", "Xabcd"])
+    assert index.search_names("abcd") == ["Xabcd"]
+    assert index.search_names("abcd", limit=None) == ["Xabcd"]
+
+
+def test_word_prefix_anywhere_in_name():
+    # Début d'un mot, même si la première occurrence est au milieu d'un mot
+    index = SearchIndex(["Paubin-Aubin", "Laubin"])
+    assert index.search_names("aubin") == ["Paubin-Aubin", "Laubin"]
+
+
+def test_restrict_and_limit():
+    index = SearchIndex(NAMES)
+    assert index.search_names("pari", restrict_to=[3]) == ["Paris"]
+    assert index.search_names("a", limit=1) == ["L'Abergement-de-Varey"]
+
+
+def test_filter_options_keeps_all_options_without_query():
+    index = SearchIndex(NAMES)
+    assert filter_options(index, [3, 0], "") == ["Paris", "Saint-Étienne"]
+    assert filter_options(index, [3, 0], "sai") == ["Saint-Étienne"]
@@ -0,0 +1,43 @@
+import pandas as pd
+
+from App.resultats import ResultStore, encode
+
+
+def test_round_trip_and_version_miss(tmp_path):
+    path = str(tmp_path / "precalcul.sqlite")
+    frame = pd.DataFrame({'dep': ['01', '2A'], 'part': [12.5, 40.0]})
+    store = ResultStore(path)
+    store.put('vote_shares', {'election': 'pres_df'}, ('pres_df-abc',), encode(frame))
+    store.close()
+
+    reader = ResultStore(path, readonly=True)
+    try:
+        pd.testing.assert_frame_equal(reader.get('vote_shares', {'election': 'pres_df'}, ('pres_df-abc',)), frame)
+        # Nouvelle version du fichier source, ou autres paramètres : pas de résultat
+        assert reader.get('vote_shares', {'election': 'pres_df'}, ('pres_df-def',)) is None
+        assert reader.get('vote_shares', {'election': 'leg_df'}, ('pres_df-abc',)) is None
+        assert reader.versions() == {('vote_shares', '{"election":"pres_df"}'): 'pres_df-abc'}
+    finally:
+        reader.close()
+
+
+def test_replaced_file_is_reopened(tmp_path):
+    path = str(tmp_path / "precalcul.sqlite")
+    writer = ResultStore(path)
+    writer.put('national_trends', {}, 'v1', encode(1))
+    writer.close()
+    reader = ResultStore(path, readonly=True)
+
+    # Nouveau magasin écrit à côté puis renommé : nouvel inode
+    tmp = str(tmp_path / "nouveau.sqlite")
+    writer = ResultStore(tmp)
+    writer.put('national_trends', {}, 'v2', encode(2))
+    writer.close()
+    (tmp_path / "nouveau.sqlite").replace(path)
+
+    try:
+        assert reader.refresh()
+        assert reader.get('national_trends', {}, 'v2') == 2
+        assert reader.get('national_trends', {}, 'v1') is None
+    finally:
+        reader.close()
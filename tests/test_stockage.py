@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from App.stockage import ingest_csv, read_store
+
+
+def _expected(path, value_columns):
+    # pd.read_csv sur le fichier entier, colonnes de valeurs en float32
+    df = pd.read_csv(path, low_memory=False)
+    return df.astype({col: np.float32 for col in value_columns})
+
+
+@pytest.fixture
+def communes_csv(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 2500
+    df = pd.DataFrame({
+        'dep': [("01", "2A", "13")[i % 3] for i in range(n)],
+        'codecommune': [1001 + i for i in range(n)],
+        'nomcommune': [f"Commune {i}" for i in range(n)],
+        'nodiph2020': rng.integers(0, 500, n).astype(float),
+        'supf2020': rng.random(n) * 100,
+        'bach1900': rng.random(n),
+    })
+    df.loc[[3, 1700], 'supf2020'] = np.nan
+    path = tmp_path / "diplomescommunes.csv"
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def test_store_matches_read_csv(communes_csv, tmp_path):
+    out = str(tmp_path / "colonnes")
+    meta = ingest_csv(communes_csv, out, chunk_rows=700, version='v1')
+    assert meta['rows'] == 2500
+    assert meta['id_columns'] == ['dep', 'codecommune', 'nomcommune']
+    pd.testing.assert_frame_equal(read_store(out), _expected(communes_csv, meta['value_columns']))
+
+
+def test_keep_filter_drops_columns(communes_csv, tmp_path):
+    out = str(tmp_path / "colonnes")
+    meta = ingest_csv(communes_csv, out, keep=lambda col: not col.endswith('1900'))
+    assert meta['value_columns'] == ['nodiph2020', 'supf2020']
+    assert meta['dropped_columns'] == 1
+    assert list(read_store(out).columns) == ['dep', 'codecommune', 'nomcommune', 'nodiph2020', 'supf2020']
+
+
+def test_late_text_column_is_stored_as_text(tmp_path):
+    # Colonne numérique sur les 1000 premières lignes, texte ensuite
+    path = tmp_path / "communes.csv"
+    values = [str(i) for i in range(1500)] + ["secret"] + [str(i) for i in range(499)]
+    pd.DataFrame({'codecommune': range(2000), 'note': values, 'part': np.arange(2000) / 3}).to_csv(path, index=False)
+    out = str(tmp_path / "colonnes")
+    meta = ingest_csv(str(path), out, chunk_rows=400)
+    assert meta['id_columns'] == ['codecommune', 'note']
+    assert meta['value_columns'] == ['part']
+    pd.testing.assert_frame_equal(read_store(out), _expected(str(path), ['part']))
@@ -0,0 +1,112 @@
+import json
+
+import numpy as np
+import pytest
+
+from App.tuiles import (
+    FILL_ALPHA, NO_DATA_COLOR, CommuneGeometry, available_years, build_year, load_values, normalize_code,
+    render_tile, value_colors,
+)
+
+
+def test_normalize_code():
+    assert normalize_code(1001) == "01001"
+    assert normalize_code("1001.0") == "01001"
+    assert normalize_code(" 2b110 ") == "2B110"
+    assert normalize_code("75056") == "75056"
+
+
+def test_value_colors_follow_palette():
+    colors = value_colors([0.0, 100.0, 150.0, np.nan, 50.0])
+    assert colors[0] == (0xff, 0xff, 0xcc, FILL_ALPHA)
+    assert colors[1] == (0x80, 0x00, 0x26, FILL_ALPHA)
+    assert colors[2] == colors[1]           # borné à 100 %
+    assert colors[3] == NO_DATA_COLOR
+    assert colors[4] == (0xfd, 0x8d, 0x3c, FILL_ALPHA)
+
+
+def _square(lon, lat, size):
+    return [[[lon, lat], [lon + size, lat], [lon + size, lat + size], [lon, lat + size], [lon, lat]]]
+
+
+@pytest.fixture
+def geometry(tmp_path):
+    path = tmp_path / "communes.geojson"
+    path.write_text(json.dumps({'type': 'FeatureCollection', 'features': [
+        {'properties': {'code': '1001'}, 'geometry': {'type': 'Polygon', 'coordinates': _square(5.0, 45.0, 0.1)}},
+        {'properties': {'code': '2B110'}, 'geometry': {'type': 'MultiPolygon', 'coordinates': [
+            _square(9.0, 42.0, 0.5), _square(9.6, 42.0, 0.1)]}},
+        {'properties': {'code': '99999'}, 'geometry': None},
+    ]}))
+    return CommuneGeometry(str(path))
+
+
+def test_geometry_orders_larger_communes_first(geometry):
+    # Commune sans géométrie ignorée
+    assert geometry.codes == ['2B110', '01001']
+    assert len(geometry.polygons[0]) == 2
+    xs, ys = geometry.tile_range(0)
+    assert list(xs) == [0] and list(ys) == [0]
+    assert geometry.features_in_tile(0, 0, 0).tolist() == [0, 1]
+    # Zoom 8 : chaque commune dans sa propre tuile
+    x, y = (geometry.boxes[1, :2] * 2 ** 8).astype(int)
+    assert geometry.features_in_tile(8, x, y).tolist() == [1]
+
+
+def test_build_year_skips_unchanged_inputs(geometry, tmp_path):
+    out_dir = str(tmp_path / "tuiles")
+    values = np.array([80.0, np.nan])
+    assert build_year(geometry, values, 1850, [0, 1], out_dir) > 0
+    assert build_year(geometry, values, 1850, [0, 1], out_dir) == 0
+    assert build_year(geometry, values + 1, 1850, [0, 1], out_dir) > 0
+    assert available_years(out_dir) == {1850: {'min_zoom': 0, 'max_zoom': 1}}
+
+
+def test_load_values_normalizes_codes(tmp_path):
+    path = tmp_path / "alpha.csv"
+    path.write_text("codecommune,nomcommune,peralpha1850,peralpha1860\n1001,A,50,60\n01001,A,1,2\n2b110,B,,70\n")
+    values = load_values(str(path), [1850])
+    assert values.index.tolist() == ['01001', '2B110']
+    assert values.columns.tolist() == ['peralpha1850']
+    assert values.loc['01001', 'peralpha1850'] == 50.0
+    assert np.isnan(values.loc['2B110', 'peralpha1850'])
+
+
+def test_holes_are_not_painted(tmp_path):
+    # Commune percée de deux trous, dont un occupé par une commune enclavée,
+    # le tout dans une seule tuile au zoom 6
+    outer = [[1.0, 1.0], [5.0, 1.0], [5.0, 5.0], [1.0, 5.0], [1.0, 1.0]]
+    enclave = [[2.0, 2.0], [3.0, 2.0], [3.0, 3.0], [2.0, 3.0], [2.0, 2.0]]
+    empty = [[3.5, 3.5], [4.5, 3.5], [4.5, 4.5], [3.5, 4.5], [3.5, 3.5]]
+    path = tmp_path / "communes.geojson"
+    path.write_text(json.dumps({'type': 'FeatureCollection', 'features': [
+        {'properties': {'code': '1'}, 'geometry': {'type': 'Polygon', 'coordinates': [enclave]}},
+        {'properties': {'code': '2'}, 'geometry': {'type': 'Polygon', 'coordinates': [outer, enclave, empty]}},
+    ]}))
+    geometry = CommuneGeometry(str(path))
+    colors = value_colors([0.0 if code == '00001' else 100.0 for code in geometry.codes])
+    zoom = 6
+    xs, ys = geometry.tile_range(zoom)
+    assert len(xs) == len(ys) == 1
+    x, y = xs[0], ys[0]
+    image = render_tile(geometry, colors, zoom, x, y)
+
+    def pixel(lon, lat):
+        scale = 256 * 2 ** zoom
+        px = int((lon + 180.0) / 360.0 * scale) - x * 256
+        sin = np.sin(np.radians(lat))
+        py = int((0.5 - np.log((1 + sin) / (1 - sin)) / (4 * np.pi)) * scale) - y * 256
+        return image.getpixel((px, py))
+
+    assert pixel(1.5, 1.5) == colors[geometry.codes.index('00002')]
+    assert pixel(2.5, 2.5) == colors[geometry.codes.index('00001')]
+    assert pixel(4.0, 4.0)[3] == 0
+
+
+def test_rebuild_removes_old_tiles(geometry, tmp_path):
+    out_dir = tmp_path / "tuiles"
+    build_year(geometry, np.array([80.0, 20.0]), 1850, [0, 1, 2], str(out_dir))
+    assert (out_dir / "peralpha" / "1850" / "2").is_dir()
+    build_year(geometry, np.array([70.0, 20.0]), 1850, [0, 1], str(out_dir))
+    assert sorted(p.name for p in (out_dir / "peralpha" / "1850").iterdir()) == ['0', '1', 'manifest.json']
+    assert available_years(str(out_dir)) == {1850: {'min_zoom': 0, 'max_zoom': 1}}